@@ -0,0 +1,104 @@
+"""Benchmark hashing on a process pool against a thread pool.
+
+Writes two synthetic JPEG corpora, many small images and a few large ones,
+and hashes each with both backends. Reports wall time, throughput and the
+peak resident memory of this process and of the largest worker process.
+
+Usage:
+    python benchmarks/bench_backends.py --workers 4
+"""
+
+import argparse
+import multiprocessing
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from photocluster.internal.hasher.core import iter_hashes
+from photocluster.internal.util.processing import BACKENDS, Backend, gil_enabled
+
+CORPORA = {
+    "small": (400, (640, 480)),
+    "large": (24, (6000, 4000)),
+}
+
+
+def write_corpus(directory: Path, count: int, size: tuple[int, int]) -> list[Path]:
+    """Write `count` noisy gradient JPEGs of the given size."""
+    rng = np.random.default_rng(0)
+    width, height = size
+    # uint8 arithmetic wraps, and keeps this process small: its peak RSS is
+    # inherited by the benchmark runs started from it.
+    gradient = np.add.outer(
+        np.arange(height, dtype=np.uint8), np.arange(width, dtype=np.uint8)
+    )
+    paths = []
+    for i in range(count):
+        pixels = rng.integers(0, 32, (height, width, 3), dtype=np.uint8)
+        pixels += gradient[..., None]
+        pixels += np.uint8(i * 7 % 256)
+        path = directory / f"img_{i:05d}.jpg"
+        Image.fromarray(pixels).save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+
+def run(corpus: Path, backend: Backend, workers: int) -> None:
+    """Hash one corpus with one backend and print a result line."""
+    paths = sorted(corpus.glob("*.jpg"))
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_hashes(paths, workers, backend=backend))
+    elapsed = time.perf_counter() - start
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(
+        f"{corpus.name:<6} {backend:<8} {elapsed:8.2f}s {count / elapsed:9.1f} img/s"
+        f"  rss {self_rss:7.0f} MiB  largest worker {child_rss:7.0f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--corpus", choices=CORPORA, nargs="+", default=list(CORPORA))
+    # Internal: hash one corpus with one backend in this interpreter.
+    parser.add_argument("--run", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.backend, args.workers)
+        return
+
+    print(f"GIL {'enabled' if gil_enabled() else 'disabled'}, {args.workers} workers")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.corpus:
+            count, size = CORPORA[name]
+            corpus = Path(tmp) / name
+            corpus.mkdir()
+            write_corpus(corpus, count, size)
+            for backend in BACKENDS:
+                # A fresh interpreter per run keeps peak RSS figures separate.
+                subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--workers",
+                        str(args.workers),
+                        "--run",
+                        str(corpus),
+                        "--backend",
+                        backend,
+                    ],
+                    check=True,
+                )
+
+
+if __name__ == "__main__":
+    main()
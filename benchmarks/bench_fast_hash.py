@@ -0,0 +1,130 @@
+"""Benchmark fast (EXIF thumbnail / reduced decode) hashing against full decodes.
+
+Writes a synthetic corpus of camera-sized JPEGs in near-duplicate groups. Half
+of the files embed a 160x120 EXIF thumbnail like camera output; the rest make
+the fast path fall back to a reduced-scale decode. Reports throughput of
+both modes, the bit distance between fast and full hashes, and how well
+clustering on fast hashes agrees with clustering on full hashes.
+
+Usage:
+    python benchmarks/bench_fast_hash.py --groups 40 --workers 4
+"""
+
+import argparse
+import io
+import multiprocessing
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from sklearn.metrics import adjusted_rand_score, pair_confusion_matrix
+
+from photocluster.internal.cluster import cluster_hashes
+from photocluster.internal.hasher.core import iter_hashes
+from photocluster.internal.models.image import ImageHash
+
+IMAGE_SIZE = (4000, 3000)
+THUMBNAIL_SIZE = (160, 120)
+
+
+def exif_with_thumbnail(thumbnail: bytes) -> bytes:
+    """Build an EXIF segment whose IFD1 points at a JPEG thumbnail."""
+    ifd1_offset = 8 + 2 + 4
+    thumbnail_offset = ifd1_offset + 2 + 2 * 12 + 4
+    ifd1 = struct.pack(
+        "<HHHIIHHII",
+        2,
+        0x0201,
+        4,
+        1,
+        thumbnail_offset,
+        0x0202,
+        4,
+        1,
+        len(thumbnail),
+    )
+    tiff = b"II*\x00" + struct.pack("<IHI", 8, 0, ifd1_offset) + ifd1
+    return b"Exif\x00\x00" + tiff + struct.pack("<I", 0) + thumbnail
+
+
+def write_corpus(directory: Path, groups: int, group_size: int) -> list[Path]:
+    """Write groups of smooth random scenes with small per-copy changes."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for group in range(groups):
+        scene = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+        base = Image.fromarray(scene).resize(IMAGE_SIZE, Image.Resampling.BICUBIC)
+        for copy in range(group_size):
+            image = base.point(lambda v, c=copy: min(255, v + 3 * c))
+            exif = b""
+            if group % 2 == 0:
+                buffer = io.BytesIO()
+                image.resize(THUMBNAIL_SIZE).save(buffer, "JPEG", quality=80)
+                exif = exif_with_thumbnail(buffer.getvalue())
+            path = directory / f"g{group:03d}_{copy}.jpg"
+            image.save(path, "JPEG", quality=90 - 5 * copy, exif=exif)
+            paths.append(path)
+    return paths
+
+
+def hash_all(
+    paths: list[Path], workers: int, fast: bool
+) -> tuple[list[ImageHash], float]:
+    """Hash every path and return the hashes with the elapsed seconds."""
+    start = time.perf_counter()
+    hashes = list(iter_hashes(paths, workers, fast=fast))
+    return hashes, time.perf_counter() - start
+
+
+def labels(hashes: list[ImageHash], eps: float) -> np.ndarray:
+    """Cluster labels with every noise point given its own label."""
+    result = np.array([c.cluster_id for c in cluster_hashes(hashes, eps=eps)])
+    noise = result == -1
+    result[noise] = -1 - np.arange(noise.sum())
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=40)
+    parser.add_argument("--group-size", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--eps", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(Path(tmp), args.groups, args.group_size)
+        full, full_time = hash_all(paths, args.workers, fast=False)
+        fast, fast_time = hash_all(paths, args.workers, fast=True)
+
+    count = len(paths)
+    print(f"full  {full_time:8.2f}s {count / full_time:9.1f} img/s")
+    print(
+        f"fast  {fast_time:8.2f}s {count / fast_time:9.1f} img/s"
+        f"  speedup={full_time / fast_time:5.1f}x"
+    )
+
+    distances = np.array(
+        [np.count_nonzero(a.hash != b.hash) for a, b in zip(full, fast, strict=True)]
+    )
+    with_thumbnail = np.array([int(p.name[1:4]) % 2 == 0 for p in paths])
+    for name, mask in (("thumbnail", with_thumbnail), ("reduced", ~with_thumbnail)):
+        print(
+            f"{name:<10} bits differing from full: mean {distances[mask].mean():.2f}"
+            f"  max {distances[mask].max()}"
+        )
+
+    exact, approx = labels(full, args.eps), labels(fast, args.eps)
+    pairs = pair_confusion_matrix(exact, approx)
+    pair_recall = pairs[1, 1] / max(1, pairs[1, 0] + pairs[1, 1])
+    print(
+        f"clustering agreement: ARI={adjusted_rand_score(exact, approx):.4f}"
+        f"  pair recall={pair_recall:.2%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark approximate (LSH) clustering against exact DBSCAN.
+
+Generates synthetic 64-bit hashes made of near-duplicate groups plus unrelated
+singletons, clusters them both ways, and reports runtime, speedup and label
+agreement (adjusted Rand index and recall of exact same-cluster pairs).
+
+Usage:
+    python benchmarks/bench_lsh.py --num-hashes 20000 --eps 0.2
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score, pair_confusion_matrix
+
+from photocluster.internal.cluster import cluster_hashes
+from photocluster.internal.models.image import ImageHash
+
+NBITS = 64
+
+
+def make_hashes(
+    num_hashes: int, group_size: int, max_flips: int, seed: int
+) -> list[ImageHash]:
+    """Create near-duplicate groups around random centers plus singletons."""
+    rng = np.random.default_rng(seed)
+    vectors = []
+    while len(vectors) < num_hashes:
+        center = rng.integers(0, 2, NBITS, dtype=np.uint8)
+        size = group_size if rng.random() < 0.5 else 1
+        for _ in range(size):
+            variant = center.copy()
+            flips = rng.choice(
+                NBITS, size=rng.integers(0, max_flips + 1), replace=False
+            )
+            variant[flips] ^= 1
+            vectors.append(variant)
+    return [
+        ImageHash(path=Path(f"img_{i}.jpg"), hash=vector)
+        for i, vector in enumerate(vectors[:num_hashes])
+    ]
+
+
+def noise_as_singletons(labels: list[int]) -> np.ndarray:
+    """Give every noise point its own label so metrics do not merge them."""
+    result = np.array(labels)
+    noise = result == -1
+    result[noise] = -1 - np.arange(noise.sum())
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-hashes", type=int, default=20000)
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--max-flips", type=int, default=6)
+    parser.add_argument("--eps", type=float, default=0.2)
+    parser.add_argument("--recall", type=float, nargs="+", default=[0.9, 0.99])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    hashes = make_hashes(args.num_hashes, args.group_size, args.max_flips, args.seed)
+
+    start = time.perf_counter()
+    exact = noise_as_singletons(
+        [c.cluster_id for c in cluster_hashes(hashes, eps=args.eps)]
+    )
+    exact_time = time.perf_counter() - start
+    print(f"exact        {exact_time:8.3f}s")
+
+    for recall in args.recall:
+        start = time.perf_counter()
+        approx = noise_as_singletons(
+            [
+                c.cluster_id
+                for c in cluster_hashes(
+                    hashes, eps=args.eps, approximate=True, recall=recall
+                )
+            ]
+        )
+        approx_time = time.perf_counter() - start
+        ari = adjusted_rand_score(exact, approx)
+        pairs = pair_confusion_matrix(exact, approx)
+        pair_recall = pairs[1, 1] / max(1, pairs[1, 0] + pairs[1, 1])
+        print(
+            f"recall={recall:<5} {approx_time:8.3f}s  "
+            f"speedup={exact_time / approx_time:6.1f}x  ARI={ari:.4f}  "
+            f"pair recall={pair_recall:.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
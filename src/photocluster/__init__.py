@@ -1,5 +1,33 @@
 """Photocluster package public API."""
 
-from .core import photocluster
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["photocluster"]
+if TYPE_CHECKING:
+    from .core import photocluster
+    from .internal.hashset import HashSet
+    from .internal.index import HashIndex
+
+__all__ = ["HashIndex", "HashSet", "photocluster"]
+
+# Public names are resolved on first access so that ``import photocluster`` (and
+# every spawned hash worker, which imports this package) stays cheap and only
+# pulls in heavy dependencies such as scikit-learn or pydantic when needed.
+_LAZY_ATTRIBUTES = {
+    "photocluster": ".core",
+    "HashIndex": ".internal.index",
+    "HashSet": ".internal.hashset",
+}
+
+
+def __getattr__(name: str) -> object:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+"""Allow running PhotoCluster with ``python -m photocluster``."""
+
+from .cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,913 @@
+"""Command-line interface for PhotoCluster."""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from .internal.cache import HashCache
+from .internal.checkpoint import HashCheckpoint
+from .internal.hasher.core import hash_algorithm, iter_hashes
+from .internal.hasher.prefetch import DEFAULT_PREFETCH_BYTES
+from .internal.hasher.profiling import HashProfile
+from .internal.hashset import HashSet, read_hash_file
+from .internal.index import DEFAULT_MAX_DISTANCE
+from .internal.lsh import DEFAULT_RECALL
+from .internal.models.image import ClusteredImage, ImageHash
+from .internal.util.files import (
+    find_image_files,
+    group_by_folder,
+    group_image_files,
+    image_folder,
+)
+from .internal.util.processing import (
+    BACKENDS,
+    CancellationToken,
+    get_num_processes,
+)
+from .internal.util.progress import Progress, StageTimer, WorkerLoads
+from .internal.util.throttle import IO_CLASSES, MEGABYTE, Throttle, lower_priority
+from .internal.watch import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENSITIVITY = 0.2
+DEFAULT_MAX_SENSITIVITY = 0.3
+GRAPH_SUFFIX = ".npz"
+
+
+def _proportion(value: str) -> float:
+    number = float(value)
+    if not 0.0 <= number <= 1.0:
+        raise argparse.ArgumentTypeError("must be between 0.0 and 1.0")
+    return number
+
+
+def _open_proportion(value: str) -> float:
+    number = float(value)
+    if not 0.0 < number < 1.0:
+        raise argparse.ArgumentTypeError("must be between 0.0 and 1.0, exclusive")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("must be greater than 0")
+    return number
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be 1 or greater")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("must be 0 or greater")
+    return number
+
+
+def _directory(value: str) -> Path:
+    path = Path(value).expanduser().resolve()
+    if not path.is_dir():
+        raise argparse.ArgumentTypeError(f"not a directory: {value}")
+    return path
+
+
+class _Unsupported(argparse.Action):
+    """Reject an option another subcommand has, with a clearer error than argparse."""
+
+    def __init__(self, option_strings: list[str], dest: str, **kwargs: Any) -> None:
+        super().__init__(
+            option_strings, dest, nargs="?", help=argparse.SUPPRESS, **kwargs
+        )
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: object,
+        option_string: str | None = None,
+    ) -> None:
+        parser.error(f"{option_string} is not supported by watch; use run instead")
+
+
+def _scan_stage(input_dir: Path, timer: StageTimer) -> list[Path]:
+    with timer.stage("scan") as timing:
+        paths = find_image_files(input_dir)
+        timing.items = len(paths)
+    return paths
+
+
+def _hash_options(args: argparse.Namespace) -> dict[str, Any]:
+    """Translate parsed arguments into keyword arguments for iter_hashes."""
+    prefetch_mb = args.prefetch_mb
+    return {
+        "num_processes": args.processes,
+        "quality": args.quality,
+        "capture": args.capture,
+        "prefetch": prefetch_mb is not None,
+        "prefetch_bytes": (prefetch_mb or 0) * 1024 * 1024,
+        "backend": args.backend,
+        "largest_first": args.largest_first,
+        "fast": args.fast,
+        "dihedral": args.match_rotations,
+        "confirm": args.confirm,
+        "memory_budget": (
+            int(args.memory_mb * 1024 * 1024) if args.memory_mb is not None else None
+        ),
+    }
+
+
+def _algorithm(args: argparse.Namespace) -> str:
+    """Name of the hashes the parsed hash options produce."""
+    return hash_algorithm(args.fast, args.match_rotations, args.confirm)
+
+
+def _throttle(args: argparse.Namespace) -> Throttle | None:
+    """Build a Throttle from --max-files-per-sec and --max-mb-per-sec, if given."""
+    if args.max_files_per_sec is None and args.max_mb_per_sec is None:
+        return None
+    return Throttle(
+        files_per_second=args.max_files_per_sec,
+        bytes_per_second=(
+            args.max_mb_per_sec * MEGABYTE if args.max_mb_per_sec is not None else None
+        ),
+    )
+
+
+def _hash_stage(
+    paths: list[Path],
+    timer: StageTimer,
+    args: argparse.Namespace,
+    checkpoint: HashCheckpoint | None,
+) -> list[ImageHash]:
+    results: dict[Path, ImageHash] = {}
+    pending = []
+    for path in paths:
+        stored = (
+            checkpoint.get(path, quality=args.quality, capture=args.capture)
+            if checkpoint is not None
+            else None
+        )
+        if stored is not None:
+            results[path] = stored
+        else:
+            pending.append(path)
+    if results:
+        print(f"Reusing {len(results)} hashes from checkpoint", file=sys.stderr)
+
+    cache = (
+        HashCache(
+            args.cache,
+            readonly=args.cache_readonly,
+            algorithm=_algorithm(args),
+        )
+        if args.cache is not None
+        else None
+    )
+    try:
+        if cache is not None:
+            with timer.stage("cache") as timing:
+                cached, pending = cache.lookup(
+                    pending, quality=args.quality, capture=args.capture
+                )
+                timing.items = len(cached)
+            print(f"Reusing {len(cached)} hashes from cache", file=sys.stderr)
+            for result in cached.values():
+                if checkpoint is not None:
+                    checkpoint.append(result)
+            results.update(cached)
+
+        profile = HashProfile() if args.profile or args.profile_stats else None
+        read_limit = _throttle(args)
+        cancel = CancellationToken()
+        with (
+            timer.stage("hash", workers=args.processes) as timing,
+            cancel.cancel_on(signal.SIGTERM),
+        ):
+            timing.worker_loads = WorkerLoads()
+            progress = Progress("hash", len(pending))
+            try:
+                for result in iter_hashes(
+                    pending,
+                    worker_loads=timing.worker_loads,
+                    digest=cache is not None,
+                    profile=profile,
+                    cancel=cancel,
+                    read_limit=read_limit,
+                    **_hash_options(args),
+                ):
+                    if checkpoint is not None:
+                        checkpoint.append(result)
+                    if cache is not None:
+                        cache.put(result)
+                    results[result.path] = result
+                    progress.update()
+            finally:
+                progress.close()
+                timing.items = progress.done
+        if read_limit is not None:
+            print(read_limit.summary("read"), file=sys.stderr)
+        if profile is not None:
+            print(profile.summary(), file=sys.stderr)
+            if args.profile_stats is not None:
+                profile.dump(args.profile_stats)
+        if cancel.cancelled:
+            saved = (
+                f"; {len(results)} hashes are checkpointed, rerun with --resume"
+                if checkpoint is not None
+                else ""
+            )
+            raise SystemExit(
+                f"photocluster: cancelled after {progress.done} of "
+                f"{len(pending)} images{saved}"
+            )
+    finally:
+        if cache is not None:
+            cache.close()
+
+    return [results[path] for path in paths if path in results]
+
+
+def _cluster_stage(
+    hash_data: list[ImageHash], timer: StageTimer, args: argparse.Namespace
+) -> list[ClusteredImage]:
+    from .internal.cluster import cluster_bursts, cluster_hashes, cluster_per_folder
+    from .internal.quality import rank_clusters
+
+    if args.subgroup_sensitivity is not None and (
+        args.approximate
+        or args.burst_window is not None
+        or args.confirm_sensitivity is not None
+    ):
+        raise SystemExit(
+            "--subgroup-sensitivity cannot be combined with "
+            "--approximate, --burst-window or --confirm-sensitivity"
+        )
+
+    cluster: Callable[[list[ImageHash]], list[ClusteredImage]]
+    if args.subgroup_sensitivity is not None:
+        from .internal.hierarchy import cluster_hierarchical
+
+        cluster = partial(
+            cluster_hierarchical,
+            eps=args.sensitivity,
+            subgroup_eps=args.subgroup_sensitivity,
+        )
+    elif args.burst_window is not None:
+        cluster = partial(
+            cluster_bursts,
+            eps=args.sensitivity,
+            window=args.burst_window,
+            approximate=args.approximate,
+            recall=args.recall,
+            confirm_eps=args.confirm_sensitivity,
+        )
+    else:
+        cluster = partial(
+            cluster_hashes,
+            eps=args.sensitivity,
+            approximate=args.approximate,
+            recall=args.recall,
+            confirm_eps=args.confirm_sensitivity,
+        )
+
+    with timer.stage("cluster") as timing:
+        if args.per_folder:
+            clustered = cluster_per_folder(hash_data, cluster)
+        else:
+            clustered = cluster(hash_data)
+        if args.rank_quality:
+            clustered = rank_clusters(clustered, hash_data)
+        timing.items = len(clustered)
+    return clustered
+
+
+def _group_stage(
+    clustered: list[ClusteredImage],
+    output_dir: Path | None,
+    timer: StageTimer,
+    throttle: Throttle | None = None,
+) -> list[ClusteredImage]:
+    with timer.stage("group") as timing:
+        if output_dir is None:
+            grouped = group_by_folder(clustered, throttle)
+        else:
+            grouped = group_image_files(clustered, output_dir, throttle)
+        timing.items = sum(1 for c in grouped if c.cluster_id != -1)
+    if throttle is not None:
+        print(throttle.summary("move"), file=sys.stderr)
+    return grouped
+
+
+def _write_clusters(clustered: list[ClusteredImage], path: Path) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for c in clustered:
+            record = {
+                "path": str(c.path),
+                "cluster_id": c.cluster_id,
+                "rank": c.rank,
+                "subcluster_id": c.subcluster_id,
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def _read_clusters(path: Path) -> list[ClusteredImage]:
+    with path.open(encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [
+        ClusteredImage(
+            path=Path(r["path"]),
+            cluster_id=r["cluster_id"],
+            rank=r.get("rank"),
+            subcluster_id=r.get("subcluster_id"),
+        )
+        for r in records
+    ]
+
+
+def _report_clusters(clustered: list[ClusteredImage], per_folder: bool = False) -> None:
+    # After per-folder grouping, cluster ids are only unique within a folder.
+    def key(c: ClusteredImage) -> tuple[Path | None, int]:
+        return (image_folder(c.path) if per_folder else None, c.cluster_id)
+
+    num_clusters = len({key(c) for c in clustered if c.cluster_id != -1})
+    num_unique = sum(1 for c in clustered if c.cluster_id == -1)
+    print(f"{num_clusters} clusters, {num_unique} unique images")
+    subgroups = {
+        (key(c), c.subcluster_id)
+        for c in clustered
+        if c.subcluster_id is not None and c.subcluster_id != -1
+    }
+    if subgroups:
+        print(f"{len(subgroups)} subgroups")
+    for c in clustered:
+        if c.rank == 0:
+            group = c.path.parent if per_folder else f"group_{c.cluster_id}"
+            print(f"  {group}: representative {c.path.name}")
+
+
+def _cmd_scan(args: argparse.Namespace, timer: StageTimer) -> None:
+    paths = _scan_stage(args.input_dir, timer)
+    total_bytes = sum(path.stat().st_size for path in paths)
+    print(f"{len(paths)} images, {total_bytes / 1e6:.1f} MB")
+
+
+def _cmd_hash(args: argparse.Namespace, timer: StageTimer) -> None:
+    paths = _scan_stage(args.input_dir, timer)
+    with HashCheckpoint(
+        args.output, resume=args.resume, algorithm=_algorithm(args)
+    ) as checkpoint:
+        hash_data = _hash_stage(paths, timer, args, checkpoint)
+    print(f"{len(hash_data)} hashes written to {args.output}")
+    if args.export is not None:
+        HashSet.from_hashes(hash_data, _algorithm(args)).save(args.export)
+        print(f"{len(hash_data)} hashes exported to {args.export}")
+
+
+def _cmd_cluster(args: argparse.Namespace, timer: StageTimer) -> None:
+    if args.input.suffix == GRAPH_SUFFIX:
+        from .internal.graph import NeighborGraph
+
+        if (
+            args.approximate
+            or args.burst_window
+            or args.rank_quality
+            or args.confirm_sensitivity is not None
+            or args.per_folder
+        ):
+            raise SystemExit(
+                "--approximate, --burst-window, --rank-quality, "
+                "--confirm-sensitivity and --per-folder need a hash file"
+            )
+        graph = NeighborGraph.load(args.input)
+        with timer.stage("cluster") as timing:
+            if args.subgroup_sensitivity is not None:
+                from .internal.hierarchy import Dendrogram
+
+                clustered = Dendrogram.from_graph(graph).cluster(
+                    args.sensitivity, args.subgroup_sensitivity
+                )
+            else:
+                clustered = graph.cluster(args.sensitivity)
+            timing.items = len(clustered)
+    else:
+        clustered = _cluster_stage(read_hash_file(args.input), timer, args)
+    _write_clusters(clustered, args.output)
+    _report_clusters(clustered)
+
+
+def _cmd_graph(args: argparse.Namespace, timer: StageTimer) -> None:
+    from .internal.graph import NeighborGraph
+
+    hash_data = read_hash_file(args.hashes)
+    with timer.stage("graph") as timing:
+        graph = NeighborGraph.build(hash_data, max_eps=args.max_sensitivity)
+        timing.items = len(hash_data)
+    graph.save(args.output)
+    print(f"{len(graph.distances)} edges written to {args.output}")
+
+
+def _cmd_sweep(args: argparse.Namespace, timer: StageTimer) -> None:
+    from .internal.graph import NeighborGraph
+
+    graph = NeighborGraph.load(args.graph)
+    print(f"{'sensitivity':>12}{'clusters':>10}{'clustered':>11}{'unique':>8}")
+    with timer.stage("sweep") as timing:
+        for eps in sorted(args.sensitivity):
+            labels = graph.labels(eps)
+            clustered = int((labels != -1).sum())
+            num_clusters = len(set(labels.tolist()) - {-1})
+            print(
+                f"{eps:>12}{num_clusters:>10}{clustered:>11}"
+                f"{len(labels) - clustered:>8}"
+            )
+            timing.items += 1
+
+
+def _cmd_index(args: argparse.Namespace, timer: StageTimer) -> None:
+    from .internal.index import HashIndex
+
+    hash_data = read_hash_file(args.hashes)
+    with timer.stage("index") as timing:
+        if args.append and args.output.exists():
+            index = HashIndex.load(args.output)
+            index.add(hash_data)
+        else:
+            index = HashIndex.build(hash_data)
+        timing.items = len(hash_data)
+    index.save(args.output)
+    print(f"{len(index)} images indexed in {args.output}")
+
+
+def _cmd_query(args: argparse.Namespace, timer: StageTimer) -> None:
+    from .internal.index import HashIndex
+
+    index = HashIndex.load(args.index)
+    with timer.stage("query") as timing:
+        for image in args.images:
+            matches = index.query(image, max_distance=args.max_distance, k=args.k)
+            print(f"{image}: {len(matches)} matches")
+            for match in matches:
+                print(f"  {match.distance:>3}  {match.path}")
+            timing.items += 1
+
+
+def _cmd_group(args: argparse.Namespace, timer: StageTimer) -> None:
+    if (args.output_dir is None) != args.per_folder:
+        raise SystemExit("group needs either an output directory or --per-folder")
+    clustered = _read_clusters(args.clusters)
+    grouped = _group_stage(clustered, args.output_dir, timer, _throttle(args))
+    moved = sum(1 for c in grouped if c.cluster_id != -1)
+    destination = args.output_dir or "their folders"
+    print(f"Moved {moved} images into {destination}")
+
+
+def _cmd_run(args: argparse.Namespace, timer: StageTimer) -> None:
+    args.quality = args.rank_quality
+    args.capture = args.burst_window is not None
+    args.confirm = args.confirm_sensitivity is not None
+    paths = _scan_stage(args.input_dir, timer)
+    if args.checkpoint is not None:
+        with HashCheckpoint(
+            args.checkpoint, resume=args.resume, algorithm=_algorithm(args)
+        ) as checkpoint:
+            hash_data = _hash_stage(paths, timer, args, checkpoint)
+    else:
+        hash_data = _hash_stage(paths, timer, args, None)
+    clustered = _cluster_stage(hash_data, timer, args)
+    grouped = _group_stage(
+        clustered, None if args.per_folder else args.input_dir, timer, _throttle(args)
+    )
+    _report_clusters(grouped, per_folder=args.per_folder)
+
+
+def _cmd_watch(args: argparse.Namespace, timer: StageTimer) -> None:
+    from .internal.watch import WatchFolder
+
+    def report(changed: list[ClusteredImage]) -> None:
+        for c in changed:
+            group = f"group_{c.cluster_id}" if c.cluster_id != -1 else "unique"
+            print(f"{group}: {c.path}", flush=True)
+
+    cache = (
+        HashCache(args.cache, algorithm=hash_algorithm(args.fast))
+        if args.cache is not None
+        else None
+    )
+    try:
+        watcher = WatchFolder(
+            args.input_dir,
+            eps=args.sensitivity,
+            num_processes=args.processes,
+            backend=args.backend,
+            fast=args.fast,
+            settle=args.settle,
+            poll_interval=args.poll_interval,
+            polling=args.poll,
+            cache=cache,
+        )
+        try:
+            with timer.stage("scan") as timing:
+                grouped = watcher.start()
+                timing.items = len(grouped)
+            _report_clusters(grouped)
+            print(f"Watching {args.input_dir}", file=sys.stderr, flush=True)
+            watcher.run(on_batch=report)
+        finally:
+            # run closes the watcher itself; this covers a failed start.
+            watcher.close(wait=False)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _add_cluster_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-s",
+        "--sensitivity",
+        type=_proportion,
+        default=DEFAULT_SENSITIVITY,
+        help="maximum proportion of differing hash bits (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--subgroup-sensitivity",
+        type=_proportion,
+        metavar="SENSITIVITY",
+        help="also split each group into tighter group_N/subgroup_M folders",
+    )
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="use LSH-bucketed approximate clustering",
+    )
+    parser.add_argument(
+        "--recall",
+        type=_open_proportion,
+        default=DEFAULT_RECALL,
+        help="with --approximate, probability of finding each pair of "
+        "near-duplicates; higher is slower (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--burst-window",
+        type=_positive_float,
+        metavar="SECONDS",
+        help="only compare shots from the same camera within this many seconds",
+    )
+    parser.add_argument(
+        "--rank-quality",
+        action="store_true",
+        help="rank images within each cluster and report the representative",
+    )
+    parser.add_argument(
+        "--confirm-sensitivity",
+        type=_proportion,
+        metavar="SENSITIVITY",
+        help="only link images whose 256-bit confirmation hashes also differ by "
+        "at most this proportion; needs hashes computed with --confirm",
+    )
+    parser.add_argument(
+        "--per-folder",
+        action="store_true",
+        help="cluster the images of each folder on their own, several folders at once",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for the photocluster command."""
+    parser = argparse.ArgumentParser(
+        prog="photocluster",
+        description="Cluster near-duplicate photos and organize them into groups.",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0, help="increase log verbosity"
+    )
+    parser.add_argument(
+        "--no-summary",
+        action="store_true",
+        help="do not print the per-stage timing summary",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="count the images under a directory")
+    scan.add_argument("input_dir", type=_directory)
+    scan.set_defaults(handler=_cmd_scan)
+
+    hash_cmd = commands.add_parser("hash", help="hash images into a checkpoint file")
+    hash_cmd.add_argument("input_dir", type=_directory)
+    hash_cmd.add_argument("-o", "--output", type=Path, required=True)
+    hash_cmd.add_argument(
+        "--resume",
+        action="store_true",
+        help="reuse hashes of unchanged files already in the output file",
+    )
+    hash_cmd.add_argument(
+        "--quality", action="store_true", help="also collect quality metrics"
+    )
+    hash_cmd.add_argument(
+        "--capture", action="store_true", help="also read EXIF capture metadata"
+    )
+    hash_cmd.add_argument(
+        "--confirm",
+        action="store_true",
+        help="also compute 256-bit hashes for cluster --confirm-sensitivity",
+    )
+    hash_cmd.add_argument(
+        "--export",
+        type=Path,
+        metavar="PATH",
+        help="also write a binary hash set that cluster, graph and index can "
+        "memory-map",
+    )
+    hash_cmd.set_defaults(handler=_cmd_hash)
+
+    cluster = commands.add_parser(
+        "cluster", help="cluster a hash file or a saved neighbor graph"
+    )
+    cluster.add_argument(
+        "input", type=Path, help=f"hash file, or neighbor graph ({GRAPH_SUFFIX})"
+    )
+    cluster.add_argument("-o", "--output", type=Path, required=True)
+    _add_cluster_options(cluster)
+    cluster.set_defaults(handler=_cmd_cluster)
+
+    graph = commands.add_parser(
+        "graph",
+        help="precompute the neighbor graph once for fast sensitivity sweeps",
+    )
+    graph.add_argument("hashes", type=Path)
+    graph.add_argument("-o", "--output", type=Path, required=True)
+    graph.add_argument(
+        "--max-sensitivity",
+        type=_proportion,
+        default=DEFAULT_MAX_SENSITIVITY,
+        help="largest sensitivity the graph supports (default: %(default)s)",
+    )
+    graph.set_defaults(handler=_cmd_graph)
+
+    sweep = commands.add_parser(
+        "sweep", help="report cluster counts for several sensitivities"
+    )
+    sweep.add_argument("graph", type=Path)
+    sweep.add_argument(
+        "-s", "--sensitivity", type=_proportion, nargs="+", required=True
+    )
+    sweep.set_defaults(handler=_cmd_sweep)
+
+    index = commands.add_parser(
+        "index", help="build a searchable index from a hash file"
+    )
+    index.add_argument("hashes", type=Path)
+    index.add_argument("-o", "--output", type=Path, required=True)
+    index.add_argument(
+        "--append", action="store_true", help="add to an existing index file"
+    )
+    index.set_defaults(handler=_cmd_index)
+
+    query = commands.add_parser(
+        "query", help="find indexed images similar to the given images"
+    )
+    query.add_argument("index", type=Path)
+    query.add_argument("images", type=Path, nargs="+")
+    query.add_argument(
+        "-d",
+        "--max-distance",
+        type=_non_negative_int,
+        default=DEFAULT_MAX_DISTANCE,
+        help="maximum number of differing hash bits (default: %(default)s)",
+    )
+    query.add_argument(
+        "-k", type=_non_negative_int, help="report at most this many matches"
+    )
+    query.set_defaults(handler=_cmd_query)
+
+    group = commands.add_parser("group", help="move files according to clusters")
+    group.add_argument("clusters", type=Path)
+    group.add_argument("output_dir", type=Path, nargs="?")
+    group.add_argument(
+        "--per-folder",
+        action="store_true",
+        help="group the images of each folder inside that folder, for "
+        "clusters from cluster --per-folder",
+    )
+    group.set_defaults(handler=_cmd_group)
+
+    run = commands.add_parser("run", help="scan, hash, cluster and group in one go")
+    run.add_argument("input_dir", type=_directory)
+    run.add_argument(
+        "--checkpoint", type=Path, help="persist hashes here as they are computed"
+    )
+    run.add_argument(
+        "--resume",
+        action="store_true",
+        help="reuse hashes of unchanged files from the checkpoint",
+    )
+    _add_cluster_options(run)
+    run.set_defaults(handler=_cmd_run)
+
+    watch = commands.add_parser(
+        "watch", help="keep clustering new photos as they arrive in a folder"
+    )
+    watch.add_argument("input_dir", type=_directory)
+    watch.add_argument(
+        "-s",
+        "--sensitivity",
+        type=_proportion,
+        default=DEFAULT_SENSITIVITY,
+        help="maximum proportion of differing hash bits (default: %(default)s)",
+    )
+    watch.add_argument(
+        "-j",
+        "--processes",
+        type=_positive_int,
+        default=None,
+        help="number of workers (default: 75%% of cores, max 8)",
+    )
+    watch.add_argument("--backend", choices=BACKENDS, help="see hash --backend")
+    watch.add_argument("--cache", type=Path, metavar="FILE", help="see hash --cache")
+    watch.add_argument("--fast", action="store_true", help="see hash --fast")
+    watch.add_argument(
+        "--settle",
+        type=_positive_float,
+        default=DEFAULT_SETTLE,
+        metavar="SECONDS",
+        help="hash a new file once it has not changed for this long "
+        "(default: %(default)s)",
+    )
+    watch.add_argument(
+        "--poll",
+        action="store_true",
+        help="list the folder periodically instead of using inotify, e.g. on "
+        "network filesystems",
+    )
+    watch.add_argument(
+        "--poll-interval",
+        type=_positive_float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="seconds between checks for new files (default: %(default)s)",
+    )
+    # New photos are matched one by one through a HashIndex of upright 64-bit
+    # hashes, which has no rotated variants or confirmation hashes to use.
+    watch.add_argument("--match-rotations", action=_Unsupported)
+    watch.add_argument("--confirm-sensitivity", action=_Unsupported)
+    watch.set_defaults(handler=_cmd_watch)
+
+    for sub in (hash_cmd, run):
+        sub.add_argument(
+            "-j",
+            "--processes",
+            type=_positive_int,
+            default=None,
+            help="number of workers (default: 75%% of cores, max 8)",
+        )
+        sub.add_argument(
+            "--backend",
+            choices=BACKENDS,
+            help="hash in worker processes or in threads (default: threads on "
+            "free-threaded Python, processes otherwise)",
+        )
+        sub.add_argument(
+            "--cache",
+            type=Path,
+            metavar="FILE",
+            help="reuse and store hashes by file content in this SQLite file, "
+            "so moved, renamed and copied photos are never decoded twice",
+        )
+        sub.add_argument(
+            "--cache-readonly",
+            action="store_true",
+            help="look up hashes in --cache without adding new ones",
+        )
+        sub.add_argument(
+            "--fast",
+            action="store_true",
+            help="hash each photo's EXIF thumbnail, or a reduced-scale decode when "
+            "it has none that shows the whole picture",
+        )
+        sub.add_argument(
+            "--match-rotations",
+            action="store_true",
+            help="hash photos upright by their EXIF orientation and also store "
+            "the hashes of their rotations and mirror images, so clustering "
+            "groups rotated and mirrored copies",
+        )
+        sub.add_argument(
+            "--largest-first",
+            action="store_true",
+            help="hash the largest files first so no worker finishes long after "
+            "the others",
+        )
+        sub.add_argument(
+            "--prefetch-mb",
+            type=_positive_int,
+            nargs="?",
+            const=DEFAULT_PREFETCH_BYTES // (1024 * 1024),
+            metavar="MB",
+            help="read files ahead on a thread pool, holding at most MB "
+            "(default when given without a value: %(const)s)",
+        )
+        sub.add_argument(
+            "--memory-mb",
+            type=_positive_float,
+            metavar="MB",
+            help="limit the estimated memory of images decoded at once, "
+            "based on the dimensions in each header",
+        )
+        sub.add_argument(
+            "--profile",
+            action="store_true",
+            help="break hashing time down by stage (read, open, decode, convert, "
+            "resize, DCT, queue wait) and list the hottest worker functions",
+        )
+        sub.add_argument(
+            "--profile-stats",
+            type=Path,
+            metavar="FILE",
+            help="also write the merged worker cProfile stats to FILE for pstats "
+            "or snakeviz (implies --profile)",
+        )
+    for sub in (hash_cmd, run, group):
+        sub.add_argument(
+            "--nice",
+            type=int,
+            choices=range(20),
+            default=0,
+            metavar="N",
+            help="add N (0-19) to the CPU nice value so other services on the "
+            "host come first",
+        )
+        sub.add_argument(
+            "--ionice",
+            choices=IO_CLASSES,
+            help="I/O scheduling class on Linux: 'idle' only uses the disk when "
+            "nothing else does, 'best-effort' at the lowest priority",
+        )
+        sub.add_argument(
+            "--max-files-per-sec",
+            type=_positive_float,
+            metavar="N",
+            help="read (hash, run) or move (group, run) at most N files a "
+            "second; limited reads go through the prefetch threads",
+        )
+        sub.add_argument(
+            "--max-mb-per-sec",
+            type=_positive_float,
+            metavar="MB",
+            help="read or move at most MB megabytes a second",
+        )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the photocluster command line.
+
+    Args:
+        argv: Arguments to parse instead of sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Confirmation hashes have no rotated variants; see check_confirmation.
+    if getattr(args, "match_rotations", False) and (
+        getattr(args, "confirm", False)
+        or getattr(args, "confirm_sensitivity", None) is not None
+    ):
+        parser.error(
+            "--match-rotations cannot be combined with --confirm or "
+            "--confirm-sensitivity"
+        )
+
+    level = logging.WARNING - 10 * min(args.verbose, 2)
+    logging.basicConfig(level=level, format="%(levelname)s %(name)s: %(message)s")
+
+    if getattr(args, "processes", 0) is None:
+        args.processes = get_num_processes()
+    if getattr(args, "nice", 0) or getattr(args, "ionice", None):
+        lower_priority(args.nice, args.ionice)
+
+    timer = StageTimer()
+    try:
+        args.handler(args, timer)
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"photocluster: error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if timer.stages and not args.no_summary:
+            print(timer.summary(), file=sys.stderr)
+    return 0
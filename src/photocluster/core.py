@@ -1,18 +1,57 @@
 """Convenience function for photo clustering."""
 
 import logging
+from collections.abc import Callable
+from functools import partial
 from pathlib import Path
 
-from .internal.cluster import cluster_hashes
-from .internal.hasher.core import compute_hashes
-from .internal.models.validation import PhotoclusterInputs
-from .internal.util.files import group_image_files
+from .internal.cache import HashCache
+from .internal.cluster import cluster_bursts, cluster_hashes, cluster_per_folder
+from .internal.hasher.core import compute_hashes, hash_algorithm
+from .internal.hierarchy import cluster_hierarchical
+from .internal.lsh import DEFAULT_RECALL
+from .internal.models.image import ClusteredImage, ImageHash
+from .internal.quality import rank_clusters, representatives
+from .internal.util.files import group_by_folder, group_image_files
 from .internal.util.processing import get_num_processes
+from .internal.util.throttle import MEGABYTE, IOClass, Throttle
 
 logger = logging.getLogger(__name__)
 
 
-def photocluster(input_dir: str | Path, sensitivity: float = 0.2) -> None:
+def _throttle(
+    files_per_second: float | None, mb_per_second: float | None
+) -> Throttle | None:
+    """Build a Throttle from the rate limits, if any is set."""
+    if files_per_second is None and mb_per_second is None:
+        return None
+    return Throttle(
+        files_per_second=files_per_second,
+        bytes_per_second=(
+            mb_per_second * MEGABYTE if mb_per_second is not None else None
+        ),
+    )
+
+
+def photocluster(
+    input_dir: str | Path,
+    sensitivity: float = 0.2,
+    approximate: bool = False,
+    recall: float = DEFAULT_RECALL,
+    rank_quality: bool = False,
+    burst_window: float | None = None,
+    subgroup_sensitivity: float | None = None,
+    cache: str | Path | None = None,
+    fast: bool = False,
+    match_rotations: bool = False,
+    confirm_sensitivity: float | None = None,
+    per_folder: bool = False,
+    num_processes: int | None = None,
+    niceness: int = 0,
+    io_class: IOClass | None = None,
+    max_files_per_second: float | None = None,
+    max_mb_per_second: float | None = None,
+) -> list[ClusteredImage]:
     """Perform photo clustering and grouping operation.
 
     Images will be organized into cluster subdirectories within the input directory.
@@ -21,30 +60,173 @@ def photocluster(input_dir: str | Path, sensitivity: float = 0.2) -> None:
     Args:
         input_dir: Directory containing images to cluster (str or Path)
         sensitivity: Clustering sensitivity as proportion (0.0-1.0). Defaults to 0.2.
+        approximate: Use LSH-bucketed approximate clustering, trading a small
+            amount of recall for speed on very large collections. Defaults to False.
+        recall: With approximate, the probability (0.0-1.0, exclusive) that
+            a pair of images at the sensitivity threshold shares an LSH
+            bucket. Higher values use more tables and are slower. Defaults
+            to 0.99.
+        rank_quality: Measure sharpness, resolution and file size while hashing
+            and rank the images of every cluster, best first. Defaults to False.
+        burst_window: When set, read EXIF capture time and camera from each
+            header and only compare images shot within this many seconds of
+            each other by the same camera, followed by one global pass over
+            the remaining images and one image of each burst cluster.
+            Defaults to None (global clustering).
+        subgroup_sensitivity: When set, build a single-linkage merge tree once
+            and cut it at both sensitivities, moving tighter subgroups into
+            ``group_N/subgroup_M``. Must not exceed sensitivity and cannot be
+            combined with approximate or burst_window. Defaults to None.
+        cache: SQLite file of hashes keyed by file content. Photos already
+            hashed in an earlier run, under any name or location, are not
+            decoded again. Defaults to None (no cache).
+        fast: Hash the EXIF thumbnail of each photo when it shows the whole
+            picture, and otherwise a reduced-scale decode. Much faster on
+            camera JPEGs at the cost of a few bits of hash accuracy.
+            Defaults to False.
+        match_rotations: Hash every photo upright according to its EXIF
+            orientation, and cluster rotated and mirrored copies together by
+            comparing all 8 rotations and mirror images of each hash.
+            Defaults to False.
+        confirm_sensitivity: When set, also compute a 256-bit hash of every
+            photo from the same decode, and only link photos whose 64-bit
+            hashes are within sensitivity if their 256-bit hashes are within
+            this proportion as well. Prevents false merges of low-texture
+            photos such as documents. Cannot be combined with
+            subgroup_sensitivity or match_rotations. Defaults to None.
+        per_folder: Cluster the photos of each folder under input_dir on
+            their own, several folders at once, and create the ``group_N``
+            directories inside each folder. Photos in different folders are
+            never grouped together. Defaults to False.
+        num_processes: Number of hash workers. Defaults to None (75% of the
+            cores, at most 8).
+        niceness: Add this to the CPU nice value (0-19) of the hash workers,
+            so other services on the host come first. The calling process
+            keeps its priority. Defaults to 0.
+        io_class: On Linux, switch the hash workers to the "idle" I/O
+            scheduling class, which only gets the disk when nobody else wants
+            it, or to the lowest "best-effort" priority, like ``ionice``.
+            Defaults to None.
+        max_files_per_second: Read at most this many files a second while
+            hashing, and move at most this many while grouping. Reads then
+            happen on prefetch threads. The achieved rates are logged.
+            Defaults to None (no limit).
+        max_mb_per_second: Like max_files_per_second, in megabytes read or
+            moved per second. Defaults to None (no limit).
+
+    Returns:
+        ClusteredImage objects pointing at each image's final location. When
+        rank_quality is set, rank 0 marks the representative of each cluster.
     """
+    from .internal.models.validation import PhotoclusterInputs
+
     input_path = Path(input_dir) if isinstance(input_dir, str) else input_dir
     logger.info(f"Starting photo clustering for directory: {input_path}")
     logger.info(f"Using sensitivity: {sensitivity}")
 
-    input = PhotoclusterInputs(input_dir=input_path, sensitivity=sensitivity)
+    input = PhotoclusterInputs(
+        input_dir=input_path,
+        sensitivity=sensitivity,
+        approximate=approximate,
+        recall=recall,
+        rank_quality=rank_quality,
+        burst_window=burst_window,
+        subgroup_sensitivity=subgroup_sensitivity,
+        cache=cache,
+        fast=fast,
+        match_rotations=match_rotations,
+        confirm_sensitivity=confirm_sensitivity,
+        per_folder=per_folder,
+        num_processes=num_processes,
+        niceness=niceness,
+        io_class=io_class,
+        max_files_per_second=max_files_per_second,
+        max_mb_per_second=max_mb_per_second,
+    )
 
-    num_processes = get_num_processes()
+    confirm = input.confirm_sensitivity is not None
+    num_processes = input.num_processes or get_num_processes()
     logger.info(f"Using {num_processes} processes for hash computation")
 
-    hash_data = compute_hashes(
-        input.input_dir,
-        num_processes=num_processes,
+    hash_cache = (
+        HashCache(
+            input.cache,
+            algorithm=hash_algorithm(input.fast, input.match_rotations, confirm),
+        )
+        if input.cache is not None
+        else None
     )
+    try:
+        hash_data = compute_hashes(
+            input.input_dir,
+            num_processes=num_processes,
+            quality=input.rank_quality,
+            capture=input.burst_window is not None,
+            cache=hash_cache,
+            fast=input.fast,
+            dihedral=input.match_rotations,
+            confirm=confirm,
+            read_limit=_throttle(input.max_files_per_second, input.max_mb_per_second),
+            niceness=input.niceness,
+            io_class=input.io_class,
+        )
+    finally:
+        if hash_cache is not None:
+            hash_cache.close()
 
     logger.info(f"Computed hashes for {len(hash_data)} images")
 
-    clustered_images = cluster_hashes(hash_data, eps=input.sensitivity)
+    cluster: Callable[[list[ImageHash]], list[ClusteredImage]]
+    if input.subgroup_sensitivity is not None:
+        cluster = partial(
+            cluster_hierarchical,
+            eps=input.sensitivity,
+            subgroup_eps=input.subgroup_sensitivity,
+        )
+    elif input.burst_window is not None:
+        cluster = partial(
+            cluster_bursts,
+            eps=input.sensitivity,
+            window=input.burst_window,
+            approximate=input.approximate,
+            recall=input.recall,
+            confirm_eps=input.confirm_sensitivity,
+        )
+    else:
+        cluster = partial(
+            cluster_hashes,
+            eps=input.sensitivity,
+            approximate=input.approximate,
+            recall=input.recall,
+            confirm_eps=input.confirm_sensitivity,
+        )
+    if input.per_folder:
+        clustered_images = cluster_per_folder(hash_data, cluster)
+    else:
+        clustered_images = cluster(hash_data)
 
     num_clusters = len(
         {img.cluster_id for img in clustered_images if img.cluster_id != -1}
     )
     logger.info(f"Created {num_clusters} clusters")
 
-    group_image_files(clustered_images, input.input_dir)
+    if input.rank_quality:
+        clustered_images = rank_clusters(clustered_images, hash_data)
+
+    move_limit = _throttle(input.max_files_per_second, input.max_mb_per_second)
+    if input.per_folder:
+        grouped = group_by_folder(clustered_images, move_limit)
+    else:
+        grouped = group_image_files(clustered_images, input.input_dir, move_limit)
+    if move_limit is not None:
+        logger.info(move_limit.summary("Moved"))
+
+    if input.per_folder:
+        for path in sorted(c.path for c in grouped if c.rank == 0):
+            logger.info(f"Representative for {path.parent}: {path.name}")
+    else:
+        for cluster_id, path in sorted(representatives(grouped).items()):
+            logger.info(f"Representative for group_{cluster_id}: {path.name}")
 
     logger.info("Photo clustering completed")
+    return grouped
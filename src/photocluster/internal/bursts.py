@@ -0,0 +1,55 @@
+"""Burst pre-partitioning by EXIF capture time."""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from .models.image import ImageHash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BURST_WINDOW = 10.0  # seconds
+
+
+def partition_bursts(
+    hash_data: list[ImageHash], window: float = DEFAULT_BURST_WINDOW
+) -> tuple[list[list[int]], list[int]]:
+    """Split images into bursts of consecutive shots from the same camera.
+
+    Images are grouped by camera, ordered by capture time, and a new burst is
+    started wherever two consecutive shots are more than ``window`` seconds
+    apart.
+
+    Args:
+        hash_data: ImageHash objects carrying CaptureInfo
+        window: Maximum gap in seconds between consecutive shots of a burst
+
+    Returns:
+        Tuple of (bursts, rest): bursts are lists of indices into hash_data,
+        rest holds indices of images without a capture timestamp
+    """
+    by_camera: dict[str | None, list[tuple[datetime, int]]] = defaultdict(list)
+    rest = []
+    for index, result in enumerate(hash_data):
+        capture = result.capture
+        if capture is None or capture.timestamp is None:
+            rest.append(index)
+        else:
+            by_camera[capture.camera].append((capture.timestamp, index))
+
+    bursts: list[list[int]] = []
+    for shots in by_camera.values():
+        shots.sort()
+        current = [shots[0][1]]
+        for (previous, _), (timestamp, index) in zip(shots, shots[1:], strict=False):
+            if (timestamp - previous).total_seconds() > window:
+                bursts.append(current)
+                current = []
+            current.append(index)
+        bursts.append(current)
+
+    logger.info(
+        f"Partitioned {len(hash_data) - len(rest)} images into {len(bursts)} bursts, "
+        f"{len(rest)} without capture time"
+    )
+    return bursts, rest
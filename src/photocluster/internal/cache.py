@@ -0,0 +1,244 @@
+"""Content-addressed hash cache shared across runs, hosts and file moves."""
+
+import json
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from .checkpoint import hash_fields, record_to_hash
+from .hasher.core import HASH_ALGORITHM
+from .hasher.prefetch import DEFAULT_PREFETCH_THREADS
+from .models.image import ImageHash
+from .util.files import content_digest, partial_digest
+
+logger = logging.getLogger(__name__)
+
+COMMIT_INTERVAL = 100  # puts per write transaction
+LOCK_TIMEOUT = 60.0  # seconds to wait for another writer
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    digest BLOB NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    partial BLOB NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (digest, algorithm)
+);
+CREATE INDEX IF NOT EXISTS hashes_prefilter ON hashes (size, partial);
+"""
+
+
+class HashCache:
+    """SQLite store of hashes keyed by file content rather than by path.
+
+    A moved, renamed or copied photo has the same content digest, so its hash
+    is found wherever the file now lives. Lookups first check the file size
+    and a digest of its first and last bytes, which rejects unknown files
+    without reading them fully; only a prefilter hit reads the whole file to
+    confirm the content digest. ``lookup`` does this file I/O and digesting on
+    a thread pool, so a warm cache is read at storage speed.
+
+    The cache is a single SQLite file. Writes are batched into transactions
+    of COMMIT_INTERVAL entries. Processes on one host can share it, as can
+    hosts on a filesystem with working POSIX locks. NFS and SMB locking is
+    often unreliable, and two writing hosts can then corrupt the file: on a
+    network share, let at most one host write and open it with
+    ``readonly=True`` everywhere else, or give each host its own copy.
+    """
+
+    def __init__(
+        self, path: Path, readonly: bool = False, algorithm: str = HASH_ALGORITHM
+    ) -> None:
+        """Open or create a cache file.
+
+        Args:
+            path: SQLite database file
+            readonly: Only look up hashes; ``put`` becomes a no-op
+            algorithm: Kind of hashes to look up and store, from hash_algorithm
+
+        Raises:
+            ValueError: If readonly and path is not an existing hash cache
+        """
+        self.path = path
+        self.readonly = readonly
+        self.algorithm = algorithm
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        # Lookups run on several threads; the lock serializes use of the
+        # connection and the counters, not the file reads.
+        self._lock = threading.Lock()
+        if readonly:
+            if not path.is_file():
+                raise ValueError(f"No hash cache at {path}")
+            self._db = sqlite3.connect(
+                f"{path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                timeout=LOCK_TIMEOUT,
+                check_same_thread=False,
+            )
+            try:
+                table = self._db.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table'"
+                    " AND name = 'hashes'"
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._db.close()
+                raise ValueError(f"Not a hash cache: {path}: {e}") from e
+            if table is None:
+                self._db.close()
+                raise ValueError(f"Not a hash cache: {path}")
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                path, timeout=LOCK_TIMEOUT, check_same_thread=False
+            )
+            self._db.executescript(_SCHEMA)
+
+    def get(
+        self, path: Path, quality: bool = False, capture: bool = False
+    ) -> ImageHash | None:
+        """Look up the hash of a file by its contents.
+
+        Args:
+            path: Image file
+            quality: Only accept entries that include quality metrics
+            capture: Only accept entries that include capture metadata
+
+        Returns:
+            ImageHash for path, or None if the contents are not cached with
+            the requested metadata
+        """
+        try:
+            size, partial = partial_digest(path)
+            with self._lock:
+                candidate = self._db.execute(
+                    "SELECT 1 FROM hashes WHERE size = ? AND partial = ?"
+                    " AND algorithm = ? LIMIT 1",
+                    (size, partial, self.algorithm),
+                ).fetchone()
+            if candidate is None:
+                return self._miss()
+            digest = content_digest(path.read_bytes())
+        except OSError:
+            return self._miss()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT record FROM hashes WHERE digest = ? AND algorithm = ?",
+                (digest, self.algorithm),
+            ).fetchone()
+        record = json.loads(row[0]) if row is not None else None
+        if (
+            record is None
+            or (quality and "quality" not in record)
+            or (capture and "capture" not in record)
+        ):
+            return self._miss()
+        with self._lock:
+            self.hits += 1
+        return replace(record_to_hash({**record, "path": str(path)}), digest=digest)
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def lookup(
+        self,
+        paths: list[Path],
+        quality: bool = False,
+        capture: bool = False,
+        threads: int = DEFAULT_PREFETCH_THREADS,
+    ) -> tuple[dict[Path, ImageHash], list[Path]]:
+        """Split paths into cached hashes and files that still need hashing.
+
+        Files are read and digested on a pool of threads, like prefetched
+        reads; hashlib releases the GIL while digesting large buffers.
+
+        Args:
+            paths: Image files
+            quality: Only accept entries that include quality metrics
+            capture: Only accept entries that include capture metadata
+            threads: Number of files looked up at once
+
+        Returns:
+            Tuple of (hashes found by path, paths not found), in input order
+        """
+        found: dict[Path, ImageHash] = {}
+        missing = []
+        with ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="cache-lookup"
+        ) as pool:
+            results = list(
+                pool.map(
+                    lambda path: self.get(path, quality=quality, capture=capture),
+                    paths,
+                )
+            )
+        for path, result in zip(paths, results, strict=True):
+            if result is not None:
+                found[path] = result
+            else:
+                missing.append(path)
+        return found, missing
+
+    def put(self, result: ImageHash) -> None:
+        """Store a freshly computed hash under its file's content digest.
+
+        The digest computed by the hash worker is used when present;
+        otherwise the file is read again to compute it.
+        """
+        if self.readonly:
+            return
+        try:
+            size, partial = partial_digest(result.path)
+            digest = result.digest or content_digest(result.path.read_bytes())
+        except OSError as e:
+            logger.warning(f"Not caching {result.path}: {e}")
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                (
+                    digest,
+                    self.algorithm,
+                    size,
+                    partial,
+                    json.dumps(hash_fields(result)),
+                ),
+            )
+            self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self) -> None:
+        """Write pending entries so other processes and hosts can see them."""
+        with self._lock:
+            if self._pending:
+                self._db.commit()
+                self._pending = 0
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def close(self) -> None:
+        self.commit()
+        self._db.close()
+        logger.info(f"Hash cache: {self.hits} hits, {self.misses} misses")
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,230 @@
+"""Append-only JSON-lines checkpoint of computed hashes."""
+
+import json
+import logging
+from collections.abc import Iterator
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Self
+
+import numpy as np
+
+from .hasher.core import HASH_ALGORITHM
+from .models.image import CaptureInfo, ImageHash, ImageQuality
+
+logger = logging.getLogger(__name__)
+
+# Fields every checkpoint record has; records lacking one are skipped.
+REQUIRED_FIELDS = ("path", "bits", "hash", "size", "mtime_ns")
+
+
+def _file_signature(path: Path) -> tuple[int, int]:
+    """Return (size, mtime_ns) identifying the current contents of a file."""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def hash_fields(result: ImageHash) -> dict[str, Any]:
+    """Serialize everything an ImageHash holds except its path to JSON fields."""
+    record: dict[str, Any] = {
+        "bits": len(result.hash),
+        "hash": np.packbits(result.hash).tobytes().hex(),
+    }
+    if result.variants is not None:
+        record["variants"] = np.packbits(result.variants, axis=1).tobytes().hex()
+    if result.confirm_hash is not None:
+        record["confirm_hash"] = np.packbits(result.confirm_hash).tobytes().hex()
+    if result.quality is not None:
+        record["quality"] = asdict(result.quality)
+    if result.capture is not None:
+        timestamp = result.capture.timestamp
+        record["capture"] = {
+            "timestamp": timestamp.isoformat() if timestamp else None,
+            "camera": result.capture.camera,
+        }
+    return record
+
+
+def hash_to_record(result: ImageHash) -> dict[str, Any]:
+    """Serialize an ImageHash, with the file's size and mtime, to a JSON record."""
+    size, mtime_ns = _file_signature(result.path)
+    return {
+        "path": str(result.path),
+        **hash_fields(result),
+        "size": size,
+        "mtime_ns": mtime_ns,
+    }
+
+
+def record_to_hash(record: dict[str, Any]) -> ImageHash:
+    """Deserialize a JSON record written by hash_to_record."""
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex(record["hash"]), np.uint8))
+    quality = record.get("quality")
+    capture = record.get("capture")
+    variants = None
+    if "variants" in record:
+        packed = np.frombuffer(bytes.fromhex(record["variants"]), np.uint8)
+        variants = np.unpackbits(packed.reshape(-1, (record["bits"] + 7) // 8), axis=1)
+        variants = variants[:, : record["bits"]].astype(np.uint8)
+    confirm_hash = None
+    if "confirm_hash" in record:
+        confirm_hash = np.unpackbits(
+            np.frombuffer(bytes.fromhex(record["confirm_hash"]), np.uint8)
+        )
+    return ImageHash(
+        path=Path(record["path"]),
+        hash=bits[: record["bits"]].astype(np.uint8),
+        quality=ImageQuality(**quality) if quality else None,
+        capture=CaptureInfo(
+            timestamp=(
+                datetime.fromisoformat(capture["timestamp"])
+                if capture["timestamp"]
+                else None
+            ),
+            camera=capture["camera"],
+        )
+        if capture
+        else None,
+        variants=variants,
+        confirm_hash=confirm_hash,
+    )
+
+
+def _read_records(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield the records of a checkpoint file, skipping corrupt lines.
+
+    A line is corrupt if it is not a JSON object holding REQUIRED_FIELDS.
+    """
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line.
+                logger.warning(f"Ignoring corrupt checkpoint line in {path}")
+                continue
+            if not isinstance(record, dict) or any(
+                field not in record for field in REQUIRED_FIELDS
+            ):
+                logger.warning(f"Ignoring incomplete checkpoint record in {path}")
+                continue
+            yield record
+
+
+def load_hashes(path: Path) -> list[ImageHash]:
+    """Load every hash stored in a checkpoint file.
+
+    Later records for the same image path replace earlier ones. Corrupt or
+    truncated lines, e.g. from a run killed mid-write, are skipped with a
+    warning, as HashCheckpoint does on resume.
+
+    Args:
+        path: Checkpoint file written by HashCheckpoint
+
+    Returns:
+        List of ImageHash objects in first-seen order
+    """
+    results: dict[str, ImageHash] = {}
+    for record in _read_records(path):
+        results[record["path"]] = record_to_hash(record)
+    return list(results.values())
+
+
+class HashCheckpoint:
+    """Append-only hash store that lets an interrupted hash run resume.
+
+    Every result is written and flushed as soon as it is appended, so a crash
+    or interruption loses at most the image being written. Each record names
+    the hash algorithm that produced it. On resume, stored results are reused
+    for files whose size and modification time are unchanged, if they were
+    hashed with the same algorithm and carry the requested metadata.
+    """
+
+    def __init__(
+        self, path: Path, resume: bool = False, algorithm: str = HASH_ALGORITHM
+    ) -> None:
+        """Open a checkpoint file.
+
+        Args:
+            path: Checkpoint file location
+            resume: Keep and reuse existing results instead of starting over
+            algorithm: Kind of hashes appended and reused, from hash_algorithm
+        """
+        self.path = path
+        self.algorithm = algorithm
+        self._results: dict[str, ImageHash] = {}
+        self._signatures: dict[str, tuple[int, int]] = {}
+        self._algorithms: dict[str, str | None] = {}
+        if resume and path.exists():
+            self._load()
+            logger.info(f"Resuming from {len(self._results)} checkpointed hashes")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: IO[str] = path.open("a" if resume else "w", encoding="utf-8")
+
+    def _load(self) -> None:
+        for record in _read_records(self.path):
+            key = record["path"]
+            self._results[key] = record_to_hash(record)
+            self._signatures[key] = (record["size"], record["mtime_ns"])
+            # Records written before algorithms were stored never match.
+            self._algorithms[key] = record.get("algorithm")
+
+    def is_current(self, path: Path) -> bool:
+        """Check whether a stored result still matches the file on disk."""
+        signature = self._signatures.get(str(path))
+        if signature is None:
+            return False
+        try:
+            return _file_signature(path) == signature
+        except OSError:
+            return False
+
+    def get(
+        self, path: Path, quality: bool = False, capture: bool = False
+    ) -> ImageHash | None:
+        """Return the stored result for a path if it can be reused.
+
+        Args:
+            path: Image file
+            quality: Only accept results that include quality metrics
+            capture: Only accept results that include capture metadata
+
+        Returns:
+            The stored ImageHash, or None if the file changed, was hashed with
+            another algorithm, or lacks the requested metadata
+        """
+        key = str(path)
+        if self._algorithms.get(key) != self.algorithm or not self.is_current(path):
+            return None
+        result = self._results[key]
+        if (quality and result.quality is None) or (capture and result.capture is None):
+            return None
+        return result
+
+    def append(self, result: ImageHash) -> None:
+        """Store a freshly computed result and flush it to disk."""
+        record = hash_to_record(result)
+        record["algorithm"] = self.algorithm
+        self._results[record["path"]] = result
+        self._signatures[record["path"]] = (record["size"], record["mtime_ns"])
+        self._algorithms[record["path"]] = self.algorithm
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
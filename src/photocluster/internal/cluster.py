@@ -1,47 +1,466 @@
 """DBSCAN clustering implementation for PhotoCluster."""
 
 import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 
 import numpy as np
-from sklearn.cluster import DBSCAN
 
+from .bursts import DEFAULT_BURST_WINDOW, partition_bursts
+from .hamming import (
+    eps_to_radius,
+    pack_bits,
+    pack_variants,
+    pair_distances,
+    radius_pairs,
+)
+from .lsh import DEFAULT_RECALL, candidate_pairs
 from .models.image import ClusteredImage, ImageHash
+from .util.files import partition_by_folder
+from .util.processing import get_num_processes
 
 logger = logging.getLogger(__name__)
 
 MIN_SAMPLES = 2
+# DBSCAN rejects eps=0. Any value below one bit (1/nbits) selects exactly the
+# identical hashes, which is what a sensitivity of 0.0 means.
+MIN_EPS = 1e-9
 
 
-def cluster_hashes(hash_data: list[ImageHash], eps: float) -> list[ClusteredImage]:
+def labels_from_pairs(
+    num_points: int,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    distances: np.ndarray,
+    nbits: int,
+    eps: float,
+) -> np.ndarray:
+    """Run DBSCAN over a sparse set of precomputed neighbor pairs.
+
+    Pairs absent from the input are treated as farther apart than eps, so the
+    result equals DBSCAN with the ``hamming`` metric whenever every pair within
+    eps is present.
+
+    Args:
+        num_points: Total number of points being clustered
+        rows: First index of each neighbor pair
+        cols: Second index of each neighbor pair
+        distances: Bit distance of each pair
+        nbits: Number of bits per hash, used to express distances as proportions
+        eps: DBSCAN epsilon parameter as proportion (0.0-1.0)
+
+    Returns:
+        Array of cluster labels, -1 for noise
+    """
+    from scipy.sparse import csr_matrix
+    from sklearn.cluster import DBSCAN
+
+    data = np.concatenate([distances, distances]) / nbits
+    graph = csr_matrix(
+        (data, (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(num_points, num_points),
+    )
+    db = DBSCAN(eps=max(eps, MIN_EPS), min_samples=MIN_SAMPLES, metric="precomputed")
+    return db.fit_predict(graph)
+
+
+def stack_variants(hash_data: list[ImageHash]) -> np.ndarray | None:
+    """Stack the hash variants of every image, or None unless all have them.
+
+    Returns:
+        Array of shape (n, num_variants, nbits), or None
+    """
+    variants = [result.variants for result in hash_data if result.variants is not None]
+    if not variants:
+        return None
+    if len(variants) != len(hash_data):
+        logger.warning(
+            f"Only {len(variants)} of {len(hash_data)} hashes have rotation "
+            "variants; comparing the hashes alone"
+        )
+        return None
+    return np.stack(variants)
+
+
+def variant_pairs(
+    vectors: np.ndarray,
+    variants: np.ndarray,
+    radius: int,
+    approximate: bool = False,
+    recall: float = DEFAULT_RECALL,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find pairs within radius bits, measured between their closest variants.
+
+    Approximate mode runs LSH over every variant of every image, so a rotated
+    copy collides with the matching variant of the original.
+
+    Args:
+        vectors: Hashes of shape (n, nbits)
+        variants: Hash variants of shape (n, num_variants, nbits)
+        radius: Maximum bit distance of pairs to return
+        approximate: Use LSH candidates instead of comparing every pair
+        recall: Target LSH pair recall. Ignored when exact.
+
+    Returns:
+        Tuple of (rows, cols, distances) with rows < cols
+    """
+    packed = pack_bits(vectors)
+    packed_variants = pack_variants(variants)
+    if not approximate:
+        return radius_pairs(packed, radius, variants=packed_variants)
+
+    num_images, num_variants, nbits = variants.shape
+    rows, cols, _ = candidate_pairs(
+        variants.reshape(num_images * num_variants, nbits), radius, recall=recall
+    )
+    rows, cols = rows // num_variants, cols // num_variants
+    distinct = rows != cols
+    pair_ids = np.unique(
+        np.minimum(rows, cols)[distinct] * num_images + np.maximum(rows, cols)[distinct]
+    )
+    rows, cols = np.divmod(pair_ids, num_images)
+    distances = pair_distances(packed, rows, cols, variants=packed_variants)
+    keep = distances <= radius
+    return rows[keep], cols[keep], distances[keep]
+
+
+def stack_confirm_hashes(hash_data: list[ImageHash]) -> np.ndarray:
+    """Stack the confirmation hashes of every image.
+
+    Returns:
+        Array of shape (n, confirm_nbits)
+
+    Raises:
+        ValueError: If any image has no confirmation hash
+    """
+    confirm = [
+        result.confirm_hash for result in hash_data if result.confirm_hash is not None
+    ]
+    if len(confirm) != len(hash_data):
+        raise ValueError(
+            f"{len(hash_data) - len(confirm)} of {len(hash_data)} hashes have no "
+            "confirmation hash; hash with confirm=True"
+        )
+    return np.stack(confirm)
+
+
+def confirm_pairs(
+    confirm: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    distances: np.ndarray,
+    confirm_eps: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Keep the candidate pairs whose confirmation hashes also lie within eps.
+
+    Args:
+        confirm: Confirmation hashes of shape (n, confirm_nbits)
+        rows: First index of each candidate pair
+        cols: Second index of each candidate pair
+        distances: Bit distance of each candidate pair
+        confirm_eps: Maximum proportion of differing confirmation hash bits
+
+    Returns:
+        The confirmed subset of (rows, cols, distances)
+    """
+    radius = eps_to_radius(confirm_eps, confirm.shape[1])
+    keep = pair_distances(pack_bits(confirm), rows, cols) <= radius
+    logger.info(f"Confirmed {int(keep.sum())} of {len(keep)} candidate pairs")
+    return rows[keep], cols[keep], distances[keep]
+
+
+def _cluster_labels(
+    vectors: np.ndarray,
+    eps: float,
+    approximate: bool,
+    recall: float,
+    variants: np.ndarray | None = None,
+    confirm: np.ndarray | None = None,
+    confirm_eps: float | None = None,
+) -> np.ndarray:
+    """Compute DBSCAN labels for stacked hash vectors.
+
+    Every path gathers the neighbor pairs within eps first and hands them to
+    labels_from_pairs, so DBSCAN never computes distances itself. With
+    variants, the distance between two images is the smallest distance
+    between their variants (see variant_pairs). With confirmation hashes,
+    pairs within eps only become edges if confirm_pairs accepts them.
+    """
+    nbits = vectors.shape[1]
+    radius = eps_to_radius(eps, nbits)
+    if variants is not None:
+        rows, cols, distances = variant_pairs(
+            vectors, variants, radius, approximate, recall
+        )
+    elif approximate:
+        rows, cols, distances = candidate_pairs(vectors, radius, recall=recall)
+    else:
+        rows, cols, distances = radius_pairs(pack_bits(vectors), radius)
+    if confirm is not None:
+        rows, cols, distances = confirm_pairs(
+            confirm,
+            rows,
+            cols,
+            distances,
+            eps if confirm_eps is None else confirm_eps,
+        )
+    return labels_from_pairs(len(vectors), rows, cols, distances, nbits, eps)
+
+
+def _log_summary(labels: np.ndarray) -> None:
+    """Log the number of clusters and noise points in a labelling."""
+    num_clusters = len(set(labels)) - (1 if -1 in labels else 0)
+    num_noise = list(labels).count(-1)
+    logger.info(
+        f"Clustering complete: {num_clusters} clusters, {num_noise} noise points"
+    )
+
+
+def cluster_hashes(
+    hash_data: list[ImageHash],
+    eps: float,
+    approximate: bool = False,
+    recall: float = DEFAULT_RECALL,
+    confirm_eps: float | None = None,
+) -> list[ClusteredImage]:
     """Cluster hashes using DBSCAN with Hamming distance.
 
+    When every hash carries variants (see ``Hasher(dihedral=True)``), images
+    are compared by the closest pair of variants, so rotated and mirrored
+    copies cluster together.
+
+    With confirm_eps, the 64-bit hashes only propose candidate pairs, and a
+    pair becomes an edge once the 256-bit confirmation hashes from the same
+    decode (see ``Hasher(confirm=True)``) agree as well. Low-texture images
+    such as documents or night skies often share their coarsest frequencies
+    without being duplicates; the longer hash tells them apart. Only the
+    candidate pairs are compared, so the cost stays close to single-hash
+    clustering.
+
     Args:
         hash_data: List of ImageHash objects
         eps: DBSCAN epsilon parameter as proportion (0.0-1.0).
              Represents the maximum proportion of differing bits for images
              to be considered similar. Lower = stricter clustering.
+        approximate: Only compare pairs that collide in a bit-sampling LSH
+                     bucket instead of comparing every pair. Much faster on
+                     large inputs, at the cost of occasionally missing a link.
+        recall: Target probability that approximate mode finds a pair at the
+                eps boundary. Higher values are slower. Ignored when exact.
+        confirm_eps: Maximum proportion of differing confirmation hash bits
+                     for a candidate pair to be linked. None disables
+                     confirmation.
 
     Returns:
         List of ClusteredImage objects with path and cluster label
+
+    Raises:
+        ValueError: If confirm_eps is set but a hash has no confirmation hash
     """
     if not hash_data:
         logger.warning("No hash data provided for clustering")
         return []
 
-    logger.info(f"Clustering {len(hash_data)} images with eps={eps}")
+    mode = "approximate" if approximate else "exact"
+    logger.info(f"Clustering {len(hash_data)} images with eps={eps} ({mode})")
 
     vectors = np.stack([result.hash for result in hash_data])
+    labels = _cluster_labels(
+        vectors,
+        eps,
+        approximate,
+        recall,
+        variants=stack_variants(hash_data),
+        confirm=stack_confirm_hashes(hash_data) if confirm_eps is not None else None,
+        confirm_eps=confirm_eps,
+    )
+    _log_summary(labels)
 
-    db = DBSCAN(eps=eps, min_samples=MIN_SAMPLES, metric="hamming")
-    labels = db.fit_predict(vectors)
+    return [
+        ClusteredImage(path=result.path, cluster_id=int(label))
+        for result, label in zip(hash_data, labels, strict=True)
+    ]
+
+
+def _union_labels(
+    num_points: int, labelings: list[tuple[np.ndarray, np.ndarray]]
+) -> np.ndarray:
+    """Merge partial clusterings: images sharing a label in any of them join.
+
+    Args:
+        num_points: Total number of images
+        labelings: Pairs of (image indices, their labels, -1 for noise)
+
+    Returns:
+        Array of cluster labels, -1 for images left alone, numbered in order
+        of each cluster's first image
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    rows, cols = [], []
+    for indices, labels in labelings:
+        clustered = labels != -1
+        indices, labels = indices[clustered], labels[clustered]
+        # Link every member to the first member of its cluster.
+        _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        rows.append(indices)
+        cols.append(indices[first][inverse])
+    rows_array, cols_array = np.concatenate(rows), np.concatenate(cols)
+    graph = csr_matrix(
+        (np.ones(len(rows_array)), (rows_array, cols_array)),
+        shape=(num_points, num_points),
+    )
+    _, components = connected_components(graph, directed=False)
+    alone = np.bincount(components)[components] < MIN_SAMPLES
+    labels = np.full(num_points, -1, dtype=np.int64)
+    labels[~alone] = np.unique(components[~alone], return_inverse=True)[1]
+    return labels
+
+
+def cluster_bursts(
+    hash_data: list[ImageHash],
+    eps: float,
+    window: float = DEFAULT_BURST_WINDOW,
+    approximate: bool = False,
+    recall: float = DEFAULT_RECALL,
+    confirm_eps: float | None = None,
+) -> list[ClusteredImage]:
+    """Cluster within EXIF capture-time bursts, then globally for the rest.
+
+    Each burst is clustered on its own, which turns one large neighbor search
+    into many tiny ones. A single global fallback pass then catches copies
+    across bursts. It covers images without a capture time, images that
+    found no near-duplicate inside their burst, and the first member of each
+    burst cluster. A fallback cluster containing such a member joins its
+    burst cluster, merging burst clusters that it links.
+
+    Args:
+        hash_data: ImageHash objects carrying CaptureInfo
+        eps: DBSCAN epsilon parameter as proportion (0.0-1.0)
+        window: Maximum gap in seconds between consecutive shots of a burst
+        approximate: Use LSH candidate generation in the fallback pass
+        recall: Target LSH pair recall for the fallback pass
+        confirm_eps: Confirm candidate pairs with the confirmation hashes;
+                     see cluster_hashes
+
+    Returns:
+        List of ClusteredImage objects with path and cluster label
+
+    Raises:
+        ValueError: If confirm_eps is set but a hash has no confirmation hash
+    """
+    if not hash_data:
+        logger.warning("No hash data provided for clustering")
+        return []
 
-    num_clusters = len(set(labels)) - (1 if -1 in labels else 0)
-    num_noise = list(labels).count(-1)
     logger.info(
-        f"Clustering complete: {num_clusters} clusters, {num_noise} noise points"
+        f"Clustering {len(hash_data)} images with eps={eps} in bursts of {window}s"
     )
 
+    vectors = np.stack([result.hash for result in hash_data])
+    variants = stack_variants(hash_data)
+    confirm = stack_confirm_hashes(hash_data) if confirm_eps is not None else None
+    labels = np.full(len(hash_data), -1, dtype=np.int64)
+    next_label = 0
+
+    bursts, rest = partition_bursts(hash_data, window)
+    fallback = list(rest)
+    # Bursts are tiny, so they run one after another: handing each to a
+    # pool would cost more than clustering it.
+    for burst in bursts:
+        if len(burst) < MIN_SAMPLES:
+            fallback.extend(burst)
+            continue
+        burst_labels = _cluster_labels(
+            vectors[burst],
+            eps,
+            False,
+            recall,
+            variants=variants[burst] if variants is not None else None,
+            confirm=confirm[burst] if confirm is not None else None,
+            confirm_eps=confirm_eps,
+        )
+        members = np.asarray(burst)
+        clustered = burst_labels != -1
+        labels[members[clustered]] = burst_labels[clustered] + next_label
+        # The first member of each cluster stands in for it in the fallback.
+        _, first = np.unique(burst_labels[clustered], return_index=True)
+        fallback.extend(members[clustered][first].tolist())
+        next_label += int(burst_labels.max(initial=-1)) + 1
+        fallback.extend(members[~clustered].tolist())
+
+    if len(fallback) >= MIN_SAMPLES:
+        fallback.sort()
+        logger.info(f"Global fallback pass over {len(fallback)} images")
+        fallback_labels = _cluster_labels(
+            vectors[fallback],
+            eps,
+            approximate,
+            recall,
+            variants=variants[fallback] if variants is not None else None,
+            confirm=confirm[fallback] if confirm is not None else None,
+            confirm_eps=confirm_eps,
+        )
+        labels = _union_labels(
+            len(hash_data),
+            [
+                (np.arange(len(hash_data)), labels),
+                (np.asarray(fallback), fallback_labels),
+            ],
+        )
+
+    _log_summary(labels)
+
     return [
         ClusteredImage(path=result.path, cluster_id=int(label))
         for result, label in zip(hash_data, labels, strict=True)
     ]
+
+
+def cluster_per_folder(
+    hash_data: list[ImageHash],
+    cluster: Callable[[list[ImageHash]], list[ClusteredImage]],
+    workers: int | None = None,
+) -> list[ClusteredImage]:
+    """Cluster the images of each folder on their own, folders in parallel.
+
+    Images only match within their folder (see image_folder), so one
+    quadratic pass over everything becomes many small independent ones. The
+    folders are clustered on a thread pool; the pair search releases the GIL.
+
+    Args:
+        hash_data: List of ImageHash objects
+        cluster: Clustering applied to each folder, e.g. cluster_hashes with
+                 its options bound
+        workers: Number of folders clustered at once; defaults to
+                 get_num_processes()
+
+    Returns:
+        List of ClusteredImage objects in input order. Cluster ids are unique
+        across folders; subcluster ids are left as each folder's clustering
+        returned them.
+    """
+    if not hash_data:
+        logger.warning("No hash data provided for clustering")
+        return []
+
+    folders = list(partition_by_folder([r.path for r in hash_data]).values())
+    logger.info(f"Clustering {len(hash_data)} images in {len(folders)} folders")
+
+    def run(indices: list[int]) -> list[ClusteredImage]:
+        return cluster([hash_data[i] for i in indices])
+
+    with ThreadPoolExecutor(max_workers=workers or get_num_processes()) as executor:
+        results = list(executor.map(run, folders))
+
+    clustered: list[ClusteredImage | None] = [None] * len(hash_data)
+    next_label = 0
+    for indices, folder_clustered in zip(folders, results, strict=True):
+        for i, c in zip(indices, folder_clustered, strict=True):
+            if c.cluster_id != -1:
+                c = replace(c, cluster_id=c.cluster_id + next_label)
+            clustered[i] = c
+        next_label += 1 + max((c.cluster_id for c in folder_clustered), default=-1)
+    return [c for c in clustered if c is not None]
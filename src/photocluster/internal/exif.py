@@ -0,0 +1,112 @@
+"""EXIF capture metadata extraction for PhotoCluster."""
+
+import logging
+from datetime import datetime
+
+from PIL import ExifTags, Image
+
+from .models.image import CaptureInfo
+
+logger = logging.getLogger(__name__)
+
+EXIF_DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+EXIF_HEADER = b"Exif\x00\x00"  # precedes the TIFF data in the APP1 segment
+JPEG_SOI = b"\xff\xd8"
+ORIENTATIONS = range(1, 9)  # valid EXIF orientation values; 1 is upright
+
+
+def _parse_timestamp(value: object, subsec: object) -> datetime | None:
+    """Parse an EXIF DateTimeOriginal value, tolerating blank or bogus dates."""
+    if not isinstance(value, str):
+        return None
+    try:
+        timestamp = datetime.strptime(value.strip("\x00 "), EXIF_DATETIME_FORMAT)
+    except ValueError:
+        return None
+    if isinstance(subsec, str) and subsec.strip().isdigit():
+        digits = subsec.strip()
+        timestamp = timestamp.replace(microsecond=int(digits[:6].ljust(6, "0")))
+    return timestamp
+
+
+def read_capture_info(img: Image.Image) -> CaptureInfo:
+    """Read capture time and camera identity from an opened image's header.
+
+    Only the EXIF segment is parsed; pixel data is never decoded, so this is
+    cheap to call on an image returned by ``Image.open``.
+
+    Args:
+        img: Opened (not necessarily loaded) image
+
+    Returns:
+        CaptureInfo with missing fields set to None
+    """
+    exif = img.getexif()
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+
+    timestamp = _parse_timestamp(
+        exif_ifd.get(ExifTags.Base.DateTimeOriginal),
+        exif_ifd.get(ExifTags.Base.SubsecTimeOriginal),
+    )
+
+    serial = exif_ifd.get(ExifTags.Base.BodySerialNumber)
+    if isinstance(serial, str) and serial.strip():
+        camera: str | None = serial.strip()
+    else:
+        parts = [
+            str(exif[tag]).strip()
+            for tag in (ExifTags.Base.Make, ExifTags.Base.Model)
+            if exif.get(tag)
+        ]
+        camera = " ".join(parts) or None
+
+    return CaptureInfo(timestamp=timestamp, camera=camera)
+
+
+def read_orientation(img: Image.Image) -> int:
+    """Read the EXIF orientation of an opened image, 1 (upright) if unknown."""
+    try:
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    except Exception as e:
+        logger.debug(f"Unreadable EXIF orientation: {e}")
+        return 1
+    return orientation if orientation in ORIENTATIONS else 1
+
+
+def read_thumbnail(img: Image.Image) -> bytes | None:
+    """Extract the JPEG preview embedded in IFD1 of an image's EXIF segment.
+
+    Like read_capture_info, this only parses the header. A thumbnail whose
+    own orientation tag disagrees with the main image's is not returned.
+
+    Args:
+        img: Opened (not necessarily loaded) image
+
+    Returns:
+        The thumbnail's JPEG bytes, or None if there is no usable thumbnail
+    """
+    raw = img.info.get("exif")
+    if not isinstance(raw, bytes) or not raw.startswith(EXIF_HEADER):
+        return None
+    try:
+        exif = img.getexif()
+        thumbnail_ifd = exif.get_ifd(ExifTags.IFD.IFD1)
+    except Exception as e:
+        logger.debug(f"Unreadable EXIF thumbnail directory: {e}")
+        return None
+
+    offset = thumbnail_ifd.get(ExifTags.Base.JpegIFOffset)
+    length = thumbnail_ifd.get(ExifTags.Base.JpegIFByteCount)
+    if not isinstance(offset, int) or not isinstance(length, int) or length <= 0:
+        return None
+    orientation = thumbnail_ifd.get(ExifTags.Base.Orientation)
+    if orientation is not None and orientation != exif.get(
+        ExifTags.Base.Orientation, 1
+    ):
+        return None
+
+    start = len(EXIF_HEADER) + offset
+    data = raw[start : start + length]
+    if len(data) != length or not data.startswith(JPEG_SOI):
+        return None
+    return data
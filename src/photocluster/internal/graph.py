@@ -0,0 +1,142 @@
+"""Precomputed Hamming neighbor graph reusable across sensitivity values."""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from .cluster import labels_from_pairs, stack_variants, variant_pairs
+from .hamming import eps_to_radius, pack_bits, radius_pairs
+from .models.image import ClusteredImage, ImageHash
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FORMAT_VERSION = 1
+
+
+@dataclass
+class NeighborGraph:
+    """Every pair of images within a maximum Hamming radius, sorted by distance.
+
+    Building the graph is the expensive, quadratic part of clustering. Once
+    built, labels for any eps up to ``max_eps`` are derived by keeping the
+    prefix of edges within eps, which is linear in the number of edges.
+    """
+
+    paths: list[Path]
+    nbits: int
+    max_eps: float
+    rows: np.ndarray  # first image of each edge
+    cols: np.ndarray  # second image of each edge
+    distances: np.ndarray  # bit distance of each edge, ascending
+
+    @classmethod
+    def build(cls, hash_data: list[ImageHash], max_eps: float) -> Self:
+        """Compute all pairs within max_eps.
+
+        Args:
+            hash_data: List of ImageHash objects
+            max_eps: Largest eps (proportion of differing bits) to support
+
+        Returns:
+            NeighborGraph over hash_data
+        """
+        paths = [result.path for result in hash_data]
+        if not hash_data:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(paths, 0, max_eps, empty, empty, empty)
+
+        vectors = np.stack([result.hash for result in hash_data])
+        nbits = vectors.shape[1]
+        variants = stack_variants(hash_data)
+        radius = eps_to_radius(max_eps, nbits)
+        if variants is not None:
+            rows, cols, distances = variant_pairs(vectors, variants, radius)
+        else:
+            rows, cols, distances = radius_pairs(pack_bits(vectors), radius)
+        order = np.argsort(distances, kind="stable")
+        logger.info(
+            f"Built neighbor graph: {len(hash_data)} images, {len(order)} edges "
+            f"within eps={max_eps}"
+        )
+        return cls(paths, nbits, max_eps, rows[order], cols[order], distances[order])
+
+    def labels(self, eps: float) -> np.ndarray:
+        """Derive DBSCAN cluster labels for eps from the stored edges.
+
+        Args:
+            eps: DBSCAN epsilon as proportion, at most max_eps
+
+        Returns:
+            Array of cluster labels aligned with paths, -1 for noise
+
+        Raises:
+            ValueError: If eps exceeds the radius the graph was built for
+        """
+        if eps > self.max_eps:
+            raise ValueError(
+                f"eps={eps} exceeds the graph's max_eps={self.max_eps}; rebuild it"
+            )
+        if not self.paths:
+            return np.empty(0, dtype=np.int64)
+        count = int(
+            np.searchsorted(self.distances, eps_to_radius(eps, self.nbits), "right")
+        )
+        return labels_from_pairs(
+            len(self.paths),
+            self.rows[:count],
+            self.cols[:count],
+            self.distances[:count],
+            self.nbits,
+            eps,
+        )
+
+    def cluster(self, eps: float) -> list[ClusteredImage]:
+        """Cluster the graph's images at eps.
+
+        Args:
+            eps: DBSCAN epsilon as proportion, at most max_eps
+
+        Returns:
+            List of ClusteredImage objects aligned with paths
+        """
+        return [
+            ClusteredImage(path=path, cluster_id=int(label))
+            for path, label in zip(self.paths, self.labels(eps), strict=True)
+        ]
+
+    def save(self, path: Path) -> None:
+        """Persist the graph to a compressed ``.npz`` file."""
+        with path.open("wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.array(GRAPH_FORMAT_VERSION),
+                paths=np.array([str(p) for p in self.paths], dtype=np.str_),
+                nbits=np.array(self.nbits),
+                max_eps=np.array(self.max_eps),
+                rows=self.rows,
+                cols=self.cols,
+                distances=self.distances,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Load a graph written by save.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version
+        """
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != GRAPH_FORMAT_VERSION:
+                raise ValueError(f"Unsupported neighbor graph version: {version}")
+            return cls(
+                paths=[Path(p) for p in data["paths"].tolist()],
+                nbits=int(data["nbits"]),
+                max_eps=float(data["max_eps"]),
+                rows=data["rows"],
+                cols=data["cols"],
+                distances=data["distances"],
+            )
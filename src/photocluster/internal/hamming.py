@@ -0,0 +1,298 @@
+"""Hamming-space helpers for packed binary hashes."""
+
+import functools
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .util.processing import get_num_processes
+
+logger = logging.getLogger(__name__)
+
+WORD_BITS = 64
+BLOCK_ELEMENTS = 1 << 22
+
+NativeKernel = Callable[
+    [np.ndarray, int, int], tuple[np.ndarray, np.ndarray, np.ndarray]
+]
+
+
+def pack_bits(vectors: np.ndarray) -> np.ndarray:
+    """Pack binary hash vectors into rows of 64-bit words.
+
+    Args:
+        vectors: Array of shape (n, nbits) holding 0/1 values
+
+    Returns:
+        Array of shape (n, ceil(nbits / 64)) with dtype uint64
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.uint8))
+    packed = np.packbits(vectors, axis=1)
+    pad = (-packed.shape[1]) % (WORD_BITS // 8)
+    if pad:
+        packed = np.pad(packed, ((0, 0), (0, pad)))
+    return np.ascontiguousarray(packed).view(">u8").astype(np.uint64)
+
+
+def pair_distances(
+    packed: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    variants: np.ndarray | None = None,
+) -> np.ndarray:
+    """Compute Hamming distances between selected pairs of packed hashes.
+
+    Args:
+        packed: Packed hashes as returned by pack_bits
+        rows: Indices of the first element of each pair
+        cols: Indices of the second element of each pair
+        variants: Packed hash variants from pack_variants; see radius_pairs
+
+    Returns:
+        Array of bit distances (int64), one per pair
+    """
+    if variants is None:
+        diff = np.bitwise_xor(packed[rows], packed[cols])
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int64)
+    return np.min(
+        [
+            np.bitwise_count(np.bitwise_xor(left, right)).sum(axis=1, dtype=np.int64)
+            for variant in variants
+            for left, right in (
+                (variant[rows], packed[cols]),
+                (packed[rows], variant[cols]),
+            )
+        ],
+        axis=0,
+    )
+
+
+def eps_to_radius(eps: float, nbits: int) -> int:
+    """Convert a proportional Hamming eps into the largest matching bit distance.
+
+    Mirrors the ``distance / nbits <= eps`` comparison DBSCAN performs with the
+    ``hamming`` metric, so integer radius queries select exactly the same pairs.
+
+    Args:
+        eps: Maximum proportion of differing bits (0.0-1.0)
+        nbits: Number of bits per hash
+
+    Returns:
+        Largest number of differing bits still within eps
+    """
+    return max((k for k in range(nbits + 1) if k / nbits <= eps), default=-1)
+
+
+def pack_variants(variants: np.ndarray) -> np.ndarray:
+    """Pack per-image hash variants of shape (n, k, nbits) into (k, n, words)."""
+    return np.stack([pack_bits(variants[:, k]) for k in range(variants.shape[1])])
+
+
+def _block_pairs(
+    packed: np.ndarray,
+    start: int,
+    stop: int,
+    radius: int,
+    variants: np.ndarray | None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the pairs within radius among rows [start, stop) and later columns."""
+    if variants is None:
+        diff = np.bitwise_xor(packed[start:stop, None, :], packed[None, start:, :])
+        distances = np.bitwise_count(diff).sum(axis=2, dtype=np.int64)
+    else:
+        # Variants are recomputed hashes rather than bit permutations, so
+        # compare in both directions to keep the distance symmetric.
+        distances = np.min(
+            [
+                np.bitwise_count(np.bitwise_xor(left, right)).sum(
+                    axis=2, dtype=np.int64
+                )
+                for variant in variants
+                for left, right in (
+                    (variant[start:stop, None, :], packed[None, start:, :]),
+                    (packed[start:stop, None, :], variant[None, start:, :]),
+                )
+            ],
+            axis=0,
+        )
+    local_rows, local_cols = np.nonzero(distances <= radius)
+    upper = local_cols > local_rows
+    local_rows, local_cols = local_rows[upper], local_cols[upper]
+    return (
+        local_rows + start,
+        local_cols + start,
+        distances[local_rows, local_cols],
+    )
+
+
+def _build_kernel(
+    jit: Callable[..., Callable[[Callable], Callable]],
+    prange: Callable[[int], range],
+    set_threads: Callable[[int], None],
+) -> NativeKernel:
+    """Build the radius query of native_kernel from the given numba pieces.
+
+    native_kernel passes ``numba.njit``, ``numba.prange`` and a wrapper of
+    ``numba.set_num_threads``. A decorator that returns functions unchanged,
+    with ``range`` and a no-op, builds the same kernel in plain Python, so
+    tests can check its logic without numba installed.
+
+    Args:
+        jit: Called with numba.njit options; returns a function decorator
+        prange: Loop range whose iterations may run in parallel
+        set_threads: Called with the requested number of workers
+
+    Returns:
+        ``kernel(packed, radius, workers) -> (rows, cols, distances)``
+    """
+    m1 = np.uint64(0x5555555555555555)
+    m2 = np.uint64(0x3333333333333333)
+    m4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+    h01 = np.uint64(0x0101010101010101)
+    one, two, four, top = np.uint64(1), np.uint64(2), np.uint64(4), np.uint64(56)
+
+    @jit(inline="always")
+    def distance(packed, i, j):
+        total = 0
+        for word in range(packed.shape[1]):
+            x = packed[i, word] ^ packed[j, word]
+            x = x - ((x >> one) & m1)
+            x = (x & m2) + ((x >> two) & m2)
+            x = (x + (x >> four)) & m4
+            total += np.int64((x * h01) >> top)
+        return total
+
+    @jit(inline="always")
+    def row(t, n):
+        # Interleave short and long rows of the triangle so that the static
+        # chunks prange hands each thread have similar amounts of work.
+        return t // 2 if t % 2 == 0 else n - 1 - t // 2
+
+    @jit(nogil=True, parallel=True, cache=True)
+    def count_pairs(packed, radius):
+        n = packed.shape[0]
+        counts = np.zeros(n, np.int64)
+        for t in prange(n):
+            i = row(t, n)
+            found = 0
+            for j in range(i + 1, n):
+                if distance(packed, i, j) <= radius:
+                    found += 1
+            counts[i] = found
+        return counts
+
+    @jit(nogil=True, parallel=True, cache=True)
+    def fill_pairs(packed, radius, offsets, rows, cols, dists):
+        n = packed.shape[0]
+        for t in prange(n):
+            i = row(t, n)
+            k = offsets[i]
+            for j in range(i + 1, n):
+                d = distance(packed, i, j)
+                if d <= radius:
+                    rows[k] = i
+                    cols[k] = j
+                    dists[k] = d
+                    k += 1
+
+    def kernel(
+        packed: np.ndarray, radius: int, workers: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        packed = np.ascontiguousarray(packed, dtype=np.uint64)
+        set_threads(workers)
+        counts = count_pairs(packed, radius)
+        offsets = np.zeros(len(counts) + 1, np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        total = int(offsets[-1])
+        rows = np.empty(total, np.int64)
+        cols = np.empty(total, np.int64)
+        dists = np.empty(total, np.int64)
+        fill_pairs(packed, radius, offsets, rows, cols, dists)
+        return rows, cols, dists
+
+    return kernel
+
+
+@functools.cache
+def native_kernel() -> NativeKernel | None:
+    """Compile the numba radius query on first use.
+
+    The kernel XORs and popcounts packed words in registers without building
+    a distance block, and runs rows in parallel with the GIL released.
+
+    Returns:
+        ``kernel(packed, radius, workers) -> (rows, cols, distances)``, or None
+        when numba is not installed
+    """
+    try:
+        import numba  # ty: ignore[unresolved-import]
+    except ImportError:
+        return None
+
+    def set_threads(workers: int) -> None:
+        numba.set_num_threads(max(1, min(workers, numba.config.NUMBA_NUM_THREADS)))
+
+    kernel = _build_kernel(numba.njit, numba.prange, set_threads)
+    logger.debug("Using the numba Hamming kernel")
+    return kernel
+
+
+def radius_pairs(
+    packed: np.ndarray,
+    radius: int,
+    block_elements: int = BLOCK_ELEMENTS,
+    variants: np.ndarray | None = None,
+    workers: int | None = None,
+    native: bool = True,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find every pair of packed hashes within `radius` bits of each other.
+
+    With numba installed, plain hashes go through native_kernel. Otherwise
+    distances are computed block by block with XOR and popcount, so memory
+    stays bounded by ``block_elements`` regardless of the number of hashes.
+    NumPy releases the GIL inside those ufuncs, so blocks run on a pool of
+    threads. Either way the pairs come back in the same order.
+
+    Args:
+        packed: Packed hashes as returned by pack_bits
+        radius: Maximum bit distance of pairs to return
+        block_elements: Approximate number of distances held in memory at once
+        variants: Packed variants of every hash from pack_variants, e.g. its
+                  rotations. The distance of a pair is then the smallest
+                  distance between a variant of either hash and the other.
+        workers: Number of threads; defaults to get_num_processes()
+        native: Use the numba kernel when it is available
+
+    Returns:
+        Tuple of (rows, cols, distances) with rows < cols, sorted by row and
+        then column
+    """
+    num_hashes = len(packed)
+    workers = workers or get_num_processes()
+    kernel = native_kernel() if native and variants is None else None
+    if kernel is not None and num_hashes:
+        return kernel(packed, radius, workers)
+
+    num_variants = 1 if variants is None else len(variants)
+    block = max(1, block_elements // max(1, num_hashes * num_variants * workers))
+    # Compare rows [start, stop) against every later column.
+    starts = range(0, num_hashes, block)
+
+    def run(start: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return _block_pairs(
+            packed, start, min(start + block, num_hashes), radius, variants
+        )
+
+    if workers > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(run, starts))
+    else:
+        parts = [run(start) for start in starts]
+
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    rows, cols, dists = zip(*parts, strict=True)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(dists)
@@ -0,0 +1,93 @@
+"""Admission control that bounds the memory of concurrent image decodes."""
+
+import io
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from PIL import Image
+
+from ..util.processing import BudgetClosed, InFlightBudget
+
+logger = logging.getLogger(__name__)
+
+# Besides the decoded image, hashing holds an RGB copy (3 bytes per pixel) and
+# the grayscale image phash works on (1 byte per pixel).
+CONVERT_BYTES_PER_PIXEL = 4
+
+
+def estimate_decode_bytes(source: Path | bytes) -> int:
+    """Estimate the peak memory needed to hash an image from its header.
+
+    Only the header is read; the pixel data is not decoded.
+
+    Args:
+        source: Image file, or its contents if they were already read
+
+    Returns:
+        Estimated bytes, or 0 if the header cannot be read (the hash worker
+        then reports the error for that file)
+    """
+    try:
+        with Image.open(
+            io.BytesIO(source) if isinstance(source, bytes) else source
+        ) as img:
+            width, height = img.size
+            bands = len(img.getbands())
+    except Exception:
+        return 0
+    return width * height * (bands + CONVERT_BYTES_PER_PIXEL)
+
+
+class MemoryAdmission:
+    """Hands out work only while the estimated decode memory fits a budget.
+
+    Iterating ``admit(items, path_of)`` blocks before yielding an image whose
+    estimated decode memory would push the in-flight total over ``max_bytes``;
+    call ``release(path)`` once that image's hash has come back. An image
+    larger than the whole budget is decoded on its own.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.budget = InFlightBudget(max_bytes)
+        self._costs: dict[Path, int] = {}
+
+    def admit[T](
+        self,
+        items: Iterable[T],
+        path_of: Callable[[T], Path],
+        source_of: Callable[[T], Path | bytes] | None = None,
+    ) -> Iterator[T]:
+        """Yield items as their estimated decode memory becomes available.
+
+        Args:
+            items: Work items, one per image
+            path_of: Returns the image path of an item
+            source_of: Returns what to read the header from, e.g. prefetched
+                       bytes, so the file is not opened again; defaults to
+                       path_of
+        """
+        for item in items:
+            path = path_of(item)
+            cost = estimate_decode_bytes((source_of or path_of)(item))
+            if cost > self.budget.limit:
+                logger.warning(
+                    f"{path.name} needs about {cost / 2**20:.0f} MiB to decode, "
+                    f"more than the {self.budget.limit / 2**20:.0f} MiB budget; "
+                    "hashing it on its own"
+                )
+            try:
+                self.budget.acquire(cost)
+            except BudgetClosed:
+                logger.debug("Admission closed before all images were scheduled")
+                return
+            self._costs[path] = cost
+            yield item
+
+    def release(self, path: Path) -> None:
+        """Return the budget held by an image whose hash has been received."""
+        self.budget.release(self._costs.pop(path, 0))
+
+    def close(self) -> None:
+        """Stop admitting; unblocks an iterator waiting on the budget."""
+        self.budget.close()
@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 
 from ..models.image import ImageHash
+from .profiling import StageClock
 
 
 class AbstractHasher(ABC):
@@ -24,11 +25,27 @@ class AbstractHasher(ABC):
 
     @staticmethod
     @abstractmethod
-    def hash(path: Path) -> ImageHash:
+    def hash(
+        path: Path,
+        quality: bool = False,
+        capture: bool = False,
+        data: bytes | None = None,
+        clock: StageClock | None = None,
+        fast: bool = False,
+        dihedral: bool = False,
+        confirm: bool = False,
+    ) -> ImageHash:
         """Compute hash for an image at the given path.
 
         Args:
             path: Path to the image file
+            quality: Also collect ImageQuality metrics from the same decode
+            capture: Also read CaptureInfo from the image header
+            data: File contents already read into memory; read from path if None
+            clock: Laps each step of the work for profiling when given
+            fast: Trade some accuracy for speed, e.g. hash an embedded preview
+            dihedral: Also record the hashes of the rotated and mirrored image
+            confirm: Also compute a longer hash that confirms matches
 
         Returns:
             ImageHash object containing the hash and path
@@ -2,27 +2,103 @@
 
 import logging
 import multiprocessing
+import multiprocessing.pool
+import os
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import replace
 from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Self
 
 from ..models.image import ImageHash
-from ..util.files import find_image_files
+from ..util.files import content_digest, find_image_files
+from ..util.processing import BACKENDS, Backend, CancellationToken, default_backend
+from ..util.progress import HashProgress, WorkerLoads
+from ..util.throttle import IOClass, Throttle, priority_initializer
+from .admission import MemoryAdmission
 from .jpeg import JPEGHasher
+from .prefetch import DEFAULT_PREFETCH_BYTES, Prefetcher
+from .profiling import HashProfile, StageClock, TaskProfile, profile_call
+
+if TYPE_CHECKING:
+    from ..cache import HashCache
 
 logger = logging.getLogger(__name__)
 
+MAX_CHUNKSIZE = 16
+CANCEL_POLL_INTERVAL = 0.1  # seconds between cancellation checks while waiting
+# Identifies how hashes are computed; bump it when a change alters hash bits
+# so cached hashes from older versions are not reused.
+HASH_ALGORITHM = "phash-64"
+FAST_SUFFIX = "-fast"
+DIHEDRAL_SUFFIX = "-dihedral"
+CONFIRM_SUFFIX = "-confirm256"
+
+
+def hash_algorithm(
+    fast: bool = False, dihedral: bool = False, confirm: bool = False
+) -> str:
+    """Name of the hashes a Hasher with these options computes, for HashCache."""
+    return (
+        HASH_ALGORITHM
+        + (FAST_SUFFIX if fast else "")
+        + (DIHEDRAL_SUFFIX if dihedral else "")
+        + (CONFIRM_SUFFIX if confirm else "")
+    )
+
 
 class Hasher:
     """Main hasher that routes to appropriate hasher based on file extension."""
 
-    def __init__(self):
-        """Initialize the hasher with supported hashers."""
+    def __init__(
+        self,
+        quality: bool = False,
+        capture: bool = False,
+        digest: bool = False,
+        profile: bool = False,
+        fast: bool = False,
+        dihedral: bool = False,
+        confirm: bool = False,
+    ) -> None:
+        """Initialize the hasher with supported hashers.
+
+        Args:
+            quality: Also collect ImageQuality metrics for every image
+            capture: Also read CaptureInfo from every image header
+            digest: Also record the content digest of every file
+            profile: Return a TaskProfile from timed_task
+            fast: Hash EXIF thumbnails or reduced-scale decodes
+            dihedral: Normalize EXIF orientation and also record the hashes
+                      of each image's rotations and mirror images
+            confirm: Also compute a 256-bit hash of every image for
+                     confirming matches between the 64-bit hashes
+
+        Raises:
+            ValueError: If both dihedral and confirm are set
+        """
+        if dihedral and confirm:
+            raise ValueError("Confirmation hashes do not support rotation variants")
         self._hashers = [JPEGHasher]
+        self._quality = quality
+        self._capture = capture
+        self._digest = digest
+        self._profile = profile
+        self._fast = fast
+        self._dihedral = dihedral
+        self._confirm = confirm
 
-    def __call__(self, path: Path) -> ImageHash:
+    def __call__(
+        self, path: Path, data: bytes | None = None, clock: StageClock | None = None
+    ) -> ImageHash:
         """Route to appropriate hasher based on file extension.
 
         Args:
             path: Path to the image file
+            data: File contents already read into memory; read from path if None
+            clock: Laps each step of the work for profiling when given
 
         Returns:
             ImageHash object containing the hash and path
@@ -33,25 +109,425 @@ class Hasher:
         for hasher_class in self._hashers:
             if hasher_class.can_hash(path):
                 logger.debug(f"Computing hash for {path.name}")
-                return hasher_class.hash(path)
+                if self._digest and data is None:
+                    # Read once and decode from memory rather than reading twice.
+                    data = path.read_bytes()
+                    if clock is not None:
+                        clock.lap("read")
+                result = hasher_class.hash(
+                    path,
+                    quality=self._quality,
+                    capture=self._capture,
+                    data=data,
+                    clock=clock,
+                    fast=self._fast,
+                    dihedral=self._dihedral,
+                    confirm=self._confirm,
+                )
+                if self._digest and data is not None:
+                    result = replace(result, digest=content_digest(data))
+                    if clock is not None:
+                        clock.lap("digest")
+                return result
         logger.error(f"No hasher available for file: {path}")
         raise ValueError(f"No hasher available for file: {path}")
 
+    def hash_task(
+        self, task: Path | tuple[Path, bytes], clock: StageClock | None = None
+    ) -> ImageHash:
+        """Hash a pool task: a path, or a prefetched ``(path, data)`` pair."""
+        if isinstance(task, tuple):
+            return self(*task, clock=clock)
+        return self(task, clock=clock)
+
+    def try_task(self, task: Path | tuple[Path, bytes]) -> ImageHash | None:
+        """Hash a pool task, returning None instead of raising on failure."""
+        try:
+            return self.hash_task(task)
+        except Exception as e:
+            logger.warning(f"Skipping {_task_path(task)}: {e}")
+            return None
+
+    def timed_task(
+        self, task: Path | tuple[Path, bytes]
+    ) -> tuple[ImageHash, str, float, TaskProfile | None]:
+        """Hash a pool task, also returning the worker's name and the duration.
+
+        With profiling enabled, the last element is the task's TaskProfile.
+        """
+        start = time.perf_counter()
+        profile = None
+        if self._profile:
+            clock = StageClock()
+            # cProfile hooks the whole interpreter, so only one thread may run
+            # it. Pool processes run tasks on their main thread; thread-pool
+            # workers only get the stage breakdown.
+            functions = threading.current_thread() is threading.main_thread()
+            result, profile = profile_call(
+                clock, functions, lambda: self.hash_task(task, clock)
+            )
+        else:
+            result = self.hash_task(task)
+        worker = f"{os.getpid()}/{threading.current_thread().name}"
+        return result, worker, time.perf_counter() - start, profile
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        # Let the hash worker report the error for this path.
+        return 0
+
+
+def _chunksize(num_paths: int, num_processes: int) -> int:
+    """Pick a chunk size small enough for steady progress, large enough for IPC."""
+    return max(1, min(MAX_CHUNKSIZE, num_paths // (num_processes * 4)))
+
+
+def _make_pool(
+    backend: Backend,
+    num_workers: int,
+    initializer: Callable[[], None] | None = None,
+) -> multiprocessing.pool.Pool:
+    """Create a process or thread pool with the same imap/terminate interface.
+
+    Raises:
+        ValueError: If backend is not one of BACKENDS
+    """
+    if backend == "process":
+        return multiprocessing.Pool(processes=num_workers, initializer=initializer)
+    if backend == "thread":
+        return multiprocessing.pool.ThreadPool(
+            processes=num_workers, initializer=initializer
+        )
+    raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+
+
+@contextmanager
+def _running_pool(
+    backend: Backend,
+    num_workers: int,
+    initializer: Callable[[], None] | None = None,
+) -> Generator[multiprocessing.pool.Pool]:
+    """Run a pool for a with block, then terminate it and wait for its threads.
+
+    Pool.__exit__ only terminates; the pool's handler threads, and a thread
+    pool's workers, can outlive it and would then be running when the next
+    process pool forks.
+    """
+    pool = _make_pool(backend, num_workers, initializer)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _task_path(task: Path | tuple[Path, bytes]) -> Path:
+    """Return the image path of a plain or prefetched pool task."""
+    return task[0] if isinstance(task, tuple) else task
+
+
+def _task_source(task: Path | tuple[Path, bytes]) -> Path | bytes:
+    """Return the prefetched contents of a task, or its path if not prefetched."""
+    return task[1] if isinstance(task, tuple) else task
+
+
+class HashPool:
+    """Long-lived hash workers for hashing small batches of files over time.
+
+    iter_hashes starts a pool for every call, which suits one large run. A
+    caller that hashes a few files every few seconds, such as a folder
+    watcher, keeps one HashPool instead, so worker startup and imports are
+    paid once.
+    """
+
+    def __init__(
+        self,
+        num_processes: int,
+        backend: Backend | None = None,
+        quality: bool = False,
+        capture: bool = False,
+        fast: bool = False,
+        digest: bool = False,
+    ) -> None:
+        """Start the worker pool.
+
+        Args:
+            num_processes: Number of worker processes (or threads) to start
+            backend: "process" or "thread"; None picks the default_backend
+            quality: Also collect ImageQuality metrics for every image
+            capture: Also read CaptureInfo from every image header
+            fast: Hash EXIF thumbnails or reduced-scale decodes
+            digest: Also compute each file's content digest from the bytes
+                    read for hashing, for HashCache.put
+        """
+        self._hasher = Hasher(
+            quality=quality, capture=capture, fast=fast, digest=digest
+        )
+        self._pool = _make_pool(backend or default_backend(), num_processes)
+
+    def hash(self, paths: list[Path]) -> list[ImageHash]:
+        """Hash files in order, leaving out those that fail to hash.
+
+        Unlike iter_hashes, an unreadable file, e.g. one still being written,
+        does not abort the batch.
+        """
+        if not paths:
+            return []
+        results = self._pool.map(self._hasher.try_task, paths, chunksize=1)
+        return [result for result in results if result is not None]
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the workers once they finish their tasks, or at once if not wait."""
+        if wait:
+            self._pool.close()
+        else:
+            self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close(wait=exc_type is None)
+
+
+def _until_cancelled[T](
+    results: "multiprocessing.pool.IMapIterator[T]", cancel: CancellationToken | None
+) -> Iterator[T]:
+    """Yield from a pool's imap iterator until the token is cancelled.
+
+    Waits in CANCEL_POLL_INTERVAL steps, so cancelling takes effect even
+    while a slow image is being hashed.
+    """
+    if cancel is None:
+        yield from results
+        return
+    while not cancel.cancelled:
+        try:
+            yield results.next(timeout=CANCEL_POLL_INTERVAL)
+        except multiprocessing.TimeoutError:
+            continue
+        except StopIteration:
+            return
+    logger.info("Hashing cancelled")
+
+
+def iter_hashes(
+    paths: list[Path],
+    num_processes: int,
+    quality: bool = False,
+    capture: bool = False,
+    prefetch: bool = False,
+    prefetch_bytes: int = DEFAULT_PREFETCH_BYTES,
+    memory_budget: int | None = None,
+    backend: Backend | None = None,
+    largest_first: bool = False,
+    worker_loads: WorkerLoads | None = None,
+    digest: bool = False,
+    profile: HashProfile | None = None,
+    fast: bool = False,
+    dihedral: bool = False,
+    confirm: bool = False,
+    cancel: CancellationToken | None = None,
+    read_limit: Throttle | None = None,
+    niceness: int = 0,
+    io_class: IOClass | None = None,
+) -> Iterator[ImageHash]:
+    """Compute perceptual hashes for the given files, yielding them as they finish.
+
+    Results are yielded in the order of ``paths``, unless largest_first is set.
+
+    Args:
+        paths: Image files to hash
+        num_processes: Number of worker processes (or threads) to start
+        quality: Also collect ImageQuality metrics during the hashing decode
+        capture: Also read EXIF CaptureInfo from each image header
+        prefetch: Read files on a thread pool in this process and send the
+                  bytes to the workers, so slow storage reads overlap with
+                  decoding instead of stalling it
+        prefetch_bytes: Maximum bytes read ahead but not yet hashed
+        memory_budget: Maximum estimated bytes of images being decoded at
+                       once, from the dimensions in each header. None
+                       disables admission control.
+        backend: "process" for a process pool, or "thread" to hash on threads
+                 in this process. Pillow releases the GIL while decoding and
+                 resizing, and threads share one copy of the interpreter and
+                 its imports. None picks threads on free-threaded Python and
+                 processes otherwise.
+        largest_first: Hand out the largest files first, one at a time, and
+                       yield results as soon as they finish. A big file
+                       found late can no longer hold up the end of the run
+                       while the other workers sit idle.
+        worker_loads: Filled with each worker's busy time and task count
+        digest: Also record each file's content digest, e.g. for HashCache
+        profile: Filled with per-stage times from every worker and, on the
+                 process backend, their merged cProfile stats
+        fast: Hash the EXIF thumbnail when it shows the whole picture, and
+              otherwise a reduced-scale decode. Much faster on camera JPEGs;
+              near-duplicates still match, but hashes can differ by a few
+              bits from full decodes, so do not mix the two.
+        dihedral: Hash each image upright according to its EXIF orientation
+                  and record the hashes of its 8 rotations and mirror images
+                  in ImageHash.variants. Clustering then matches rotated and
+                  mirrored copies.
+        confirm: Also compute a 256-bit phash of each image from the same
+                 decode, stored in ImageHash.confirm_hash, so clustering can
+                 confirm candidate matches of the 64-bit hashes
+        cancel: Stop once this token is cancelled. Results already yielded
+                stay valid; the workers are terminated, dropping the images
+                they were still hashing.
+        read_limit: Read every file through it, so reads stay within its
+                    files/s and MB/s limits and its achieved rates show what
+                    the run read. Implies prefetch, since reads made inside
+                    the workers cannot share one limit.
+        niceness: Amount to add to the CPU nice value (0-19) of every worker
+                  and prefetch thread. The calling thread keeps its priority.
+        io_class: I/O scheduling class of every worker and prefetch thread;
+                  None leaves it unchanged
+
+    Yields:
+        ImageHash objects
+    """
+    if not paths:
+        return
+
+    backend = backend or default_backend()
+    prefetch = prefetch or read_limit is not None
+    if largest_first:
+        paths = sorted(paths, key=_file_size, reverse=True)
+    hasher = Hasher(
+        quality=quality,
+        capture=capture,
+        digest=digest,
+        profile=profile is not None,
+        fast=fast,
+        dihedral=dihedral,
+        confirm=confirm,
+    )
+    initializer = priority_initializer(niceness, io_class, threads=backend == "thread")
+    with _running_pool(backend, num_processes, initializer) as pool:
+        prefetcher = (
+            Prefetcher(
+                paths,
+                max_bytes=prefetch_bytes,
+                throttle=read_limit,
+                initializer=priority_initializer(niceness, io_class, threads=True),
+            )
+            if prefetch
+            else None
+        )
+        admission = MemoryAdmission(memory_budget) if memory_budget else None
+        tasks: Iterable[Path | tuple[Path, bytes]] = (
+            paths if prefetcher is None else prefetcher
+        )
+        if admission is not None:
+            tasks = admission.admit(tasks, _task_path, _task_source)
+
+        # Budget-gated tasks go out one at a time: imap collects a whole chunk
+        # before dispatching it, so a chunk blocked on the budget would hold
+        # budget for images no worker has received yet. Threads pay no
+        # pickling cost per task and size-ordered work needs fine-grained
+        # balancing, so both use single tasks as well.
+        gated = prefetcher is not None or admission is not None
+        if gated or largest_first or backend == "thread":
+            chunksize = 1
+        else:
+            chunksize = _chunksize(len(paths), num_processes)
+        imap = pool.imap_unordered if largest_first else pool.imap
+        try:
+            for result, worker, seconds, task_profile in _until_cancelled(
+                imap(hasher.timed_task, tasks, chunksize), cancel
+            ):
+                if worker_loads is not None:
+                    worker_loads.record(worker, seconds)
+                if profile is not None and task_profile is not None:
+                    profile.record(task_profile)
+                if prefetcher is not None:
+                    prefetcher.release(result.path)
+                if admission is not None:
+                    admission.release(result.path)
+                yield result
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+            if admission is not None:
+                admission.close()
+        if prefetcher is not None:
+            logger.debug(f"Peak prefetched bytes: {prefetcher.budget.peak}")
+        if admission is not None:
+            logger.debug(f"Peak estimated decode bytes: {admission.budget.peak}")
+
 
 def compute_hashes(
     img_dir: Path,
     num_processes: int,
+    quality: bool = False,
+    capture: bool = False,
+    prefetch: bool = False,
+    memory_budget: int | None = None,
+    backend: Backend | None = None,
+    largest_first: bool = False,
+    cache: "HashCache | None" = None,
+    profile: HashProfile | None = None,
+    fast: bool = False,
+    dihedral: bool = False,
+    confirm: bool = False,
+    on_result: Callable[[ImageHash, HashProgress], None] | None = None,
+    cancel: CancellationToken | None = None,
+    read_limit: Throttle | None = None,
+    niceness: int = 0,
+    io_class: IOClass | None = None,
 ) -> list[ImageHash]:
     """Scan a directory and compute perceptual hashes using the provided hasher.
 
     Args:
         img_dir: Directory containing images to process
         num_processes: Number of worker processes to spawn
-        hasher: Hasher instance (defaults to Hasher which auto-routes)
+        quality: Also collect ImageQuality metrics during the hashing decode
+        capture: Also read EXIF CaptureInfo from each image header
+        prefetch: Overlap file reads with decoding using a prefetch thread pool
+        memory_budget: Keep the estimated memory of concurrent decodes under
+                       this many bytes. None disables admission control.
+        backend: "process" or "thread" worker pool; None picks threads on
+                 free-threaded Python and processes otherwise
+        largest_first: Schedule the largest files first for balanced workers;
+                       the returned list keeps directory-scan order either way
+        cache: Reuse hashes of files whose contents are already cached, under
+               any name or location, and cache the newly computed ones
+        profile: Filled with a per-stage time breakdown of the hash workers
+                 and, on the process backend, their merged cProfile stats
+        fast: Hash EXIF thumbnails or reduced-scale decodes instead of full
+              decodes
+        dihedral: Also record hashes of every rotation and mirror image
+        confirm: Also compute a 256-bit confirmation hash of every image
+        on_result: Called with every result as soon as it is available,
+                   cached ones first, together with the progress of the run;
+                   e.g. to checkpoint results or report throughput
+        cancel: Stop hashing once this token is cancelled, terminating the
+                workers, and return the results finished so far
+        read_limit: Keep file reads within its files/s and MB/s limits; see
+                    iter_hashes
+        niceness: Amount to add to the CPU nice value (0-19) of the workers
+        io_class: I/O scheduling class of the workers; None leaves it unchanged
 
     Returns:
-        List of ImageHash objects
+        List of ImageHash objects in directory-scan order; when cancelled,
+        only those of the images finished before cancellation
+
+    Raises:
+        ValueError: If cache holds hashes computed with other options
     """
+    algorithm = hash_algorithm(fast, dihedral, confirm)
+    if cache is not None and cache.algorithm != algorithm:
+        raise ValueError(f"Cache holds {cache.algorithm} hashes, not {algorithm}")
     logger.info(f"Scanning directory for images: {img_dir}")
     paths = find_image_files(img_dir)
 
@@ -60,10 +536,56 @@ def compute_hashes(
         return []
 
     logger.info(f"Found {len(paths)} image files")
-    logger.info(f"Computing hashes using {num_processes} processes")
+    start = time.perf_counter()
+    progress = HashProgress(total=len(paths))
+    results: dict[Path, ImageHash] = {}
+    pending = paths
+    if cache is not None:
+        results, pending = cache.lookup(paths, quality=quality, capture=capture)
+        logger.info(f"Reusing {len(results)} cached hashes")
+        progress.cached = len(results)
+    if on_result is not None:
+        for result in results.values():
+            progress.done += 1
+            progress.elapsed = time.perf_counter() - start
+            on_result(result, progress)
+    progress.done = len(results)
+
+    logger.info(
+        f"Computing hashes using {num_processes} {backend or default_backend()} workers"
+    )
+    for result in iter_hashes(
+        pending,
+        num_processes,
+        quality=quality,
+        capture=capture,
+        prefetch=prefetch,
+        memory_budget=memory_budget,
+        backend=backend,
+        largest_first=largest_first,
+        digest=cache is not None,
+        profile=profile,
+        fast=fast,
+        dihedral=dihedral,
+        confirm=confirm,
+        cancel=cancel,
+        read_limit=read_limit,
+        niceness=niceness,
+        io_class=io_class,
+    ):
+        if cache is not None:
+            cache.put(result)
+        results[result.path] = result
+        if on_result is not None:
+            progress.done += 1
+            progress.elapsed = time.perf_counter() - start
+            on_result(result, progress)
+    if cache is not None:
+        cache.commit()
+    if cancel is not None and cancel.cancelled:
+        logger.warning(f"Cancelled after {len(results)} of {len(paths)} images")
 
-    with multiprocessing.Pool(processes=num_processes) as pool:
-        hashes = pool.map(Hasher(), paths)
+    hashes = [results[path] for path in paths if path in results]
 
     logger.info(f"Successfully computed {len(hashes)} hashes")
     return hashes
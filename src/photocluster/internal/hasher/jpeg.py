@@ -1,18 +1,173 @@
 """JPEG hasher implementation for PhotoCluster."""
 
+import io
 import logging
 from pathlib import Path
 
-import imagehash
 import numpy as np
 from PIL import Image
 
+from ..exif import read_capture_info, read_orientation, read_thumbnail
 from ..models.image import ImageHash
+from ..quality import measure_quality
 from .base import AbstractHasher
+from .profiling import StageClock
 
 logger = logging.getLogger(__name__)
 
 JPEG_EXTENSIONS = [".jpg", ".jpeg"]
+HASH_SIZE = 8  # the hash is HASH_SIZE x HASH_SIZE bits
+HIGHFREQ_FACTOR = 4  # the DCT input is HASH_SIZE * HIGHFREQ_FACTOR pixels wide
+# Side of the longer hash that confirms matches between the 64-bit hashes; it
+# sees detail the 8x8 frequencies miss, e.g. the text layout of documents.
+CONFIRM_HASH_SIZE = 16
+# Fast mode decodes at a reduced scale whose shorter side is at least this; it
+# matches the size sharpness is measured at.
+FAST_DECODE_SIZE = 512
+THUMBNAIL_MIN_SIDE = 64
+# Relative aspect ratio difference above which a thumbnail is assumed to be
+# padded or cropped, e.g. a 4:3 preview of a 3:2 photo with black bars.
+THUMBNAIL_ASPECT_TOLERANCE = 0.02
+
+
+# The 8 rotations and mirror images of a picture, each as (transpose, flip
+# rows, flip columns) applied in that order. Index 0 is the identity.
+DIHEDRAL_TRANSFORMS = tuple(
+    (transpose, flip_rows, flip_cols)
+    for transpose in (False, True)
+    for flip_rows in (False, True)
+    for flip_cols in (False, True)
+)
+# The transform that displays an image upright, by EXIF orientation value.
+ORIENTATION_TRANSFORMS = {
+    1: (False, False, False),
+    2: (False, False, True),  # mirrored
+    3: (False, True, True),  # rotated 180
+    4: (False, True, False),  # mirrored vertically
+    5: (True, False, False),  # transposed
+    6: (True, False, True),  # rotated 90 clockwise to display
+    7: (True, True, True),  # transversed
+    8: (True, True, False),  # rotated 90 counter-clockwise to display
+}
+# Reversing a DCT-II input negates its odd frequencies.
+_REVERSAL_SIGNS = (-1.0) ** np.arange(HASH_SIZE)
+
+
+def _low_frequencies(
+    gray: Image.Image, clock: StageClock | None, hash_size: int = HASH_SIZE
+) -> np.ndarray:
+    """Return the hash_size x hash_size lowest DCT frequencies phash uses."""
+    import scipy.fftpack  # heavy; only needed once a worker hashes
+
+    side = hash_size * HIGHFREQ_FACTOR
+    pixels = np.asarray(gray.resize((side, side), Image.Resampling.LANCZOS))
+    if clock is not None:
+        clock.lap("resize")
+    dct = scipy.fftpack.dct(scipy.fftpack.dct(pixels, axis=0), axis=1)
+    return dct[:hash_size, :hash_size]
+
+
+def _median_bits(low: np.ndarray) -> np.ndarray:
+    return (low > np.median(low)).flatten().astype(np.uint8)
+
+
+def transform_dct(
+    low: np.ndarray, transpose: bool, flip_rows: bool, flip_cols: bool
+) -> np.ndarray:
+    """Return the DCT of the transformed image, computed from the DCT itself.
+
+    Transposing the image transposes its DCT, and flipping an axis negates
+    the odd frequencies along it, so no pixels need to be touched.
+    """
+    if transpose:
+        low = low.T
+    if flip_rows:
+        low = low * _REVERSAL_SIGNS[:, None]
+    if flip_cols:
+        low = low * _REVERSAL_SIGNS[None, :]
+    return low
+
+
+def phash_bits(
+    gray: Image.Image, clock: StageClock | None = None, hash_size: int = HASH_SIZE
+) -> np.ndarray:
+    """Compute the perceptual hash of a grayscale image as a flat bit vector.
+
+    Matches ``imagehash.phash`` bit for bit, with the resize and DCT steps
+    separated so a StageClock can time them.
+
+    Args:
+        gray: Decoded grayscale ("L") image
+        clock: Laps "resize" and "dct" when given
+        hash_size: Side of the hash; the DCT input is hash_size *
+                   HIGHFREQ_FACTOR pixels wide
+
+    Returns:
+        uint8 array of hash_size * hash_size bits
+    """
+    bits = _median_bits(_low_frequencies(gray, clock, hash_size))
+    if clock is not None:
+        clock.lap("dct")
+    return bits
+
+
+def phash_variants(
+    gray: Image.Image, orientation: int = 1, clock: StageClock | None = None
+) -> np.ndarray:
+    """Compute the perceptual hashes of all 8 rotations and mirror images.
+
+    The image is first turned upright according to its EXIF orientation.
+    All variants come from one resize and one DCT; see transform_dct.
+
+    Args:
+        gray: Decoded grayscale ("L") image, as stored in the file
+        orientation: EXIF orientation value of the image
+        clock: Laps "resize" and "dct" when given
+
+    Returns:
+        uint8 array of shape (len(DIHEDRAL_TRANSFORMS), HASH_SIZE * HASH_SIZE);
+        row 0 is the hash of the upright image
+    """
+    low = _low_frequencies(gray, clock)
+    upright = transform_dct(low, *ORIENTATION_TRANSFORMS.get(orientation, (False,) * 3))
+    variants = np.stack(
+        [
+            _median_bits(transform_dct(upright, *transform))
+            for transform in DIHEDRAL_TRANSFORMS
+        ]
+    )
+    if clock is not None:
+        clock.lap("dct")
+    return variants
+
+
+def thumbnail_gray(img: Image.Image) -> Image.Image | None:
+    """Decode an image's EXIF thumbnail if it shows the whole picture.
+
+    Args:
+        img: Opened main image
+
+    Returns:
+        Grayscale thumbnail, or None if there is none, it is too small, or
+        its aspect ratio differs from the main image's
+    """
+    data = read_thumbnail(img)
+    if data is None:
+        return None
+    try:
+        thumbnail = Image.open(io.BytesIO(data))
+        thumbnail.load()
+    except Exception as e:
+        logger.debug(f"Unreadable EXIF thumbnail: {e}")
+        return None
+    width, height = img.size
+    thumb_width, thumb_height = thumbnail.size
+    if min(thumb_width, thumb_height) < THUMBNAIL_MIN_SIDE:
+        return None
+    aspect = width / height
+    if abs(thumb_width / thumb_height - aspect) > THUMBNAIL_ASPECT_TOLERANCE * aspect:
+        return None
+    return thumbnail.convert("RGB").convert("L")
 
 
 class JPEGHasher(AbstractHasher):
@@ -31,13 +186,41 @@ class JPEGHasher(AbstractHasher):
         return path.suffix.lower() in JPEG_EXTENSIONS
 
     @staticmethod
-    def hash(path: Path) -> ImageHash:
+    def hash(
+        path: Path,
+        quality: bool = False,
+        capture: bool = False,
+        data: bytes | None = None,
+        clock: StageClock | None = None,
+        fast: bool = False,
+        dihedral: bool = False,
+        confirm: bool = False,
+    ) -> ImageHash:
         """Load a JPEG image from a path and compute its perceptual hash as bits.
 
-        Uses phash (perceptual hash) as the hash method.
+        Uses phash (perceptual hash) as the hash method. The grayscale image
+        phash works on is shared with the quality metrics, so requesting them
+        does not add another decode.
+
+        In fast mode, the EXIF thumbnail is hashed when it shows the whole
+        picture, and otherwise the image is decoded at a reduced scale (the
+        JPEG decoder skips most of the work) straight to grayscale. Quality
+        metrics need the pixels of the image itself, so they always use the
+        reduced decode.
 
         Args:
             path: Path to the image file
+            quality: Also collect ImageQuality metrics from the same decode
+            capture: Also read CaptureInfo from the EXIF header
+            data: File contents already read into memory; read from path if None
+            clock: Laps each step of the work for profiling when given
+            fast: Hash the EXIF thumbnail or a reduced-scale decode
+            dihedral: Turn the image upright using its EXIF orientation and
+                      also record the hashes of its 8 rotations and mirror
+                      images, so clustering can match transformed copies
+            confirm: Also compute a CONFIRM_HASH_SIZE x CONFIRM_HASH_SIZE phash
+                     of the same grayscale image, which clustering can use
+                     to confirm matches between the shorter hashes
 
         Returns:
             ImageHash object containing the hash and path
@@ -46,10 +229,47 @@ class JPEGHasher(AbstractHasher):
             IOError: If the image cannot be opened or processed
         """
         try:
-            img = Image.open(path).convert("RGB")
-            hash_bits = imagehash.phash(img).hash.flatten().astype(np.uint8)
+            clock = clock or StageClock()
+            img = Image.open(path if data is None else io.BytesIO(data))
+            size = img.size
+            clock.lap("open")
+            capture_info = None
+            if capture:
+                capture_info = read_capture_info(img)
+                clock.lap("capture")
+            gray = None
+            if fast and not quality:
+                gray = thumbnail_gray(img)
+                clock.lap("thumbnail")
+            if gray is None:
+                if fast:
+                    img.draft("L", (FAST_DECODE_SIZE, FAST_DECODE_SIZE))
+                img.load()
+                clock.lap("decode")
+                gray = img.convert("L") if fast else img.convert("RGB").convert("L")
+                clock.lap("convert")
+            variants = None
+            if dihedral:
+                variants = phash_variants(gray, read_orientation(img), clock)
+                hash_bits = variants[0]
+            else:
+                hash_bits = phash_bits(gray, clock)
+            confirm_bits = (
+                phash_bits(gray, clock, CONFIRM_HASH_SIZE) if confirm else None
+            )
             logger.debug(f"Computed hash for {path.name}")
-            return ImageHash(path=path, hash=hash_bits)
+            metrics = None
+            if quality:
+                metrics = measure_quality(path, size, gray)
+                clock.lap("quality")
+            return ImageHash(
+                path=path,
+                hash=hash_bits,
+                quality=metrics,
+                capture=capture_info,
+                variants=variants,
+                confirm_hash=confirm_bits,
+            )
         except Exception as e:
             logger.error(f"Failed to hash {path}: {e}")
             raise
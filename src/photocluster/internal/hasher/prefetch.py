@@ -0,0 +1,109 @@
+"""Threaded file prefetching that feeds in-memory buffers to hash workers."""
+
+import logging
+import os
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from ..util.processing import BudgetClosed, InFlightBudget
+from ..util.throttle import Throttle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_THREADS = 8
+DEFAULT_PREFETCH_BYTES = 256 * 1024 * 1024
+
+
+def read_file(path: Path) -> bytes:
+    """Read a whole file, hinting the kernel to read ahead aggressively.
+
+    Args:
+        path: File to read
+
+    Returns:
+        File contents
+    """
+    with path.open("rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            fd = f.fileno()
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        return f.read()
+
+
+class Prefetcher:
+    """Reads files on a thread pool ahead of the hash workers.
+
+    Iterating yields ``(path, data)`` pairs in input order while up to
+    ``num_threads`` reads run in the background. The total size of buffers that
+    have been read but not yet released by the consumer is kept under
+    ``max_bytes``; call ``release(path)`` once a file's hash has come back.
+    With a throttle, each read first waits for its files/s and MB/s limits.
+    An initializer runs once on each read thread as it starts.
+    """
+
+    def __init__(
+        self,
+        paths: list[Path],
+        max_bytes: int = DEFAULT_PREFETCH_BYTES,
+        num_threads: int = DEFAULT_PREFETCH_THREADS,
+        throttle: Throttle | None = None,
+        initializer: Callable[[], None] | None = None,
+    ) -> None:
+        self.paths = paths
+        self.num_threads = num_threads
+        self.throttle = throttle
+        self.initializer = initializer
+        self.budget = InFlightBudget(max_bytes)
+        self._sizes: dict[Path, int] = {}
+
+    def _size(self, path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            # Let the read itself raise the error for this path.
+            return 0
+
+    def _read(self, path: Path, size: int) -> bytes:
+        if self.throttle is not None:
+            self.throttle.acquire(size)
+        return read_file(path)
+
+    def __iter__(self) -> Iterator[tuple[Path, bytes]]:
+        pending: deque[tuple[Path, Future[bytes]]] = deque()
+        with ThreadPoolExecutor(
+            max_workers=self.num_threads,
+            thread_name_prefix="prefetch",
+            initializer=self.initializer,
+        ) as executor:
+            try:
+                for path in self.paths:
+                    size = self._size(path)
+                    # Hand finished buffers downstream instead of waiting on the
+                    # budget while they sit here unreleased.
+                    while not self.budget.try_acquire(size):
+                        if not pending:
+                            self.budget.acquire(size)
+                            break
+                        head, future = pending.popleft()
+                        yield head, future.result()
+                    self._sizes[path] = size
+                    pending.append((path, executor.submit(self._read, path, size)))
+                while pending:
+                    head, future = pending.popleft()
+                    yield head, future.result()
+            except BudgetClosed:
+                logger.debug("Prefetcher closed before all files were read")
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def release(self, path: Path) -> None:
+        """Return the budget held by a file whose hash has been received."""
+        self.budget.release(self._sizes.pop(path, 0))
+
+    def close(self) -> None:
+        """Stop prefetching; unblocks an iterator waiting on the byte budget."""
+        self.budget.close()
@@ -0,0 +1,139 @@
+"""Opt-in profiling of hash workers: stage timings and merged cProfile stats."""
+
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Stages in pipeline order. "queue wait" is measured in the receiving process:
+# from the worker returning a result until the consumer gets it, which adds
+# pickling and the pipe to waiting behind earlier results in an ordered imap
+# and to the consumer's own work on them.
+HASH_STAGES = (
+    "read",
+    "open",
+    "capture",
+    "thumbnail",
+    "decode",
+    "convert",
+    "resize",
+    "dct",
+    "quality",
+    "digest",
+    "queue wait",
+)
+TOP_FUNCTIONS = 15
+
+
+class StageClock:
+    """Attributes the time between successive laps to named stages."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Charge the time since the previous lap to ``stage``."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+@dataclass
+class TaskProfile:
+    """Profile of one hash task, small enough to send back from a worker."""
+
+    stages: dict[str, float]
+    finished: float  # time.time() when the worker returned the result
+    stats: bytes | None = None  # marshalled cProfile stats, if collected
+
+
+class _StatsSnapshot:
+    """Adapter that lets pstats.Stats.add() merge unmarshalled stats."""
+
+    def __init__(self, stats: dict) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def profile_call[T](
+    clock: StageClock, functions: bool, call: Callable[[], T]
+) -> tuple[T, TaskProfile]:
+    """Run ``call`` and return its result with a TaskProfile.
+
+    Args:
+        clock: StageClock that ``call`` laps as it goes
+        functions: Also run cProfile around the call
+        call: Work to profile
+    """
+    profiler = cProfile.Profile() if functions else None
+    result = call() if profiler is None else profiler.runcall(call)
+    stats = None
+    if profiler is not None:
+        profiler.create_stats()
+        stats = marshal.dumps(profiler.stats)
+    return result, TaskProfile(stages=clock.stages, finished=time.time(), stats=stats)
+
+
+@dataclass
+class HashProfile:
+    """Per-stage totals and merged function stats over all profiled tasks."""
+
+    stages: dict[str, float] = field(default_factory=dict)
+    tasks: int = 0
+    stats: pstats.Stats | None = None
+
+    def record(self, profile: TaskProfile) -> None:
+        """Add one task's profile, timing its wait to reach this process."""
+        self.tasks += 1
+        stages = {
+            **profile.stages,
+            "queue wait": max(0.0, time.time() - profile.finished),
+        }
+        for stage, seconds in stages.items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if profile.stats is not None:
+            snapshot = _StatsSnapshot(marshal.loads(profile.stats))
+            if self.stats is None:
+                self.stats = pstats.Stats(snapshot)  # ty: ignore[invalid-argument-type]
+            else:
+                self.stats.add(snapshot)  # ty: ignore[invalid-argument-type]
+
+    def summary(self, top: int = TOP_FUNCTIONS) -> str:
+        """Render the stage breakdown and the functions with most own time."""
+        total = sum(self.stages.values())
+        order = [s for s in HASH_STAGES if s in self.stages]
+        order += sorted(set(self.stages) - set(HASH_STAGES))
+        tasks = max(self.tasks, 1)
+        lines = [f"{'stage':<10}{'total':>10}{'per image':>12}{'share':>8}"]
+        for stage in order:
+            seconds = self.stages[stage]
+            lines.append(
+                f"{stage:<10}{seconds:>9.2f}s{seconds / tasks * 1000:>10.2f}ms"
+                f"{seconds / total if total > 0 else 0.0:>8.0%}"
+            )
+        if self.stats is not None:
+            stream = io.StringIO()
+            report = pstats.Stats(stream=stream).add(self.stats)
+            report.sort_stats("tottime").print_stats(top)
+            lines.append(stream.getvalue().rstrip())
+        return "\n".join(lines)
+
+    def dump(self, path: Path) -> None:
+        """Write the merged stats for pstats, snakeviz and similar tools.
+
+        Raises:
+            ValueError: If no function stats were collected
+        """
+        if self.stats is None:
+            raise ValueError(
+                "No function stats were collected; cProfile only runs on the "
+                "process backend"
+            )
+        self.stats.dump_stats(path)
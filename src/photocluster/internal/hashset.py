@@ -0,0 +1,260 @@
+"""Compact binary hash sets that hashing and clustering jobs can exchange."""
+
+import logging
+import struct
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from .checkpoint import load_hashes
+from .hamming import pack_bits, pack_variants
+from .models.image import ImageHash
+
+logger = logging.getLogger(__name__)
+
+HASH_SET_MAGIC = b"PCHS"
+HASH_SET_FORMAT_VERSION = 1
+# magic, version, algorithm length, count, path bytes, nbits, variants per
+# image, confirmation hash bits, padding to a multiple of 8 bytes
+_HEADER = struct.Struct("<4sHHQQIII4x")
+_ALIGN = 8
+
+
+def _padded(length: int) -> int:
+    return -(-length // _ALIGN) * _ALIGN
+
+
+def _words(nbits: int) -> int:
+    return -(-nbits // 64)
+
+
+def _unpack(packed: np.ndarray, nbits: int) -> np.ndarray:
+    """Turn packed words back into rows of nbits 0/1 values."""
+    as_bytes = np.ascontiguousarray(packed.astype(">u8")).view(np.uint8)
+    return np.unpackbits(as_bytes.reshape(len(packed), packed.shape[1] * 8), axis=1)[
+        :, :nbits
+    ]
+
+
+@dataclass
+class HashSet:
+    """Hashes of many images in a flat layout that loads without parsing.
+
+    The file is a fixed header naming the hash algorithm (see
+    ``hash_algorithm``), then 8-byte aligned little-endian sections: packed
+    hashes, packed rotation variants and confirmation hashes when present,
+    file sizes, modification times, path offsets and the UTF-8 path blob.
+    ``load`` memory-maps the sections, so opening even a very large set only
+    reads the header; pages are read as the hashes are used.
+    """
+
+    algorithm: str
+    nbits: int
+    packed: np.ndarray  # hashes as returned by pack_bits, shape (n, words)
+    sizes: np.ndarray  # file size in bytes when hashed
+    mtime_ns: np.ndarray  # file modification time when hashed
+    path_offsets: np.ndarray  # path i is path_blob[offsets[i]:offsets[i + 1]]
+    path_blob: np.ndarray  # UTF-8 bytes of every path, concatenated
+    variants: np.ndarray | None = None  # as returned by pack_variants
+    confirm_bits: int = 0
+    confirm: np.ndarray | None = None  # packed confirmation hashes
+
+    @classmethod
+    def from_hashes(cls, hash_data: list[ImageHash], algorithm: str) -> Self:
+        """Pack hashes, recording each file's current size and mtime.
+
+        Args:
+            hash_data: Hashes computed with the same options
+            algorithm: Name of those options, as returned by hash_algorithm
+
+        Raises:
+            ValueError: If some hashes carry variants or confirmation hashes
+                        and others do not
+        """
+        nbits = len(hash_data[0].hash) if hash_data else 0
+        variant_rows = [r.variants for r in hash_data if r.variants is not None]
+        confirm_rows = [r.confirm_hash for r in hash_data if r.confirm_hash is not None]
+        if len(variant_rows) not in (0, len(hash_data)) or len(confirm_rows) not in (
+            0,
+            len(hash_data),
+        ):
+            raise ValueError("Hashes in a set must all be computed the same way")
+        variants = pack_variants(np.stack(variant_rows)) if variant_rows else None
+        confirm = pack_bits(np.stack(confirm_rows)) if confirm_rows else None
+        confirm_bits = len(confirm_rows[0]) if confirm_rows else 0
+
+        encoded = [str(r.path).encode("utf-8") for r in hash_data]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        stats = [r.path.stat() for r in hash_data]
+        return cls(
+            algorithm=algorithm,
+            nbits=nbits,
+            packed=(
+                pack_bits(np.stack([r.hash for r in hash_data]))
+                if hash_data
+                else np.empty((0, 1), dtype=np.uint64)
+            ),
+            sizes=np.array([s.st_size for s in stats], dtype=np.int64),
+            mtime_ns=np.array([s.st_mtime_ns for s in stats], dtype=np.int64),
+            path_offsets=offsets,
+            path_blob=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            variants=variants,
+            confirm_bits=confirm_bits,
+            confirm=confirm,
+        )
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def path(self, i: int) -> Path:
+        """Return the path of the i-th image without decoding the others."""
+        start, stop = self.path_offsets[i], self.path_offsets[i + 1]
+        return Path(self.path_blob[start:stop].tobytes().decode("utf-8"))
+
+    @property
+    def paths(self) -> list[Path]:
+        """Paths of every image, in set order."""
+        blob = self.path_blob.tobytes()
+        offsets = self.path_offsets.tolist()
+        return [
+            Path(blob[start:stop].decode("utf-8")) for start, stop in pairwise(offsets)
+        ]
+
+    def hashes(self) -> list[ImageHash]:
+        """Unpack the set into ImageHash objects, e.g. for cluster_hashes."""
+        bits = _unpack(self.packed, self.nbits)
+        variants = (
+            np.stack([_unpack(v, self.nbits) for v in self.variants], axis=1)
+            if self.variants is not None
+            else None
+        )
+        confirm = (
+            _unpack(self.confirm, self.confirm_bits)
+            if self.confirm is not None
+            else None
+        )
+        return [
+            ImageHash(
+                path=path,
+                hash=bits[i],
+                variants=variants[i] if variants is not None else None,
+                confirm_hash=confirm[i] if confirm is not None else None,
+            )
+            for i, path in enumerate(self.paths)
+        ]
+
+    def save(self, path: Path) -> None:
+        """Write the set in the binary hash set format."""
+        algorithm = self.algorithm.encode("utf-8")
+        header = _HEADER.pack(
+            HASH_SET_MAGIC,
+            HASH_SET_FORMAT_VERSION,
+            len(algorithm),
+            len(self),
+            len(self.path_blob),
+            self.nbits,
+            0 if self.variants is None else len(self.variants),
+            self.confirm_bits,
+        )
+        sections = [self.packed]
+        if self.variants is not None:
+            sections.append(self.variants)
+        if self.confirm is not None:
+            sections.append(self.confirm)
+        with path.open("wb") as f:
+            f.write(header)
+            f.write(algorithm.ljust(_padded(len(algorithm)), b"\0"))
+            for words in sections:
+                f.write(np.ascontiguousarray(words, dtype="<u8").tobytes())
+            for column in (self.sizes, self.mtime_ns, self.path_offsets):
+                f.write(np.ascontiguousarray(column, dtype="<i8").tobytes())
+            f.write(self.path_blob.tobytes())
+        logger.info(f"Wrote {len(self)} hashes to {path}")
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> Self:
+        """Open a set written by save.
+
+        Args:
+            path: Hash set file
+            mmap: Map the file instead of reading it into memory
+
+        Raises:
+            ValueError: If the file is not a hash set or was written by an
+                        incompatible version
+        """
+        if mmap:
+            data = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            data = np.fromfile(path, dtype=np.uint8)
+        if len(data) < _HEADER.size:
+            raise ValueError(f"Not a hash set file: {path}")
+        (
+            magic,
+            version,
+            algorithm_length,
+            count,
+            path_bytes,
+            nbits,
+            num_variants,
+            confirm_bits,
+        ) = _HEADER.unpack(data[: _HEADER.size].tobytes())
+        if magic != HASH_SET_MAGIC:
+            raise ValueError(f"Not a hash set file: {path}")
+        if version != HASH_SET_FORMAT_VERSION:
+            raise ValueError(f"Unsupported hash set version: {version}")
+        offset = _HEADER.size
+        algorithm = data[offset : offset + algorithm_length].tobytes().decode("utf-8")
+        offset += _padded(algorithm_length)
+
+        def section(dtype: str, shape: tuple[int, ...]) -> np.ndarray:
+            nonlocal offset
+            size = int(np.prod(shape)) * 8
+            if offset + size > len(data):
+                raise ValueError(f"Truncated hash set file: {path}")
+            array = data[offset : offset + size].view(dtype).reshape(shape)
+            offset += size
+            return array
+
+        words = _words(nbits) if count else 1
+        packed = section("<u8", (count, words))
+        variants = (
+            section("<u8", (num_variants, count, words)) if num_variants else None
+        )
+        confirm = (
+            section("<u8", (count, _words(confirm_bits))) if confirm_bits else None
+        )
+        sizes = section("<i8", (count,))
+        mtime_ns = section("<i8", (count,))
+        path_offsets = section("<i8", (count + 1,))
+        if offset + path_bytes > len(data):
+            raise ValueError(f"Truncated hash set file: {path}")
+        return cls(
+            algorithm=algorithm,
+            nbits=nbits,
+            packed=packed,
+            sizes=sizes,
+            mtime_ns=mtime_ns,
+            path_offsets=path_offsets,
+            path_blob=data[offset : offset + path_bytes],
+            variants=variants,
+            confirm_bits=confirm_bits,
+            confirm=confirm,
+        )
+
+
+def is_hash_set(path: Path) -> bool:
+    """Check whether a file starts with the hash set magic bytes."""
+    with path.open("rb") as f:
+        return f.read(len(HASH_SET_MAGIC)) == HASH_SET_MAGIC
+
+
+def read_hash_file(path: Path) -> list[ImageHash]:
+    """Load hashes from a binary hash set or a JSON-lines checkpoint."""
+    if is_hash_set(path):
+        return HashSet.load(path).hashes()
+    return load_hashes(path)
@@ -0,0 +1,224 @@
+"""Single-linkage merge tree over Hamming distances."""
+
+import logging
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from .graph import NeighborGraph
+from .hamming import eps_to_radius
+from .models.image import ClusteredImage, ImageHash
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Dendrogram:
+    """Single-linkage merge tree stored as the edges of a minimum spanning tree.
+
+    With ``min_samples=2`` every image that has a neighbor is a DBSCAN core
+    point, so flat DBSCAN at any eps equals cutting the single-linkage tree at
+    that height. The tree holds at most ``n - 1`` edges, sorted by distance, so
+    a cut only looks at a prefix of them.
+    """
+
+    paths: list[Path]
+    nbits: int
+    max_eps: float
+    rows: np.ndarray  # first image of each merge
+    cols: np.ndarray  # second image of each merge
+    distances: np.ndarray  # bit distance of each merge, ascending
+
+    @classmethod
+    def from_graph(cls, graph: NeighborGraph) -> Self:
+        """Reduce a neighbor graph to its minimum spanning forest.
+
+        Args:
+            graph: NeighborGraph holding every pair within max_eps
+
+        Returns:
+            Dendrogram over the graph's images, valid up to the graph's max_eps
+        """
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import minimum_spanning_tree
+
+        num_points = len(graph.paths)
+        # Sparse graphs treat zero weights as missing edges, so identical
+        # hashes would never merge; shift every weight up by one bit.
+        weights = coo_matrix(
+            (graph.distances + 1, (graph.rows, graph.cols)),
+            shape=(num_points, num_points),
+        )
+        tree = minimum_spanning_tree(weights.tocsr()).tocoo()
+        order = np.argsort(tree.data, kind="stable")
+        logger.info(
+            f"Built merge tree: {num_points} images, {len(order)} merges "
+            f"within eps={graph.max_eps}"
+        )
+        return cls(
+            paths=graph.paths,
+            nbits=graph.nbits,
+            max_eps=graph.max_eps,
+            rows=tree.row[order].astype(np.int64),
+            cols=tree.col[order].astype(np.int64),
+            distances=tree.data[order].astype(np.int64) - 1,
+        )
+
+    @classmethod
+    def build(cls, hash_data: list[ImageHash], max_eps: float) -> Self:
+        """Build the merge tree of hash_data up to max_eps.
+
+        Args:
+            hash_data: List of ImageHash objects
+            max_eps: Largest eps (proportion of differing bits) to support
+
+        Returns:
+            Dendrogram over hash_data
+        """
+        return cls.from_graph(NeighborGraph.build(hash_data, max_eps))
+
+    def labels(self, eps: float) -> np.ndarray:
+        """Cut the tree at eps.
+
+        Args:
+            eps: Cut height as proportion, at most max_eps
+
+        Returns:
+            Array of cluster labels aligned with paths, -1 for images without
+            a neighbor. Labels are numbered in order of each cluster's first
+            image, matching DBSCAN.
+
+        Raises:
+            ValueError: If eps exceeds the height the tree was built for
+        """
+        if eps > self.max_eps:
+            raise ValueError(
+                f"eps={eps} exceeds the tree's max_eps={self.max_eps}; rebuild it"
+            )
+        num_points = len(self.paths)
+        if not num_points:
+            return np.empty(0, dtype=np.int64)
+        count = int(
+            np.searchsorted(self.distances, eps_to_radius(eps, self.nbits), "right")
+        )
+
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        edges = coo_matrix(
+            (np.ones(count), (self.rows[:count], self.cols[:count])),
+            shape=(num_points, num_points),
+        )
+        _, components = connected_components(edges, directed=False)
+
+        labels = np.full(num_points, -1, dtype=np.int64)
+        clustered = np.bincount(components)[components] > 1
+        ids, first = np.unique(components[clustered], return_index=True)
+        renumber = np.empty(components.max() + 1, dtype=np.int64)
+        renumber[ids[np.argsort(first)]] = np.arange(len(ids))
+        labels[clustered] = renumber[components[clustered]]
+        return labels
+
+    def linkage(self) -> np.ndarray:
+        """Return the merge tree in SciPy linkage-matrix form.
+
+        Row ``i`` merges clusters ``Z[i, 0]`` and ``Z[i, 1]`` at height
+        ``Z[i, 2]`` (proportion of differing bits) into cluster ``n + i`` of
+        ``Z[i, 3]`` images. Images with no neighbor within max_eps are never
+        merged, so the matrix has fewer than ``n - 1`` rows for a forest.
+
+        Returns:
+            Array of shape (merges, 4)
+        """
+        num_points = len(self.paths)
+        parent = list(range(num_points))
+        cluster = list(range(num_points))  # linkage id of each root
+        size = [1] * num_points
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        merges = np.empty((len(self.distances), 4))
+        for step, (row, col, distance) in enumerate(
+            zip(
+                self.rows.tolist(),
+                self.cols.tolist(),
+                self.distances.tolist(),
+                strict=True,
+            )
+        ):
+            a, b = find(row), find(col)
+            merges[step] = (
+                min(cluster[a], cluster[b]),
+                max(cluster[a], cluster[b]),
+                distance / self.nbits,
+                size[a] + size[b],
+            )
+            parent[b] = a
+            cluster[a] = num_points + step
+            size[a] += size[b]
+        return merges
+
+    def cluster(
+        self, eps: float, subgroup_eps: float | None = None
+    ) -> list[ClusteredImage]:
+        """Cut the tree at eps and, optionally, again at subgroup_eps.
+
+        Args:
+            eps: Height of the top-level cut, at most max_eps
+            subgroup_eps: Height of the nested cut, at most eps. When set, each
+                image in a cluster gets a subcluster_id numbered within its
+                cluster, or -1 if it has no neighbor at that height.
+
+        Returns:
+            List of ClusteredImage objects aligned with paths
+        """
+        clustered = [
+            ClusteredImage(path=path, cluster_id=int(label))
+            for path, label in zip(self.paths, self.labels(eps), strict=True)
+        ]
+        if subgroup_eps is None:
+            return clustered
+        if subgroup_eps > eps:
+            raise ValueError(f"subgroup_eps={subgroup_eps} exceeds eps={eps}")
+
+        sublabels = self.labels(subgroup_eps).tolist()
+        numbering: dict[int, dict[int, int]] = {}
+        for image, sublabel in zip(clustered, sublabels, strict=True):
+            if image.cluster_id != -1 and sublabel != -1:
+                within = numbering.setdefault(image.cluster_id, {})
+                within.setdefault(sublabel, len(within))
+        return [
+            image
+            if image.cluster_id == -1
+            else replace(
+                image,
+                subcluster_id=numbering.get(image.cluster_id, {}).get(sublabel, -1),
+            )
+            for image, sublabel in zip(clustered, sublabels, strict=True)
+        ]
+
+
+def cluster_hierarchical(
+    hash_data: list[ImageHash], eps: float, subgroup_eps: float
+) -> list[ClusteredImage]:
+    """Cluster hashes at eps, nesting tighter subgroups at subgroup_eps.
+
+    Args:
+        hash_data: List of ImageHash objects
+        eps: Top-level DBSCAN epsilon as proportion (0.0-1.0)
+        subgroup_eps: Subgroup epsilon as proportion, at most eps
+
+    Returns:
+        List of ClusteredImage objects with cluster and subcluster IDs
+    """
+    logger.info(
+        f"Clustering {len(hash_data)} images hierarchically at eps={eps} "
+        f"and subgroup_eps={subgroup_eps}"
+    )
+    return Dendrogram.build(hash_data, eps).cluster(eps, subgroup_eps)
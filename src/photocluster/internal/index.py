@@ -0,0 +1,265 @@
+"""Persistent Hamming-space index for near-duplicate lookups."""
+
+import logging
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from .hamming import WORD_BITS, pack_bits
+from .models.image import ImageHash, IndexMatch
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+CHUNK_BITS = 16
+CHUNKS_PER_WORD = WORD_BITS // CHUNK_BITS
+DEFAULT_MAX_DISTANCE = 12  # sensitivity 0.2 of a 64-bit hash
+PATH_SEPARATOR = "\0"  # cannot occur in a file path
+# A probed candidate (random gather) costs about this many scanned entries.
+PROBE_COST = 4
+# Added hashes are scanned linearly until they number this many, or this
+# fraction of the tables, and are then merged into the sorted tables.
+MIN_DELTA = 1024
+DELTA_FRACTION = 0.125
+
+
+def _chunk_keys(packed: np.ndarray, num_chunks: int) -> np.ndarray:
+    """Split packed hashes into CHUNK_BITS-wide integer keys.
+
+    Returns:
+        Array of shape (num_chunks, n) with dtype int64
+    """
+    keys = np.empty((num_chunks, len(packed)), dtype=np.int64)
+    mask = np.uint64((1 << CHUNK_BITS) - 1)
+    for chunk in range(num_chunks):
+        word, position = divmod(chunk, CHUNKS_PER_WORD)
+        shift = np.uint64(WORD_BITS - CHUNK_BITS * (position + 1))
+        keys[chunk] = (packed[:, word] >> shift) & mask
+    return keys
+
+
+def _flip_masks(radius: int) -> np.ndarray:
+    """Return every CHUNK_BITS-wide mask with at most `radius` bits set."""
+    masks = np.arange(1 << CHUNK_BITS, dtype=np.int64)
+    return masks[np.bitwise_count(masks) <= radius]
+
+
+@dataclass
+class HashIndex:
+    """Multi-index hash table answering Hamming radius queries.
+
+    Each hash is split into ``CHUNK_BITS``-wide substrings and every substring
+    position gets a sorted table. By the pigeonhole principle, a hash within
+    ``r`` bits of the query differs in at most ``r // num_chunks`` bits in at
+    least one substring. A query therefore probes each table for all keys
+    within that smaller radius and verifies only the hashes it finds. Results
+    are exact: no match within max_distance is missed.
+
+    Hashes added after the tables were built form a delta that queries scan
+    linearly. Once it grows past MIN_DELTA or DELTA_FRACTION of the tables,
+    it is sorted and merged into them, so a stream of small additions costs
+    amortized O(log n) each rather than a full re-sort.
+    """
+
+    paths: list[str]  # strings rather than Path objects to keep large indexes small
+    nbits: int
+    packed: np.ndarray  # hashes as returned by pack_bits
+    orders: np.ndarray  # per chunk, indices of the tabled hashes by chunk key
+    keys: np.ndarray  # per chunk, the sorted chunk keys of the tabled hashes
+
+    @classmethod
+    def build(cls, hash_data: list[ImageHash]) -> Self:
+        """Build an index over computed hashes.
+
+        Args:
+            hash_data: List of ImageHash objects, e.g. from compute_hashes
+
+        Returns:
+            HashIndex over hash_data
+        """
+        index = cls(
+            paths=[],
+            nbits=0,
+            packed=np.empty((0, 0), dtype=np.uint64),
+            orders=np.empty((0, 0), dtype=np.int64),
+            keys=np.empty((0, 0), dtype=np.int64),
+        )
+        index.add(hash_data)
+        index.merge()
+        return index
+
+    @property
+    def num_chunks(self) -> int:
+        return math.ceil(self.nbits / CHUNK_BITS)
+
+    @property
+    def tabled(self) -> int:
+        """Number of leading hashes in the sorted tables; the rest are the delta."""
+        return self.keys.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, hash_data: list[ImageHash]) -> None:
+        """Add hashes to the index, merging them into its tables once enough are.
+
+        Raises:
+            ValueError: If the hashes differ in length from those indexed
+        """
+        if not hash_data:
+            return
+        nbits = len(hash_data[0].hash)
+        if any(len(result.hash) != nbits for result in hash_data) or (
+            self.paths and nbits != self.nbits
+        ):
+            raise ValueError("All hashes in an index must have the same length")
+
+        packed = pack_bits(np.stack([result.hash for result in hash_data]))
+        self.packed = np.concatenate([self.packed, packed]) if self.paths else packed
+        self.paths += [str(result.path) for result in hash_data]
+        self.nbits = nbits
+
+        if len(self) - self.tabled > max(MIN_DELTA, DELTA_FRACTION * self.tabled):
+            self.merge()
+
+    def merge(self) -> None:
+        """Sort the delta of added hashes into the tables."""
+        start = self.tabled
+        if start == len(self):
+            return
+        keys = _chunk_keys(self.packed[start:], self.num_chunks)
+        orders = np.argsort(keys, axis=1, kind="stable")
+        keys = np.take_along_axis(keys, orders, axis=1)
+        orders += start
+        if start:
+            # Inserting after equal keys keeps each table ordered by index.
+            where = [
+                np.searchsorted(self.keys[chunk], keys[chunk], "right")
+                for chunk in range(self.num_chunks)
+            ]
+            orders = np.stack(
+                [np.insert(self.orders[c], w, orders[c]) for c, w in enumerate(where)]
+            )
+            keys = np.stack(
+                [np.insert(self.keys[c], w, keys[c]) for c, w in enumerate(where)]
+            )
+        self.orders, self.keys = orders, keys
+        logger.info(f"Indexed {len(self.paths)} hashes in {self.num_chunks} tables")
+
+    def _candidates(self, packed: np.ndarray, max_distance: int) -> np.ndarray:
+        """Indices of hashes sharing a chunk within the pigeonhole radius.
+
+        An index appears once per chunk it matches in. Every hash in the
+        delta is a candidate.
+        """
+        masks = _flip_masks(max_distance // self.num_chunks)
+        expected = self.num_chunks * len(masks) * self.tabled / (1 << CHUNK_BITS)
+        if expected * PROBE_COST >= self.tabled:
+            # Probing would touch more entries than a linear scan.
+            return np.arange(len(self))
+
+        query_keys = _chunk_keys(packed, self.num_chunks)[:, 0]
+        found = [np.arange(self.tabled, len(self))]
+        for chunk, key in enumerate(query_keys.tolist()):
+            probes = np.bitwise_xor(masks, key)
+            lo = np.searchsorted(self.keys[chunk], probes, "left")
+            hi = np.searchsorted(self.keys[chunk], probes, "right")
+            lengths = hi - lo
+            total = int(lengths.sum())
+            if not total:
+                continue
+            # Expand each [lo, hi) range into the positions it covers.
+            starts = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+            found.append(self.orders[chunk][np.arange(total) + starts])
+        # May hold duplicates; they are cheaper to verify than to remove here.
+        return np.concatenate(found)
+
+    def query(
+        self,
+        path_or_hash: Path | str | np.ndarray | ImageHash,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        k: int | None = None,
+    ) -> list[IndexMatch]:
+        """Find indexed images within max_distance bits of an image or hash.
+
+        Args:
+            path_or_hash: Image file to hash, a hash vector, or an ImageHash
+            max_distance: Largest number of differing bits to report
+            k: Return at most this many matches, nearest first. None for all.
+
+        Returns:
+            IndexMatch objects sorted by distance, then by insertion order
+
+        Raises:
+            ValueError: If the query hash length differs from the indexed hashes
+        """
+        if isinstance(path_or_hash, ImageHash):
+            vector = path_or_hash.hash
+        elif isinstance(path_or_hash, np.ndarray):
+            vector = path_or_hash
+        else:
+            from .hasher.core import Hasher
+
+            vector = Hasher()(Path(path_or_hash)).hash
+
+        if not self.paths:
+            return []
+        if len(vector) != self.nbits:
+            raise ValueError(
+                f"Query hash has {len(vector)} bits, the index holds {self.nbits}"
+            )
+
+        packed = pack_bits(vector)
+        candidates = self._candidates(packed, max_distance)
+        distances = np.bitwise_count(
+            np.bitwise_xor(self.packed[candidates], packed)
+        ).sum(axis=1, dtype=np.int64)
+        keep = distances <= max_distance
+        candidates, first = np.unique(candidates[keep], return_index=True)
+        distances = distances[keep][first]
+        order = np.lexsort((candidates, distances))[:k]
+        return [
+            IndexMatch(path=Path(self.paths[i]), distance=d)
+            for i, d in zip(
+                candidates[order].tolist(), distances[order].tolist(), strict=True
+            )
+        ]
+
+    def save(self, path: Path) -> None:
+        """Merge the delta, then persist the index and its tables to an ``.npz``."""
+        self.merge()
+        blob = PATH_SEPARATOR.join(self.paths).encode("utf-8")
+        with path.open("wb") as f:
+            # Uncompressed: hashes do not compress and loading stays fast.
+            np.savez(
+                f,
+                version=np.array(INDEX_FORMAT_VERSION),
+                paths=np.frombuffer(blob, dtype=np.uint8),
+                nbits=np.array(self.nbits),
+                packed=self.packed,
+                orders=self.orders,
+                keys=self.keys,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Load an index written by save.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version
+        """
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported hash index version: {version}")
+            blob = data["paths"].tobytes().decode("utf-8")
+            return cls(
+                paths=blob.split(PATH_SEPARATOR) if blob else [],
+                nbits=int(data["nbits"]),
+                packed=data["packed"],
+                orders=data["orders"],
+                keys=data["keys"],
+            )
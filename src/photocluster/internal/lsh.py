@@ -0,0 +1,138 @@
+"""Bit-sampling locality-sensitive hashing for approximate clustering."""
+
+import logging
+import math
+
+import numpy as np
+
+from .hamming import pack_bits, pair_distances
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECALL = 0.99
+MAX_TABLES = 64
+LSH_SEED = 0
+
+
+def _collision_probability(nbits: int, distance: int, bits_per_table: int) -> float:
+    """Probability that two hashes `distance` bits apart share a bucket key."""
+    if bits_per_table > nbits - distance:
+        return 0.0
+    return math.comb(nbits - distance, bits_per_table) / math.comb(
+        nbits, bits_per_table
+    )
+
+
+def choose_parameters(
+    num_hashes: int, nbits: int, radius: int, recall: float
+) -> tuple[int, int]:
+    """Pick bits per table and table count for a target pair recall.
+
+    Each candidate ``bits_per_table`` is paired with the number of tables needed
+    for two hashes exactly ``radius`` bits apart to share at least one bucket
+    with probability ``recall``. The cheapest combination that reaches the
+    target wins, where cost counts bucket keys plus the candidate pairs expected
+    from unrelated hashes (assumed to differ in half of their bits).
+
+    Args:
+        num_hashes: Number of hashes to bucket
+        nbits: Number of bits per hash
+        radius: Maximum bit distance of pairs that should be found
+        recall: Target probability of finding a pair at distance ``radius``
+
+    Returns:
+        Tuple of (bits_per_table, num_tables)
+    """
+    best: tuple[bool, float, int, int, float] | None = None
+    for bits_per_table in range(1, nbits - radius + 1):
+        p_near = _collision_probability(nbits, radius, bits_per_table)
+        if p_near >= 1.0:
+            num_tables = 1
+        else:
+            num_tables = math.ceil(math.log1p(-recall) / math.log1p(-p_near))
+        num_tables = max(1, min(MAX_TABLES, num_tables))
+        achieved = 1.0 - (1.0 - p_near) ** num_tables
+        p_far = _collision_probability(nbits, nbits // 2, bits_per_table)
+        cost = num_tables * (num_hashes + num_hashes**2 * p_far / 2)
+        candidate = (achieved < recall, cost, bits_per_table, num_tables, achieved)
+        if best is None or candidate[:2] < best[:2]:
+            best = candidate
+
+    if best is None:
+        return 1, 1
+
+    missed, _, bits_per_table, num_tables, achieved = best
+    if missed:
+        logger.warning(
+            f"LSH limited to {MAX_TABLES} tables; expected pair recall "
+            f"{achieved:.3f} is below the requested {recall}"
+        )
+    return bits_per_table, num_tables
+
+
+def _bucket_pairs(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return every (i, j) index pair with i < j that shares a bucket key."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    group_end = np.repeat(starts + sizes, sizes)
+    positions = np.arange(len(keys))
+
+    rows: list[np.ndarray] = []
+    cols: list[np.ndarray] = []
+    for offset in range(1, int(sizes.max(initial=1))):
+        mask = positions + offset < group_end
+        if not mask.any():
+            break
+        left = order[positions[mask]]
+        right = order[positions[mask] + offset]
+        rows.append(np.minimum(left, right))
+        cols.append(np.maximum(left, right))
+
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def candidate_pairs(
+    vectors: np.ndarray, radius: int, recall: float = DEFAULT_RECALL
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find pairs of hashes within `radius` bits via bit-sampling LSH.
+
+    Each table samples a fixed subset of bit positions and buckets hashes by
+    those bits; only pairs colliding in at least one table are compared.
+
+    Args:
+        vectors: Array of shape (n, nbits) holding 0/1 hash bits
+        radius: Maximum bit distance of pairs to return
+        recall: Target probability of finding a pair at distance ``radius``.
+                Higher values use more tables and run slower.
+
+    Returns:
+        Tuple of (rows, cols, distances) for the verified pairs with rows < cols
+    """
+    num_hashes, nbits = vectors.shape
+    bits_per_table, num_tables = choose_parameters(num_hashes, nbits, radius, recall)
+    logger.info(
+        f"LSH using {num_tables} tables of {bits_per_table} bits (radius={radius})"
+    )
+
+    rng = np.random.default_rng(LSH_SEED)
+    weights = np.left_shift(np.uint64(1), np.arange(bits_per_table, dtype=np.uint64))
+    seen: list[np.ndarray] = []
+    for _ in range(num_tables):
+        sampled = rng.choice(nbits, size=bits_per_table, replace=False)
+        keys = (vectors[:, sampled].astype(np.uint64) * weights).sum(
+            axis=1, dtype=np.uint64
+        )
+        rows, cols = _bucket_pairs(keys)
+        seen.append(rows * num_hashes + cols)
+
+    pair_ids = np.unique(np.concatenate(seen)) if seen else np.empty(0, np.int64)
+    rows, cols = np.divmod(pair_ids, num_hashes)
+    distances = pair_distances(pack_bits(vectors), rows, cols)
+    keep = distances <= radius
+    logger.debug(f"LSH compared {len(pair_ids)} candidates, kept {keep.sum()}")
+    return rows[keep], cols[keep], distances[keep]
@@ -1,17 +1,44 @@
 """Image models for PhotoCluster."""
 
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 
 
+@dataclass
+class ImageQuality:
+    """Cheap quality metrics captured while decoding an image for hashing."""
+
+    width: int
+    height: int
+    file_size: int  # bytes on disk
+    sharpness: float  # variance of the Laplacian on a reduced grayscale image
+
+
+@dataclass
+class CaptureInfo:
+    """Capture metadata read from an image's EXIF header."""
+
+    timestamp: datetime | None  # DateTimeOriginal (with sub-seconds if present)
+    camera: str | None  # Body serial number, or make and model as a fallback
+
+
 @dataclass
 class ImageHash:
     """Represents a hash result for an image."""
 
     path: Path
     hash: np.ndarray  # binary vector (uint8 array)
+    quality: ImageQuality | None = None
+    capture: CaptureInfo | None = None
+    digest: bytes | None = None  # content digest of the file, if computed
+    # Hashes of the 8 rotations and mirror images, shape (8, nbits); row 0 is
+    # the hash itself. Clustering then uses the smallest distance between them.
+    variants: np.ndarray | None = None
+    # Longer hash from the same decode that confirms matches of the hash above
+    confirm_hash: np.ndarray | None = None
 
 
 @dataclass
@@ -20,3 +47,13 @@ class ClusteredImage:
 
     path: Path
     cluster_id: int  # Cluster ID (positive int) or -1 for unique/noise
+    rank: int | None = None  # Quality rank within the cluster, 0 = best
+    subcluster_id: int | None = None  # Subgroup within the cluster, -1 for none
+
+
+@dataclass
+class IndexMatch:
+    """An indexed image found near a query hash."""
+
+    path: Path
+    distance: int  # number of differing hash bits
@@ -1,8 +1,14 @@
 """Pydantic validation models for PhotoCluster."""
 
-from pydantic import BaseModel, Field
+from pathlib import Path
+from typing import Self
+
+from pydantic import BaseModel, Field, model_validator
 from pydantic.types import DirectoryPath
 
+from ..lsh import DEFAULT_RECALL
+from ..util.throttle import IOClass
+
 
 class PhotoclusterInputs(BaseModel):
     """Pydantic model for validating photocluster function inputs."""
@@ -16,3 +22,100 @@ class PhotoclusterInputs(BaseModel):
         ge=0.0,
         le=1.0,
     )
+    approximate: bool = Field(
+        False,
+        description="Use approximate LSH-bucketed clustering instead of exact DBSCAN.",
+    )
+    recall: float = Field(
+        DEFAULT_RECALL,
+        description="Target probability that approximate clustering finds a near-duplicate pair.",
+        gt=0.0,
+        lt=1.0,
+    )
+    rank_quality: bool = Field(
+        False,
+        description="Rank images within each cluster by sharpness, resolution and size.",
+    )
+    burst_window: float | None = Field(
+        None,
+        description="Seconds between shots that still count as one burst. None clusters globally.",
+        gt=0.0,
+    )
+    subgroup_sensitivity: float | None = Field(
+        None,
+        description="Stricter sensitivity for nested subgroups within each group. None disables nesting.",
+        ge=0.0,
+        le=1.0,
+    )
+    cache: Path | None = Field(
+        None,
+        description="SQLite file caching hashes by file content. None disables caching.",
+    )
+    fast: bool = Field(
+        False,
+        description="Hash EXIF thumbnails or reduced-scale decodes instead of full decodes.",
+    )
+    match_rotations: bool = Field(
+        False,
+        description="Cluster rotated and mirrored copies together.",
+    )
+    confirm_sensitivity: float | None = Field(
+        None,
+        description="Sensitivity for 256-bit hashes confirming each match. None disables confirmation.",
+        ge=0.0,
+        le=1.0,
+    )
+    per_folder: bool = Field(
+        False,
+        description="Cluster each folder on its own instead of the whole tree at once.",
+    )
+    num_processes: int | None = Field(
+        None,
+        description="Number of hash workers. None picks a default from the core count.",
+        ge=1,
+    )
+    niceness: int = Field(
+        0,
+        description="Amount added to the CPU nice value before workers start.",
+        ge=0,
+        le=19,
+    )
+    io_class: IOClass | None = Field(
+        None,
+        description="I/O scheduling class, like ionice. None leaves it unchanged.",
+    )
+    max_files_per_second: float | None = Field(
+        None,
+        description="Maximum files read or moved per second. None disables the limit.",
+        gt=0.0,
+    )
+    max_mb_per_second: float | None = Field(
+        None,
+        description="Maximum megabytes read or moved per second. None disables the limit.",
+        gt=0.0,
+    )
+
+    @model_validator(mode="after")
+    def check_subgroups(self) -> Self:
+        """Subgroups nest within groups and come from the exact merge tree."""
+        if self.subgroup_sensitivity is None:
+            return self
+        if self.subgroup_sensitivity > self.sensitivity:
+            raise ValueError("subgroup_sensitivity must not exceed sensitivity")
+        if self.approximate or self.burst_window is not None:
+            raise ValueError(
+                "subgroup_sensitivity cannot be combined with approximate or burst_window"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_confirmation(self) -> Self:
+        """Confirmation hashes have no rotation variants or merge tree."""
+        if self.confirm_sensitivity is None:
+            return self
+        if self.subgroup_sensitivity is not None or self.match_rotations:
+            raise ValueError(
+                "confirm_sensitivity cannot be combined with subgroup_sensitivity "
+                "or match_rotations"
+            )
+        return self
@@ -1,15 +1,25 @@
 """File utilities for PhotoCluster."""
 
+import hashlib
 import logging
+import re
 import shutil
+from collections import Counter
+from dataclasses import replace
 from itertools import chain
 from pathlib import Path
 
 from ..models.image import ClusteredImage
+from .throttle import Throttle
 
 logger = logging.getLogger(__name__)
 
 IMAGE_FILE_PATTERNS = ["*.jpg", "*.jpeg"]
+DIGEST_SIZE = 20  # bytes of BLAKE2b output
+PARTIAL_DIGEST_BYTES = 64 * 1024  # read from each end of a file for the prefilter
+UNIQUE_CLUSTER_ID = -1
+GROUP_DIR = re.compile(r"group_(\d+)")
+SUBGROUP_DIR = re.compile(r"subgroup_(\d+)")
 
 
 def find_image_files(directory: Path) -> list[Path]:
@@ -27,32 +37,324 @@ def find_image_files(directory: Path) -> list[Path]:
     return files
 
 
-def group_image_files(clustered_images: list[ClusteredImage], out_dir: Path) -> None:
+def is_image_file(path: Path) -> bool:
+    """Check if a path names a file find_image_files would return."""
+    return any(path.match(pattern) for pattern in IMAGE_FILE_PATTERNS)
+
+
+def image_folder(path: Path) -> Path:
+    """Return the folder an image belongs to when folders are clustered apart.
+
+    That is the image's parent directory, except that ``group_N`` and
+    ``group_N/subgroup_M`` directories made by an earlier run belong to the
+    folder they were made in.
+    """
+    folder = path.parent
+    if SUBGROUP_DIR.fullmatch(folder.name) and GROUP_DIR.fullmatch(folder.parent.name):
+        folder = folder.parent
+    if GROUP_DIR.fullmatch(folder.name):
+        folder = folder.parent
+    return folder
+
+
+def partition_by_folder(paths: list[Path]) -> dict[Path, list[int]]:
+    """Group the indices of paths by image_folder, in first-seen order."""
+    folders: dict[Path, list[int]] = {}
+    for i, path in enumerate(paths):
+        folders.setdefault(image_folder(path), []).append(i)
+    return folders
+
+
+def content_digest(data: bytes) -> bytes:
+    """Digest of a file's full contents, independent of its name or location."""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def partial_digest(path: Path) -> tuple[int, bytes]:
+    """Cheap fingerprint of a file from its size and its first and last bytes.
+
+    Files with different fingerprints cannot have the same contents, so this
+    rules out most cache misses without reading whole files.
+
+    Args:
+        path: File to fingerprint
+
+    Returns:
+        Tuple of (size in bytes, digest of the head and tail)
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        digest.update(f.read(PARTIAL_DIGEST_BYTES))
+        if size > PARTIAL_DIGEST_BYTES:
+            f.seek(max(PARTIAL_DIGEST_BYTES, size - PARTIAL_DIGEST_BYTES))
+            digest.update(f.read())
+    return size, digest.digest()
+
+
+def _previous_groups(path: Path, out_dir: Path) -> tuple[int | None, int | None]:
+    """Read the group and subgroup a file was placed in by an earlier run.
+
+    Returns:
+        Tuple of (group id, subgroup id); None where the file is not inside
+        a ``group_N`` or ``group_N/subgroup_M`` directory of out_dir
+    """
+    try:
+        parts = path.absolute().relative_to(out_dir.absolute()).parts[:-1]
+    except ValueError:
+        return None, None
+    group = GROUP_DIR.fullmatch(parts[0]) if parts else None
+    if group is None:
+        return None, None
+    subgroup = SUBGROUP_DIR.fullmatch(parts[1]) if len(parts) > 1 else None
+    return int(group[1]), int(subgroup[1]) if subgroup is not None else None
+
+
+def _existing_ids(directory: Path, pattern: re.Pattern[str]) -> set[int]:
+    """Ids of the subdirectories of directory whose names match pattern."""
+    if not directory.is_dir():
+        return set()
+    return {
+        int(match[1])
+        for entry in directory.iterdir()
+        if (match := pattern.fullmatch(entry.name)) and entry.is_dir()
+    }
+
+
+def _match_ids(
+    labels: list[int], previous: list[int | None], taken: set[int]
+) -> dict[int, int]:
+    """Map new cluster labels onto the ids their members had before.
+
+    Labels are matched one to one, greedily by the number of members they
+    share with a previous id. Unmatched labels keep their own value if it is
+    free, and otherwise get the smallest id that is neither matched nor in
+    ``taken``.
+
+    Args:
+        labels: New label of each member
+        previous: Id each member had before, or None
+        taken: Ids still present on disk that must not be handed out fresh
+
+    Returns:
+        Mapping from new label to stable id
+    """
+    overlap = Counter(
+        (label, old)
+        for label, old in zip(labels, previous, strict=True)
+        if old is not None
+    )
+    mapping: dict[int, int] = {}
+    used: set[int] = set()
+    for (label, old), _ in sorted(overlap.items(), key=lambda kv: (-kv[1], kv[0])):
+        if label not in mapping and old not in used:
+            mapping[label] = old
+            used.add(old)
+
+    unavailable = used | taken
+    fresh = 0
+    for label in sorted(set(labels) - set(mapping)):
+        if label not in unavailable:
+            mapping[label] = label
+        else:
+            while fresh in unavailable:
+                fresh += 1
+            mapping[label] = fresh
+        unavailable.add(mapping[label])
+    return mapping
+
+
+def stable_cluster_ids(
+    clustered_images: list[ClusteredImage], out_dir: Path
+) -> list[ClusteredImage]:
+    """Renumber clusters to match the group directories of an earlier run.
+
+    Cluster labels are arbitrary, so ``group_3`` of one run is unrelated to
+    ``group_3`` of the next. Each cluster takes over the ``group_N`` that
+    holds most of its members, and each subcluster the ``subgroup_M`` within
+    it, so files whose membership did not change stay where they are.
+
+    Args:
+        clustered_images: Clustering of files, some of which may already be
+            in ``group_N`` directories of out_dir
+        out_dir: Output directory root of the earlier run
+
+    Returns:
+        ClusteredImage objects with stable cluster and subcluster ids
+    """
+    previous = [_previous_groups(c.path, out_dir) for c in clustered_images]
+    clustered = [
+        (c, prev)
+        for c, prev in zip(clustered_images, previous, strict=True)
+        if c.cluster_id != UNIQUE_CLUSTER_ID
+    ]
+    groups = _match_ids(
+        [c.cluster_id for c, _ in clustered],
+        [prev[0] for _, prev in clustered],
+        _existing_ids(out_dir, GROUP_DIR),
+    )
+
+    subgroups: dict[tuple[int, int], int] = {}
+    for group in set(groups.values()):
+        members = [
+            (c, prev)
+            for c, prev in clustered
+            if groups[c.cluster_id] == group
+            and c.subcluster_id not in (None, UNIQUE_CLUSTER_ID)
+        ]
+        mapping = _match_ids(
+            [c.subcluster_id for c, _ in members],  # ty: ignore[invalid-argument-type]
+            [prev[1] if prev[0] == group else None for _, prev in members],
+            _existing_ids(out_dir / f"group_{group}", SUBGROUP_DIR),
+        )
+        subgroups.update({(group, label): sub for label, sub in mapping.items()})
+
+    result = []
+    for clustered_image in clustered_images:
+        if clustered_image.cluster_id == UNIQUE_CLUSTER_ID:
+            result.append(clustered_image)
+            continue
+        group = groups[clustered_image.cluster_id]
+        subcluster = clustered_image.subcluster_id
+        if subcluster not in (None, UNIQUE_CLUSTER_ID):
+            subcluster = subgroups[(group, subcluster)]
+        result.append(
+            replace(clustered_image, cluster_id=group, subcluster_id=subcluster)
+        )
+    return result
+
+
+def _remove_if_empty(directory: Path) -> None:
+    try:
+        directory.rmdir()
+    except OSError:
+        pass  # not empty, or already gone
+
+
+def _free_destination(destination: Path) -> Path:
+    """Return destination, or a numbered variant of it if the name is taken."""
+    candidate = destination
+    number = 1
+    while candidate.exists():
+        candidate = destination.with_name(
+            f"{destination.stem}_{number}{destination.suffix}"
+        )
+        number += 1
+    if candidate != destination:
+        logger.warning(
+            f"{destination} already exists, moving {destination.name} to "
+            f"{candidate.name} instead"
+        )
+    return candidate
+
+
+def group_image_files(
+    clustered_images: list[ClusteredImage],
+    out_dir: Path,
+    throttle: Throttle | None = None,
+) -> list[ClusteredImage]:
     """Organize images into cluster-based subdirectories.
 
-    Files are moved (not copied) to their respective cluster folders.
+    Files are moved (not copied) to their respective cluster folders. Images
+    with a subcluster_id other than -1 are nested one level deeper, in
+    ``group_N/subgroup_M``. Cluster ids are first matched to the group
+    directories of an earlier run (see stable_cluster_ids), so a rerun only
+    moves files whose membership changed. Unique images left in a group
+    directory by an earlier run are moved back to out_dir. A move never
+    overwrites an existing file: if the name is taken, a number is appended
+    to the moved file's name and a warning is logged.
 
     Args:
         clustered_images: List of ClusteredImage objects with path and cluster_id
         out_dir: Output directory root
+        throttle: Each move first waits for its files/s and MB/s limits; a
+                  move within one filesystem is a rename, but across
+                  filesystems the whole file is copied
+
+    Returns:
+        ClusteredImage objects with paths updated to where each file now lives,
+        and with the cluster ids of the directories they live in
     """
     logger.info(f"Organizing {len(clustered_images)} images into groups")
     out_path = out_dir
     out_path.mkdir(parents=True, exist_ok=True)
 
-    UNIQUE_CLUSTER_ID = -1
     moved_count = 0
+    grouped = []
+    vacated: set[Path] = set()
 
-    for clustered in clustered_images:
+    for clustered in stable_cluster_ids(clustered_images, out_path):
+        previous_group, _ = _previous_groups(clustered.path, out_path)
         if clustered.cluster_id == UNIQUE_CLUSTER_ID:
-            logger.debug(f"Skipping noise point: {clustered.path.name}")
-            continue
-        cluster_name = f"group_{clustered.cluster_id}"
-        cluster_dir = out_path / cluster_name
-        cluster_dir.mkdir(parents=True, exist_ok=True)
+            if previous_group is None:
+                logger.debug(f"Skipping noise point: {clustered.path.name}")
+                grouped.append(clustered)
+                continue
+            cluster_dir = out_path
+        else:
+            cluster_dir = out_path / f"group_{clustered.cluster_id}"
+            if clustered.subcluster_id not in (None, UNIQUE_CLUSTER_ID):
+                cluster_dir = cluster_dir / f"subgroup_{clustered.subcluster_id}"
 
         destination = cluster_dir / clustered.path.name
+        if destination.absolute() == clustered.path.absolute():
+            grouped.append(clustered)
+            continue
+        cluster_dir.mkdir(parents=True, exist_ok=True)
+        destination = _free_destination(destination)
+        if throttle is not None:
+            throttle.acquire(clustered.path.stat().st_size)
         shutil.move(str(clustered.path), str(destination))
+        if previous_group is not None:
+            vacated.add(clustered.path.parent)
+        grouped.append(replace(clustered, path=destination))
         moved_count += 1
 
-    logger.info(f"Moved {moved_count} images to cluster directories")
+    # Remove group directories this run emptied, subgroups before their group.
+    for directory in sorted(vacated, key=lambda d: len(d.parts), reverse=True):
+        _remove_if_empty(directory)
+        if SUBGROUP_DIR.fullmatch(directory.name):
+            _remove_if_empty(directory.parent)
+
+    logger.info(
+        f"Moved {moved_count} images to cluster directories, "
+        f"{len(grouped) - moved_count} already in place"
+    )
+    return grouped
+
+
+def group_by_folder(
+    clustered_images: list[ClusteredImage], throttle: Throttle | None = None
+) -> list[ClusteredImage]:
+    """Organize the images of each folder into group directories of that folder.
+
+    Every folder (see image_folder) is grouped on its own with
+    group_image_files, so each gets its own ``group_0``, ``group_1``, etc.
+
+    Args:
+        clustered_images: Clustering in which images of different folders
+            never share a cluster, e.g. from cluster_per_folder
+        throttle: Limits the moves; see group_image_files
+
+    Returns:
+        ClusteredImage objects in input order, with updated paths and the
+        cluster ids of the directories they live in
+    """
+    folders = partition_by_folder([c.path for c in clustered_images])
+    grouped: list[ClusteredImage | None] = [None] * len(clustered_images)
+    for folder, indices in folders.items():
+        members = [clustered_images[i] for i in indices]
+        # Number each folder's clusters from 0, as a run on that folder would.
+        local = {
+            label: n
+            for n, label in enumerate(
+                sorted({c.cluster_id for c in members} - {UNIQUE_CLUSTER_ID})
+            )
+        }
+        local[UNIQUE_CLUSTER_ID] = UNIQUE_CLUSTER_ID
+        members = [replace(c, cluster_id=local[c.cluster_id]) for c in members]
+        results = group_image_files(members, folder, throttle)
+        for i, result in zip(indices, results, strict=True):
+            grouped[i] = result
+    return [c for c in grouped if c is not None]
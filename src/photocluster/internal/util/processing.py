@@ -2,6 +2,14 @@
 
 import logging
 import multiprocessing
+import os
+import signal
+import sys
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from types import FrameType
+from typing import Literal
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +17,9 @@ MIN_PROCESSES = 1
 MAX_PROCESSES = 8
 CPU_USAGE_RATIO = 0.75
 
+Backend = Literal["process", "thread"]
+BACKENDS: tuple[Backend, ...] = ("process", "thread")
+
 
 def get_num_processes() -> int:
     """Calculate the default number of processes to use for parallel processing.
@@ -24,3 +35,128 @@ def get_num_processes() -> int:
     )
     logger.debug(f"Detected {cpu_count} CPU cores, using {num_processes} processes")
     return num_processes
+
+
+def gil_enabled() -> bool:
+    """Check whether the running interpreter has a global interpreter lock."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled() if is_gil_enabled is not None else True
+
+
+def default_backend() -> Backend:
+    """Pick the worker backend for hashing.
+
+    On free-threaded Python, threads run hashing in parallel without the
+    per-process memory and startup cost, so they are preferred. Otherwise the
+    parts of hashing that hold the GIL make processes the safer default.
+
+    Returns:
+        "thread" on free-threaded Python, "process" otherwise
+    """
+    return "process" if gil_enabled() else "thread"
+
+
+class BudgetClosed(Exception):
+    """Raised by InFlightBudget.acquire once the budget has been closed."""
+
+
+class InFlightBudget:
+    """Bounds the total cost of work items that are in flight at once.
+
+    Producers acquire an item's cost before handing it out and consumers
+    release it when the item is finished. A single item larger than the whole
+    budget is still admitted once nothing else is in flight, so oversized items
+    cannot stall the pipeline.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _fits(self, cost: int) -> bool:
+        return self.in_flight == 0 or self.in_flight + cost <= self.limit
+
+    def _take(self, cost: int) -> None:
+        self.in_flight += cost
+        self.peak = max(self.peak, self.in_flight)
+
+    def try_acquire(self, cost: int) -> bool:
+        """Reserve cost if it fits right now, without blocking."""
+        with self._condition:
+            if self._closed or not self._fits(cost):
+                return False
+            self._take(cost)
+            return True
+
+    def acquire(self, cost: int) -> None:
+        """Reserve cost, blocking until enough in-flight work is released.
+
+        Raises:
+            BudgetClosed: If the budget is closed while waiting
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed or self._fits(cost))
+            if self._closed:
+                raise BudgetClosed("budget closed while waiting")
+            self._take(cost)
+
+    def release(self, cost: int) -> None:
+        """Return previously acquired cost to the budget."""
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - cost)
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Wake up and fail every waiting acquire; used on shutdown."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class CancellationToken:
+    """Thread-safe request for long-running work to stop early.
+
+    Work that accepts a token checks it between items, stops its workers and
+    returns what it finished so far.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._owner: int | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel has been called."""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Ask the work to stop; safe to call from any thread or signal handler."""
+        self._event.set()
+
+    def _handle(self, signum: int, frame: FrameType | None) -> None:
+        if os.getpid() != self._owner:
+            # A forked pool worker inherited the handler; Pool.terminate stops
+            # workers with SIGTERM, so let the signal kill it as by default.
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+            return
+        logger.warning(f"Received {signal.Signals(signum).name}, cancelling")
+        self.cancel()
+
+    @contextmanager
+    def cancel_on(self, *signals: signal.Signals) -> Generator[None]:
+        """Cancel when one of the signals arrives, e.g. a scheduler's SIGTERM.
+
+        The previous handlers are restored on exit. Must be entered on the
+        main thread, like any signal handler installation.
+        """
+        self._owner = os.getpid()
+        previous = {sig: signal.signal(sig, self._handle) for sig in signals}
+        try:
+            yield
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
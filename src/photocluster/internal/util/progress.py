@@ -0,0 +1,182 @@
+"""Progress display and per-stage timing for PhotoCluster."""
+
+import os
+import sys
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TextIO
+
+REFRESH_INTERVAL = 0.2  # seconds between redraws on a terminal
+LOG_INTERVAL = 5.0  # seconds between lines when not writing to a terminal
+CPU_BOUND_THRESHOLD = 0.75
+MIN_CLASSIFY_SECONDS = 0.5  # stages shorter than this are not classified
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+class Progress:
+    """Live single-line progress with throughput and ETA."""
+
+    def __init__(self, label: str, total: int, stream: TextIO | None = None) -> None:
+        self.label = label
+        self.total = total
+        self.done = 0
+        self._stream = stream if stream is not None else sys.stderr
+        self._interactive = self._stream.isatty()
+        self._start = time.perf_counter()
+        self._last_draw = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Items completed per second so far."""
+        elapsed = time.perf_counter() - self._start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def update(self, count: int = 1) -> None:
+        """Record completed items and redraw if enough time has passed."""
+        self.done += count
+        now = time.perf_counter()
+        interval = REFRESH_INTERVAL if self._interactive else LOG_INTERVAL
+        if now - self._last_draw >= interval or self.done >= self.total:
+            self._last_draw = now
+            self._draw()
+
+    def _draw(self) -> None:
+        rate = self.rate
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+        line = (
+            f"[{self.label}] {self.done}/{self.total} {percent:5.1f}%  "
+            f"{rate:7.1f} img/s  ETA {_format_duration(remaining)}"
+        )
+        if self._interactive:
+            self._stream.write(f"\r{line}\033[K")
+        else:
+            self._stream.write(line + "\n")
+        self._stream.flush()
+
+    def close(self) -> None:
+        """Finish the progress line."""
+        if self._interactive and self.done:
+            self._stream.write("\n")
+            self._stream.flush()
+
+
+@dataclass
+class WorkerLoads:
+    """Busy time and task count of each worker in a pool."""
+
+    busy: dict[str, float] = field(default_factory=dict)
+    tasks: dict[str, int] = field(default_factory=dict)
+
+    def record(self, worker: str, seconds: float) -> None:
+        """Add one finished task of the given duration to a worker's load."""
+        self.busy[worker] = self.busy.get(worker, 0.0) + seconds
+        self.tasks[worker] = self.tasks.get(worker, 0) + 1
+
+    def summary(self, wall: float) -> list[str]:
+        """Render one line per worker with its share of the stage's wall time."""
+        lines = []
+        for number, worker in enumerate(sorted(self.busy), start=1):
+            busy = self.busy[worker]
+            utilization = busy / wall if wall > 0 else 0.0
+            lines.append(
+                f"  worker {number:<3}{busy:>8.2f}s{self.tasks[worker]:>10}"
+                f"{'':>12}{utilization:>7.0%}"
+            )
+        return lines
+
+
+@dataclass
+class HashProgress:
+    """Aggregate progress of a hash run, reported with every result."""
+
+    total: int  # images to hash, cached ones included
+    done: int = 0  # results so far, cached ones included
+    cached: int = 0  # results taken from a cache rather than hashed
+    elapsed: float = 0.0  # seconds since the run started
+
+    @property
+    def rate(self) -> float:
+        """Images hashed per second, not counting cache hits."""
+        return (self.done - self.cached) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class StageTiming:
+    """Wall-clock and CPU time spent in one pipeline stage."""
+
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0  # this process plus reaped worker processes
+    items: int = 0
+    workers: int = 1
+    worker_loads: WorkerLoads | None = None  # set for stages run on a pool
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the available worker CPU time actually used."""
+        if self.wall <= 0:
+            return 0.0
+        return self.cpu / (self.wall * self.workers)
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+@dataclass
+class StageTimer:
+    """Collects StageTiming entries for a run and renders a summary."""
+
+    stages: list[StageTiming] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str, workers: int = 1) -> Generator[StageTiming]:
+        """Time a block of work. Set ``items`` on the yielded timing."""
+        timing = StageTiming(name=name, workers=workers)
+        wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+        try:
+            yield timing
+        finally:
+            timing.wall = time.perf_counter() - wall_start
+            timing.cpu = _cpu_seconds() - cpu_start
+            self.stages.append(timing)
+
+    def summary(self) -> str:
+        """Render a per-stage timing table.
+
+        The CPU column compares CPU time to wall time times worker count; a
+        stage well below CPU_BOUND_THRESHOLD spent most of its time waiting
+        (typically on storage) rather than computing. Stages run on a pool
+        also list each worker's busy time and tasks; a worker far below the
+        others finished early and sat idle while the rest caught up.
+        """
+        lines = [
+            f"{'stage':<10}{'wall':>10}{'items':>10}{'items/s':>12}{'cpu':>8}  bound"
+        ]
+        for timing in self.stages:
+            rate = timing.items / timing.wall if timing.wall > 0 else 0.0
+            utilization = timing.utilization
+            if timing.wall < MIN_CLASSIFY_SECONDS:
+                bound = "-"
+            elif utilization >= CPU_BOUND_THRESHOLD:
+                bound = "cpu"
+            else:
+                bound = "i/o/wait"
+            lines.append(
+                f"{timing.name:<10}{timing.wall:>9.2f}s{timing.items:>10}"
+                f"{rate:>12.1f}{utilization:>7.0%}  {bound}"
+            )
+            if timing.worker_loads is not None:
+                lines += timing.worker_loads.summary(timing.wall)
+        total = sum(timing.wall for timing in self.stages)
+        lines.append(f"{'total':<10}{total:>9.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,239 @@
+"""Resource limits for running PhotoCluster next to other services."""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+IOClass = Literal["best-effort", "idle"]
+IO_CLASSES: tuple[IOClass, ...] = ("best-effort", "idle")
+# Linux ioprio_set(2) constants; glibc has no wrapper, so it is a raw syscall.
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASSES = {"best-effort": 2, "idle": 3}
+IOPRIO_BEST_EFFORT_LOWEST = 7
+SYS_IOPRIO_SET = {
+    "x86_64": 251,
+    "aarch64": 30,
+    "i386": 289,
+    "i686": 289,
+    "armv7l": 314,
+    "ppc64le": 273,
+    "s390x": 282,
+}
+MEGABYTE = 1024 * 1024
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` units per second on average.
+
+    The bucket starts empty, so the first units are paced too. Up to one
+    second of unused tokens is saved up, so work resuming after a pause runs
+    at full speed briefly while the long-run rate stays at ``rate``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create an empty bucket.
+
+        Args:
+            rate: Units allowed per second
+            clock: Monotonic time source, replaceable in tests
+            sleep: Blocks for the given seconds, replaceable in tests
+
+        Raises:
+            ValueError: If rate is not positive
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = rate
+        self._tokens = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take amount tokens, waiting until enough have accumulated.
+
+        A request larger than the bucket drives it into debt instead of
+        waiting forever, so a file bigger than one second's byte budget
+        still gets read, and the following reads wait correspondingly.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class Throttle:
+    """Limits files and bytes per second, and measures the rates achieved."""
+
+    def __init__(
+        self,
+        files_per_second: float | None = None,
+        bytes_per_second: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create a throttle; a limit of None is not enforced but still measured.
+
+        Args:
+            files_per_second: Maximum files per second
+            bytes_per_second: Maximum bytes per second
+            clock: Monotonic time source, replaceable in tests
+            sleep: Blocks for the given seconds, replaceable in tests
+        """
+        self._buckets = [
+            (TokenBucket(rate, clock, sleep), per_file)
+            for rate, per_file in ((files_per_second, True), (bytes_per_second, False))
+            if rate is not None
+        ]
+        self.files_per_second = files_per_second
+        self.bytes_per_second = bytes_per_second
+        self.files = 0
+        self.bytes = 0
+        self.waited = 0.0
+        self._clock = clock
+        self._started: float | None = None
+        self._finished: float | None = None
+        self._lock = threading.Lock()
+
+    def acquire(self, size: int) -> None:
+        """Wait until a file of size bytes may be processed, then count it."""
+        waited = 0.0
+        for bucket, per_file in self._buckets:
+            waited += bucket.acquire(1 if per_file else size)
+        now = self._clock()
+        with self._lock:
+            if self._started is None:
+                self._started = now - waited
+            self._finished = now
+            self.files += 1
+            self.bytes += size
+            self.waited += waited
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from the first acquire to the last."""
+        if self._started is None or self._finished is None:
+            return 0.0
+        return self._finished - self._started
+
+    @property
+    def files_rate(self) -> float:
+        """Achieved files per second."""
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_rate(self) -> float:
+        """Achieved bytes per second."""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self, label: str) -> str:
+        """One line with the achieved rates and the time spent throttled."""
+        return (
+            f"{label}: {self.files} files, {self.bytes / MEGABYTE:.1f} MB at "
+            f"{self.files_rate:.1f} files/s, {self.bytes_rate / MEGABYTE:.2f} MB/s; "
+            f"waited {self.waited:.1f}s on limits"
+        )
+
+
+def set_io_priority(io_class: IOClass) -> bool:
+    """Set the I/O scheduling class of the calling thread, like ionice.
+
+    Threads and processes started afterwards inherit it. Only Linux
+    supports this; elsewhere a warning is logged.
+
+    Args:
+        io_class: "idle" only gets disk time nobody else wants; "best-effort"
+                  is the default class, at its lowest priority level
+
+    Returns:
+        True if the priority was changed
+    """
+    number = SYS_IOPRIO_SET.get(platform.machine())
+    if not sys.platform.startswith("linux") or number is None:
+        logger.warning(f"I/O priority is not supported on {sys.platform}")
+        return False
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    level = IOPRIO_BEST_EFFORT_LOWEST if io_class == "best-effort" else 0
+    ioprio = (IOPRIO_CLASSES[io_class] << IOPRIO_CLASS_SHIFT) | level
+    if libc.syscall(number, IOPRIO_WHO_PROCESS, 0, ioprio) < 0:
+        error = ctypes.get_errno()
+        logger.warning(f"Could not set I/O priority: {os.strerror(error)}")
+        return False
+    logger.info(f"Set I/O scheduling class to {io_class}")
+    return True
+
+
+def lower_priority(niceness: int = 0, io_class: IOClass | None = None) -> None:
+    """Make this process yield CPU and disk to other work on the host.
+
+    Call it before starting worker pools: on Linux, both settings apply to
+    the calling thread and are inherited by threads and processes created
+    afterwards.
+
+    Args:
+        niceness: Amount to add to the CPU nice value (0-19)
+        io_class: I/O scheduling class to switch to; None leaves it unchanged
+    """
+    if niceness and not hasattr(os, "nice"):
+        logger.warning(f"CPU niceness is not supported on {sys.platform}")
+    elif niceness:
+        logger.info(f"Nice value is now {os.nice(niceness)}")
+    if io_class is not None:
+        set_io_priority(io_class)
+
+
+def priority_initializer(
+    niceness: int = 0, io_class: IOClass | None = None, threads: bool = False
+) -> Callable[[], None] | None:
+    """Return a pool initializer that lowers the priority of each worker.
+
+    Library callers use this instead of lower_priority, which would lower
+    the calling process for good. Linux keeps nice values and I/O classes
+    per thread, so thread workers can be lowered on their own. Elsewhere
+    they belong to the whole process, so thread workers keep their priority
+    and a warning is logged.
+
+    Args:
+        niceness: Amount to add to each worker's CPU nice value (0-19)
+        io_class: I/O scheduling class for each worker; None leaves it unchanged
+        threads: The workers are threads of this process
+
+    Returns:
+        Initializer for the pool, or None if nothing is to be changed
+    """
+    if not niceness and io_class is None:
+        return None
+    if threads and not sys.platform.startswith("linux"):
+        logger.warning(
+            f"Worker priority cannot be lowered for threads on {sys.platform}"
+        )
+        return None
+    return partial(lower_priority, niceness, io_class)
@@ -0,0 +1,648 @@
+"""Watch a folder and cluster photos incrementally as they arrive."""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Protocol, Self
+
+import numpy as np
+
+from .cluster import cluster_hashes
+from .hamming import eps_to_radius, pack_bits, radius_pairs
+from .hasher.core import HashPool, hash_algorithm
+from .index import HashIndex
+from .models.image import ClusteredImage, ImageHash
+from .util.files import (
+    UNIQUE_CLUSTER_ID,
+    find_image_files,
+    group_image_files,
+    is_image_file,
+)
+from .util.processing import Backend
+
+if TYPE_CHECKING:
+    from .cache import HashCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTLE = 2.0  # seconds without changes before a new file is hashed
+DEFAULT_POLL_INTERVAL = 1.0  # seconds between checks for new files
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_REMOVED = IN_MOVED_FROM | IN_DELETE
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+INOTIFY_READ_SIZE = 64 * 1024
+
+
+@dataclass
+class WatchEvents:
+    """What a watcher saw happen to image files since its last poll.
+
+    Attributes:
+        written: Top-level files that were written or moved in
+        removed: Files, in the folder or a directory inside it, that were
+                 deleted or moved away, and directories removed from the
+                 folder, whose files are then gone as well
+        overflowed: Events were lost, so removals may be missing
+    """
+
+    written: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+    overflowed: bool = False
+
+
+class Watcher(Protocol):
+    """Source of changes to the image files in a directory."""
+
+    def poll(self, timeout: float) -> WatchEvents:
+        """Wait up to timeout seconds and return what changed meanwhile."""
+        ...
+
+    def close(self) -> None: ...
+
+
+def _signatures(directory: Path) -> dict[Path, tuple[int, int]]:
+    """Size and mtime of every image file directly inside directory."""
+    signatures = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            path = Path(entry.path)
+            if entry.is_file() and is_image_file(path):
+                stat = entry.stat()
+                signatures[path] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+def _nested_images(directory: Path) -> set[Path]:
+    """Image files in the directories directly inside directory, unstatted."""
+    images = set()
+    with os.scandir(directory) as folders:
+        for folder in folders:
+            if not folder.is_dir():
+                continue
+            with os.scandir(folder.path) as entries:
+                images.update(
+                    Path(entry.path)
+                    for entry in entries
+                    if entry.is_file() and is_image_file(Path(entry.path))
+                )
+    return images
+
+
+class PollingWatcher:
+    """Finds new, changed and removed files by listing the directory periodically.
+
+    Group directories are listed by name only, to notice removals.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._signatures = _signatures(directory)
+        self._nested = _nested_images(directory)
+
+    def poll(self, timeout: float) -> WatchEvents:
+        time.sleep(timeout)
+        current = _signatures(self.directory)
+        nested = _nested_images(self.directory)
+        written = [
+            path for path, sig in current.items() if self._signatures.get(path) != sig
+        ]
+        removed = (self._signatures.keys() - current.keys()) | (self._nested - nested)
+        self._signatures = current
+        self._nested = nested
+        return WatchEvents(written=sorted(written), removed=sorted(removed))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Reports files written or moved into a directory, and files removed.
+
+    Uses Linux inotify through ctypes, so the kernel wakes the watcher
+    instead of the directory being listed over and over. The directories
+    inside it, such as group directories, are watched for removals only.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """Start watching directory.
+
+        Raises:
+            OSError: If inotify is unavailable or the watch cannot be added
+        """
+        self.directory = directory
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._folders: dict[int, Path] = {}
+        try:
+            self._watch(
+                directory, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_REMOVED
+            )
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        self._watch(Path(entry.path), IN_REMOVED)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _watch(self, folder: Path, mask: int) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), str(folder))
+        self._folders[wd] = folder
+
+    def poll(self, timeout: float) -> WatchEvents:
+        events = WatchEvents()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return events
+        try:
+            data = os.read(self._fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            start = offset + _INOTIFY_EVENT.size
+            name = data[start : start + length].rstrip(b"\0")
+            offset = start + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; fall back to everything in the folder.
+                logger.warning(f"inotify queue overflowed for {self.directory}")
+                events.written.extend(_signatures(self.directory))
+                events.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                # The watched directory itself is gone.
+                self._folders.pop(wd, None)
+                continue
+            folder = self._folders.get(wd)
+            if folder is None or not name:
+                continue
+            path = folder / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_folder(path)
+                elif mask & IN_REMOVED:
+                    events.removed.append(path)
+            elif mask & IN_REMOVED:
+                if is_image_file(path):
+                    events.removed.append(path)
+            elif folder == self.directory and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                if is_image_file(path):
+                    events.written.append(path)
+        return events
+
+    def _add_folder(self, folder: Path) -> None:
+        try:
+            self._watch(folder, IN_REMOVED)
+        except OSError as e:
+            # Already gone again, or out of watches.
+            logger.debug(f"Cannot watch {folder}: {e}")
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(directory: Path, polling: bool = False) -> Watcher:
+    """Watch directory with inotify where available, and by polling otherwise.
+
+    Args:
+        directory: Folder whose top-level image files are watched
+        polling: Always poll, e.g. on network filesystems where inotify does
+                 not see writes made by other hosts
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            logger.warning(f"Falling back to polling {directory}: {e}")
+    return PollingWatcher(directory)
+
+
+class Debouncer:
+    """Holds back paths until they have been quiet for a settle time.
+
+    A camera upload or a copy produces several events per file; the file is
+    only handed on once it has stopped changing.
+    """
+
+    def __init__(self, settle: float = DEFAULT_SETTLE) -> None:
+        self.settle = settle
+        self._last: dict[Path, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def touch(self, path: Path, now: float) -> None:
+        """Record activity on path at time now."""
+        self._last[path] = now
+
+    def pop_ready(self, now: float) -> list[Path]:
+        """Remove and return the paths quiet for at least the settle time."""
+        ready = sorted(p for p, last in self._last.items() if now - last >= self.settle)
+        for path in ready:
+            del self._last[path]
+        return ready
+
+
+class _UnionFind:
+    def __init__(self) -> None:
+        self._parent: dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        parent = self._parent.setdefault(item, item)
+        if parent != item:
+            parent = self._parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a: int, b: int) -> None:
+        self._parent[self.find(a)] = self.find(b)
+
+    def groups(self) -> list[list[int]]:
+        members: dict[int, list[int]] = defaultdict(list)
+        for item in self._parent:
+            members[self.find(item)].append(item)
+        return list(members.values())
+
+
+class IncrementalClusters:
+    """Cluster assignments extended one batch of new images at a time.
+
+    With MIN_SAMPLES = 2, DBSCAN clusters are the connected components of
+    the graph linking images within eps. A new image can therefore only join,
+    merge or found clusters through its own neighbors, which a HashIndex
+    finds without comparing against every image. The result equals
+    clustering all images again.
+    """
+
+    def __init__(
+        self, hash_data: list[ImageHash], clustered: list[ClusteredImage], eps: float
+    ) -> None:
+        """Start from an existing clustering.
+
+        Args:
+            hash_data: Hashes of the clustered images
+            clustered: Assignment of each image in hash_data, in the same
+                       order, with the paths the images now live at
+            eps: DBSCAN epsilon parameter as proportion (0.0-1.0)
+        """
+        self.eps = eps
+        self.index = HashIndex.build(hash_data)
+        self.index.paths = [str(c.path) for c in clustered]
+        self.cluster_ids = [c.cluster_id for c in clustered]
+        self._positions = {path: i for i, path in enumerate(self.index.paths)}
+        self._members: dict[int, set[int]] = defaultdict(set)
+        for position, cluster_id in enumerate(self.cluster_ids):
+            if cluster_id != UNIQUE_CLUSTER_ID:
+                self._members[cluster_id].add(position)
+        self._gone: set[int] = set()
+
+    def _forget(self, position: int) -> None:
+        """Drop an image that was deleted or replaced from future matches."""
+        self._gone.add(position)
+        self._positions.pop(self.index.paths[position], None)
+        self.index.paths[position] = ""  # a new file may reuse the path
+        cluster_id = self.cluster_ids[position]
+        if cluster_id != UNIQUE_CLUSTER_ID:
+            self._members[cluster_id].discard(position)
+
+    def remove(self, paths: list[Path]) -> None:
+        """Forget images whose files were deleted or moved away.
+
+        Paths that still exist are kept, since another file may have taken
+        the name since. A directory path forgets every image inside it.
+
+        Args:
+            paths: Removed files and directories, e.g. from WatchEvents
+        """
+        for path in paths:
+            if path.exists():
+                continue
+            position = self._positions.get(str(path))
+            if position is not None:
+                self._forget(position)
+            elif not is_image_file(path):
+                inside = [
+                    p
+                    for name, p in self._positions.items()
+                    if Path(name).is_relative_to(path)
+                ]
+                for position in inside:
+                    self._forget(position)
+
+    def prune(self) -> None:
+        """Forget every image whose file no longer exists."""
+        self.remove([Path(name) for name in self._positions])
+
+    def _links(self, new: list[ImageHash], radius: int) -> list[tuple[int, int]]:
+        """Pairs of positions within radius that involve a new image."""
+        first = len(self.index)
+        links = []
+        for offset, result in enumerate(new):
+            for match in self.index.query(result, max_distance=radius):
+                position = self._positions.get(str(match.path))
+                if position is None or position in self._gone:
+                    continue
+                links.append((first + offset, position))
+        rows, cols, _ = radius_pairs(pack_bits(np.stack([r.hash for r in new])), radius)
+        links += [
+            (first + row, first + col)
+            for row, col in zip(rows.tolist(), cols.tolist(), strict=True)
+        ]
+        return links
+
+    def add(self, new: list[ImageHash], out_dir: Path) -> list[ClusteredImage]:
+        """Assign new images to clusters and move the affected files.
+
+        All moves of the batch go through a single group_image_files call.
+
+        Args:
+            new: Hashes of images not yet clustered
+            out_dir: Output directory root holding the group directories
+
+        Returns:
+            Final assignment of the new images, followed by existing images
+            whose cluster changed
+        """
+        if not new:
+            return []
+        for result in new:
+            replaced = self._positions.get(str(result.path))
+            if replaced is not None:
+                self._forget(replaced)
+
+        first = len(self.index)
+        union = _UnionFind()
+        for a, b in self._links(new, eps_to_radius(self.eps, len(new[0].hash))):
+            union.union(a, b)
+
+        labels = dict.fromkeys(range(first, first + len(new)), UNIQUE_CLUSTER_ID)
+        next_label = max(self._members, default=UNIQUE_CLUSTER_ID) + 1
+        for component in union.groups():
+            old_ids = {
+                self.cluster_ids[p]
+                for p in component
+                if p < first and self.cluster_ids[p] != UNIQUE_CLUSTER_ID
+            }
+            if old_ids:
+                label = min(old_ids)
+            else:
+                label, next_label = next_label, next_label + 1
+            members = set(component)
+            for cluster_id in old_ids:
+                members |= self._members[cluster_id]
+            for position in members:
+                labels[position] = label
+
+        self.index.add(new)
+        self.cluster_ids += [UNIQUE_CLUSTER_ID] * len(new)
+        # Every member of a touched cluster is passed on, even if its label
+        # is unchanged, so stable_cluster_ids sees which group directory
+        # holds most of the cluster.
+        affected = sorted(labels)
+        grouped = group_image_files(
+            [
+                ClusteredImage(path=Path(self.index.paths[p]), cluster_id=labels[p])
+                for p in affected
+            ],
+            out_dir,
+        )
+
+        added, moved = [], []
+        for position, clustered in zip(affected, grouped, strict=True):
+            old_path = self.index.paths[position]
+            old_id = self.cluster_ids[position]
+            self._positions.pop(old_path, None)
+            self._positions[str(clustered.path)] = position
+            self.index.paths[position] = str(clustered.path)
+            if old_id != UNIQUE_CLUSTER_ID:
+                self._members[old_id].discard(position)
+                if not self._members[old_id]:
+                    del self._members[old_id]
+            if clustered.cluster_id != UNIQUE_CLUSTER_ID:
+                self._members[clustered.cluster_id].add(position)
+            self.cluster_ids[position] = clustered.cluster_id
+            if position >= first:
+                added.append(clustered)
+            elif clustered.cluster_id != old_id:
+                moved.append(clustered)
+        return added + moved
+
+
+class WatchFolder:
+    """Long-running watcher that clusters photos as they land in a folder.
+
+    New files are debounced until they stop changing, hashed on a persistent
+    HashPool, assigned by IncrementalClusters and moved in one batch.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        eps: float = 0.2,
+        num_processes: int = 1,
+        backend: Backend | None = None,
+        fast: bool = False,
+        settle: float = DEFAULT_SETTLE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        polling: bool = False,
+        cache: "HashCache | None" = None,
+    ) -> None:
+        """Configure a watcher; nothing starts until run or the with block.
+
+        Args:
+            directory: Folder receiving photos; group directories go inside
+            eps: DBSCAN epsilon parameter as proportion (0.0-1.0)
+            num_processes: Number of hash workers
+            backend: "process" or "thread" workers; None picks the default
+            fast: Hash EXIF thumbnails or reduced-scale decodes
+            settle: Seconds a new file must stay unchanged before hashing
+            poll_interval: Longest wait for events before checking settled
+                           files, and the listing interval when polling
+            polling: Poll the directory even where inotify is available
+            cache: Reuse and store hashes by file content
+
+        Raises:
+            ValueError: If cache holds other hashes, e.g. with rotations or
+                        confirmation hashes, which watching does not use
+        """
+        if cache is not None and cache.algorithm != hash_algorithm(fast):
+            raise ValueError(
+                f"Cache holds {cache.algorithm} hashes, not {hash_algorithm(fast)}"
+            )
+        self.directory = directory
+        self.eps = eps
+        self.num_processes = num_processes
+        self.backend = backend
+        self.fast = fast
+        self.poll_interval = poll_interval
+        self.polling = polling
+        self.cache = cache
+        self.debouncer = Debouncer(settle)
+        self.clusters: IncrementalClusters | None = None
+        self._watcher: Watcher | None = None
+        self._pool: HashPool | None = None
+        # Size and mtime of files this watcher moved into the folder itself.
+        self._moved_in: dict[Path, tuple[int, int]] = {}
+
+    def _hash(self, paths: list[Path]) -> list[ImageHash]:
+        assert self._pool is not None
+        if self.cache is None:
+            return self._pool.hash(paths)
+        found, pending = self.cache.lookup(paths)
+        for result in self._pool.hash(pending):
+            self.cache.put(result)
+            found[result.path] = result
+        self.cache.commit()
+        return [found[path] for path in paths if path in found]
+
+    def _expect_moves(self, paths: list[Path]) -> None:
+        """Remember files about to be reported for having been moved in by us."""
+        for path in paths:
+            if path.parent == self.directory:
+                stat = path.stat()
+                self._moved_in[path] = (stat.st_size, stat.st_mtime_ns)
+
+    def _moved_by_us(self, path: Path) -> bool:
+        """Whether a written file is one this watcher moved in, still unchanged."""
+        signature = self._moved_in.pop(path, None)
+        if signature is None:
+            return False
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == signature
+
+    def start(self) -> list[ClusteredImage]:
+        """Start watching, then cluster the images already in the folder.
+
+        The watch starts first so files arriving during the initial pass are
+        picked up afterwards rather than missed.
+
+        Returns:
+            Assignment of the images already in the folder
+        """
+        self._watcher = open_watcher(self.directory, self.polling)
+        self._pool = HashPool(
+            self.num_processes,
+            self.backend,
+            fast=self.fast,
+            digest=self.cache is not None,
+        )
+        hash_data = self._hash(find_image_files(self.directory))
+        clustered = cluster_hashes(hash_data, self.eps) if hash_data else []
+        grouped = group_image_files(clustered, self.directory)
+        self._expect_moves(
+            [
+                after.path
+                for before, after in zip(clustered, grouped, strict=True)
+                if after.path != before.path
+            ]
+        )
+        self.clusters = IncrementalClusters(hash_data, grouped, self.eps)
+        logger.info(f"Watching {self.directory} with {len(grouped)} images")
+        return grouped
+
+    def process(self, paths: list[Path]) -> list[ClusteredImage]:
+        """Hash and cluster a batch of new files.
+
+        Returns:
+            Assignments of the new files and of existing files that moved
+        """
+        assert self.clusters is not None
+        # A file may have been moved into a group directory meanwhile.
+        new = self._hash([path for path in paths if path.exists()])
+        changed = self.clusters.add(new, self.directory)
+        # New files start out in the folder, so any other file now there
+        # was moved back from a group directory.
+        added = {result.path for result in new}
+        self._expect_moves([c.path for c in changed if c.path not in added])
+        if changed:
+            logger.info(
+                f"Added {len(new)} images, {len(changed) - len(new)} existing moved"
+            )
+        return changed
+
+    def step(self) -> list[ClusteredImage]:
+        """Wait for events once and process the files that have settled."""
+        assert self._watcher is not None
+        assert self.clusters is not None
+        events = self._watcher.poll(self.poll_interval)
+        if events.overflowed:
+            self.clusters.prune()
+        else:
+            self.clusters.remove(events.removed)
+        for path in events.written:
+            if not self._moved_by_us(path):
+                self.debouncer.touch(path, time.monotonic())
+        ready = self.debouncer.pop_ready(time.monotonic())
+        return self.process(ready) if ready else []
+
+    def run(
+        self,
+        stop: threading.Event | None = None,
+        on_batch: Callable[[list[ClusteredImage]], None] | None = None,
+    ) -> None:
+        """Watch until stop is set, or forever.
+
+        Args:
+            stop: Event that ends the loop within one poll interval
+            on_batch: Called with the result of every non-empty batch
+        """
+        with self:
+            while stop is None or not stop.is_set():
+                changed = self.step()
+                if changed and on_batch is not None:
+                    on_batch(changed)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop watching and shut down the hash workers; see HashPool.close."""
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        if self._pool is not None:
+            self._pool.close(wait)
+            self._pool = None
+
+    def __enter__(self) -> Self:
+        if self.clusters is None:
+            self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close(wait=exc_type is None)
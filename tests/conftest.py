@@ -1,6 +1,8 @@
 """Pytest configuration and fixtures."""
 
+import io
 import shutil
+import struct
 import tempfile
 from pathlib import Path
 
@@ -31,3 +33,35 @@ def sample_image_path(temp_dir):
 def sample_hash():
     """Create a sample hash array for testing."""
     return np.array([1, 0, 1, 0, 1, 1, 0, 0], dtype=np.uint8)
+
+
+def _exif_with_thumbnail(
+    thumbnail: bytes, orientation: int, thumb_orientation: int | None
+) -> bytes:
+    """Build a little-endian EXIF segment with IFD0 and a JPEG thumbnail in IFD1."""
+    ifd1_entries = [(0x0201, 4, 0), (0x0202, 4, len(thumbnail))]
+    if thumb_orientation is not None:
+        ifd1_entries.append((0x0112, 3, thumb_orientation))
+    ifd1_offset = 8 + 2 + 12 + 4
+    thumbnail_offset = ifd1_offset + 2 + 12 * len(ifd1_entries) + 4
+    ifd1_entries[0] = (0x0201, 4, thumbnail_offset)
+    ifd0 = struct.pack("<H", 1) + struct.pack("<HHII", 0x0112, 3, 1, orientation)
+    ifd1 = struct.pack("<H", len(ifd1_entries)) + b"".join(
+        struct.pack("<HHII", tag, kind, 1, value) for tag, kind, value in ifd1_entries
+    )
+    tiff = b"II*\x00" + struct.pack("<I", 8) + ifd0 + struct.pack("<I", ifd1_offset)
+    return b"Exif\x00\x00" + tiff + ifd1 + struct.pack("<I", 0) + thumbnail
+
+
+@pytest.fixture
+def save_with_thumbnail():
+    """Return a function saving a JPEG whose EXIF embeds a given thumbnail."""
+
+    def save(path, image, thumbnail, orientation=1, thumb_orientation=None):
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, "JPEG")
+        exif = _exif_with_thumbnail(buffer.getvalue(), orientation, thumb_orientation)
+        image.save(path, "JPEG", exif=exif)
+        return path
+
+    return save
@@ -0,0 +1,110 @@
+"""Tests for decode-memory admission control."""
+
+import threading
+
+from PIL import Image
+
+from photocluster.internal.hasher.admission import (
+    CONVERT_BYTES_PER_PIXEL,
+    MemoryAdmission,
+    estimate_decode_bytes,
+)
+
+
+class TestEstimateDecodeBytes:
+    """Tests for estimate_decode_bytes function."""
+
+    def test_uses_header_dimensions(self, temp_dir):
+        """Test the estimate scales with pixels and bands."""
+        path = temp_dir / "image.jpg"
+        Image.new("RGB", (40, 30)).save(path, "JPEG")
+
+        assert estimate_decode_bytes(path) == 40 * 30 * (3 + CONVERT_BYTES_PER_PIXEL)
+
+    def test_reads_prefetched_bytes(self, temp_dir):
+        """Test prefetched contents are estimated without opening the file."""
+        path = temp_dir / "image.jpg"
+        Image.new("RGB", (40, 30)).save(path, "JPEG")
+        data = path.read_bytes()
+        path.unlink()
+
+        assert estimate_decode_bytes(data) == 40 * 30 * (3 + CONVERT_BYTES_PER_PIXEL)
+
+    def test_unreadable_file_costs_nothing(self, temp_dir):
+        """Test files without a valid header are left to the hash worker."""
+        path = temp_dir / "broken.jpg"
+        path.write_bytes(b"not an image")
+
+        assert estimate_decode_bytes(path) == 0
+
+
+class TestMemoryAdmission:
+    """Tests for MemoryAdmission class."""
+
+    def _images(self, temp_dir, sizes):
+        paths = []
+        for i, size in enumerate(sizes):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", size).save(path, "JPEG")
+            paths.append(path)
+        return paths
+
+    def test_respects_budget(self, temp_dir):
+        """Test the estimated in-flight memory never exceeds the budget."""
+        paths = self._images(temp_dir, [(20, 20)] * 10)
+        cost = estimate_decode_bytes(paths[0])
+        admission = MemoryAdmission(max_bytes=cost * 3)
+        done = []
+
+        # Release each image from another thread, as pool results would.
+        def consume() -> None:
+            for path in admission.admit(paths, lambda p: p):
+                done.append(path)
+                threading.Timer(0.001, admission.release, args=(path,)).start()
+
+        worker = threading.Thread(target=consume)
+        worker.start()
+        worker.join(timeout=10)
+
+        assert done == paths
+        assert admission.budget.peak <= cost * 3
+
+    def test_oversized_image_runs_alone(self, temp_dir):
+        """Test an image larger than the budget is still admitted on its own."""
+        paths = self._images(temp_dir, [(10, 10), (200, 200)])
+        admission = MemoryAdmission(max_bytes=1000)
+        admitted = admission.admit(paths, lambda p: p)
+
+        admission.release(next(admitted))
+
+        assert next(admitted) == paths[1]
+        assert admission.budget.in_flight == estimate_decode_bytes(paths[1])
+
+    def test_estimates_prefetched_tasks_from_memory(self, temp_dir):
+        """Test (path, data) tasks are estimated from their data."""
+        paths = self._images(temp_dir, [(20, 20)])
+        tasks = [(paths[0], paths[0].read_bytes())]
+        paths[0].unlink()
+        admission = MemoryAdmission(max_bytes=10**6)
+
+        admitted = list(admission.admit(tasks, lambda t: t[0], lambda t: t[1]))
+
+        assert admitted == tasks
+        assert admission.budget.in_flight == 20 * 20 * (3 + CONVERT_BYTES_PER_PIXEL)
+
+    def test_close_stops_waiting_iterator(self, temp_dir):
+        """Test closing unblocks an iterator waiting on the budget."""
+        paths = self._images(temp_dir, [(20, 20)] * 3)
+        admission = MemoryAdmission(max_bytes=1)
+        admitted = admission.admit(paths, lambda p: p)
+        first = next(admitted)
+        rest = []
+
+        worker = threading.Thread(target=lambda: rest.extend(admitted))
+        worker.start()
+        admission.close()
+        worker.join(timeout=10)
+
+        assert not worker.is_alive()
+        assert first == paths[0]
+        assert rest == []
@@ -0,0 +1,60 @@
+"""Tests for burst pre-partitioning."""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from photocluster.internal.bursts import partition_bursts
+from photocluster.internal.models.image import CaptureInfo, ImageHash
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _hash(sample_hash, seconds, camera="cam"):
+    timestamp = None if seconds is None else START + timedelta(seconds=seconds)
+    return ImageHash(
+        path=Path(f"{camera}_{seconds}.jpg"),
+        hash=sample_hash,
+        capture=CaptureInfo(timestamp=timestamp, camera=camera),
+    )
+
+
+class TestPartitionBursts:
+    """Tests for partition_bursts function."""
+
+    def test_splits_on_time_gaps(self, sample_hash):
+        """Test a gap larger than the window starts a new burst."""
+        hash_data = [_hash(sample_hash, s) for s in (0, 2, 4, 100, 101)]
+
+        bursts, rest = partition_bursts(hash_data, window=10)
+
+        assert sorted(map(sorted, bursts)) == [[0, 1, 2], [3, 4]]
+        assert rest == []
+
+    def test_separates_cameras(self, sample_hash):
+        """Test simultaneous shots from different cameras are not merged."""
+        hash_data = [_hash(sample_hash, 0, "a"), _hash(sample_hash, 0, "b")]
+
+        bursts, _ = partition_bursts(hash_data, window=10)
+
+        assert len(bursts) == 2
+
+    def test_orders_by_capture_time(self, sample_hash):
+        """Test input order does not matter."""
+        hash_data = [_hash(sample_hash, s) for s in (5, 0, 3)]
+
+        bursts, _ = partition_bursts(hash_data, window=3)
+
+        assert len(bursts) == 1
+
+    def test_images_without_timestamp_go_to_rest(self, sample_hash):
+        """Test images lacking capture time are returned separately."""
+        hash_data = [
+            _hash(sample_hash, 0),
+            _hash(sample_hash, None),
+            ImageHash(path=Path("plain.jpg"), hash=sample_hash),
+        ]
+
+        bursts, rest = partition_bursts(hash_data, window=10)
+
+        assert bursts == [[0]]
+        assert rest == [1, 2]
@@ -0,0 +1,143 @@
+"""Tests for the content-addressed hash cache."""
+
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photocluster.internal.cache import HashCache
+from photocluster.internal.hasher.core import Hasher
+from photocluster.internal.models.image import ImageHash
+
+
+@pytest.fixture
+def image(temp_dir):
+    """Create a small JPEG."""
+    path = temp_dir / "photo.jpg"
+    Image.new("RGB", (32, 32), color=(200, 30, 30)).save(path, "JPEG")
+    return path
+
+
+class TestHashCache:
+    """Tests for HashCache class."""
+
+    def test_hit_after_rename(self, image, temp_dir):
+        """Test a moved and renamed file is found by its contents."""
+        with HashCache(temp_dir / "cache.db") as cache:
+            cache.put(Hasher(digest=True)(image))
+            moved = temp_dir / "group_0" / "renamed.jpg"
+            moved.parent.mkdir()
+            shutil.move(image, moved)
+
+            result = cache.get(moved)
+
+        assert result is not None
+        assert result.path == moved
+        assert cache.hits == 1
+
+    def test_hit_for_copy_across_instances(self, image, temp_dir):
+        """Test a copy is found by a later process sharing the cache file."""
+        with HashCache(temp_dir / "cache.db") as cache:
+            cache.put(Hasher()(image))
+        copy = temp_dir / "copy.jpg"
+        shutil.copy(image, copy)
+
+        with HashCache(temp_dir / "cache.db", readonly=True) as cache:
+            result = cache.get(copy)
+
+        assert result is not None
+        assert np.array_equal(result.hash, Hasher()(image).hash)
+
+    def test_same_head_and_tail_different_contents_miss(self, temp_dir):
+        """Test the full digest rejects files that only pass the prefilter."""
+        first = temp_dir / "a.jpg"
+        second = temp_dir / "b.jpg"
+        data = bytearray(1024 * 1024)
+        first.write_bytes(bytes(data))
+        data[len(data) // 2] = 1
+        second.write_bytes(bytes(data))
+
+        with HashCache(temp_dir / "cache.db") as cache:
+            cache.put(ImageHash(path=first, hash=np.zeros(64, dtype=np.uint8)))
+
+            assert cache.get(first) is not None
+            assert cache.get(second) is None
+
+    def test_missing_requested_metadata_is_a_miss(self, image, temp_dir):
+        """Test entries without quality metrics do not satisfy quality requests."""
+        with HashCache(temp_dir / "cache.db") as cache:
+            cache.put(Hasher()(image))
+
+            assert cache.get(image) is not None
+            assert cache.get(image, quality=True) is None
+
+    def test_readonly_does_not_store(self, image, temp_dir):
+        """Test a read-only cache ignores new entries."""
+        HashCache(temp_dir / "cache.db").close()
+
+        with HashCache(temp_dir / "cache.db", readonly=True) as cache:
+            cache.put(Hasher()(image))
+
+            assert len(cache) == 0
+
+    def test_readonly_rejects_missing_cache(self, temp_dir):
+        """Test a read-only cache must exist, since it cannot be created."""
+        with pytest.raises(ValueError, match="No hash cache"):
+            HashCache(temp_dir / "missing.db", readonly=True)
+
+    @pytest.mark.parametrize("contents", [b"", b"not a database" * 100])
+    def test_readonly_rejects_other_files(self, temp_dir, contents):
+        """Test an empty or foreign file is reported instead of a SQLite error."""
+        path = temp_dir / "cache.db"
+        path.write_bytes(contents)
+
+        with pytest.raises(ValueError, match="Not a hash cache"):
+            HashCache(path, readonly=True)
+
+    def test_lookup_splits_hits_and_misses(self, image, temp_dir):
+        """Test lookup returns cached hashes and the paths still to hash."""
+        other = temp_dir / "other.jpg"
+        Image.new("RGB", (32, 32), color=(0, 90, 200)).save(other, "JPEG")
+
+        with HashCache(temp_dir / "cache.db") as cache:
+            cache.put(Hasher()(image))
+            found, missing = cache.lookup([image, other])
+
+        assert list(found) == [image]
+        assert missing == [other]
+
+    def test_lookup_reads_on_worker_threads(self, temp_dir, monkeypatch):
+        """Test many files are looked up off the calling thread, in input order."""
+        paths = []
+        for i in range(20):
+            path = temp_dir / f"photo_{i}.jpg"
+            Image.new("RGB", (32, 32), color=(i * 10, 0, 0)).save(path, "JPEG")
+            paths.append(path)
+        caller = threading.get_ident()
+        readers = set()
+
+        with HashCache(temp_dir / "cache.db") as cache:
+            for path in paths[::2]:
+                cache.put(Hasher(digest=True)(path))
+            get = cache.get
+
+            def record_thread(path: Path, **kwargs: bool) -> ImageHash | None:
+                readers.add(threading.get_ident())
+                return get(path, **kwargs)
+
+            monkeypatch.setattr(cache, "get", record_thread)
+            found, missing = cache.lookup(paths, threads=4)
+
+        assert list(found) == paths[::2]
+        assert missing == paths[1::2]
+        assert cache.hits == 10
+        assert cache.misses == 10
+        assert caller not in readers
+
+    def test_unreadable_file_is_a_miss(self, temp_dir):
+        """Test a missing file is reported as not cached."""
+        with HashCache(temp_dir / "cache.db") as cache:
+            assert cache.get(Path(temp_dir / "gone.jpg")) is None
@@ -0,0 +1,157 @@
+"""Tests for the resumable hash checkpoint."""
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photocluster.internal.checkpoint import (
+    HashCheckpoint,
+    hash_to_record,
+    load_hashes,
+    record_to_hash,
+)
+from photocluster.internal.hasher.jpeg import JPEGHasher
+from photocluster.internal.models.image import CaptureInfo, ImageHash
+
+
+class TestRecords:
+    """Tests for hash record serialization."""
+
+    def test_round_trip(self, sample_image_path):
+        """Test hashes, quality and capture info survive serialization."""
+        result = JPEGHasher.hash(sample_image_path, quality=True)
+        result.capture = CaptureInfo(timestamp=datetime(2024, 1, 1), camera="cam")
+
+        restored = record_to_hash(hash_to_record(result))
+
+        assert restored.path == result.path
+        assert np.array_equal(restored.hash, result.hash)
+        assert restored.hash.dtype == np.uint8
+        assert restored.quality == result.quality
+        assert restored.capture == result.capture
+
+    def test_odd_bit_count(self, sample_image_path):
+        """Test hashes that are not a multiple of 8 bits keep their length."""
+        result = ImageHash(path=sample_image_path, hash=np.ones(10, dtype=np.uint8))
+
+        restored = record_to_hash(hash_to_record(result))
+
+        assert len(restored.hash) == 10
+
+    def test_variants_round_trip(self, sample_image_path):
+        """Test rotation variants survive serialization."""
+        result = JPEGHasher.hash(sample_image_path, dihedral=True)
+
+        restored = record_to_hash(hash_to_record(result))
+
+        assert result.variants is not None
+        assert restored.variants is not None
+        assert np.array_equal(restored.variants, result.variants)
+
+    def test_confirm_hash_round_trip(self, sample_image_path):
+        """Test confirmation hashes survive serialization."""
+        result = JPEGHasher.hash(sample_image_path, confirm=True)
+
+        restored = record_to_hash(hash_to_record(result))
+
+        assert result.confirm_hash is not None
+        assert restored.confirm_hash is not None
+        assert np.array_equal(restored.confirm_hash, result.confirm_hash)
+
+
+class TestHashCheckpoint:
+    """Tests for HashCheckpoint class."""
+
+    def test_resume_reuses_unchanged_files(self, temp_dir, sample_image_path):
+        """Test stored results are returned for unchanged files."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+
+        with HashCheckpoint(store, resume=True) as checkpoint:
+            assert checkpoint.get(sample_image_path) is not None
+
+    def test_resume_detects_modified_files(self, temp_dir, sample_image_path):
+        """Test a changed file is no longer considered current."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+
+        Image.new("RGB", (50, 50), color="blue").save(sample_image_path, "JPEG")
+        stat = sample_image_path.stat()
+        os.utime(sample_image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with HashCheckpoint(store, resume=True) as checkpoint:
+            assert checkpoint.get(sample_image_path) is None
+
+    def test_without_resume_starts_over(self, temp_dir, sample_image_path):
+        """Test opening without resume discards previous results."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+
+        with HashCheckpoint(store) as checkpoint:
+            assert checkpoint.get(sample_image_path) is None
+        assert load_hashes(store) == []
+
+    def test_ignores_truncated_line(self, temp_dir, sample_image_path):
+        """Test a partially written final line does not break resume."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+        with store.open("a") as f:
+            f.write('{"path": "trunc')
+
+        with HashCheckpoint(store, resume=True) as checkpoint:
+            assert checkpoint.get(sample_image_path) is not None
+
+    def test_load_hashes_skips_truncated_line(self, temp_dir, sample_image_path):
+        """Test loading a checkpoint killed mid-write keeps the complete records."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+        with store.open("a") as f:
+            f.write('{"path": "trunc')
+
+        assert [r.path for r in load_hashes(store)] == [sample_image_path]
+
+    @pytest.mark.parametrize(
+        "line", ['{"path": "x.jpg", "bits": 64, "hash": "00"}', "[1, 2]"]
+    )
+    def test_skips_incomplete_records(self, temp_dir, sample_image_path, line):
+        """Test records missing fields are skipped on resume and on load."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+        with store.open("a") as f:
+            f.write(line + "\n")
+
+        with HashCheckpoint(store, resume=True) as checkpoint:
+            assert checkpoint.get(sample_image_path) is not None
+        assert [r.path for r in load_hashes(store)] == [sample_image_path]
+
+    def test_resume_ignores_other_algorithms(self, temp_dir, sample_image_path):
+        """Test results hashed with other options are not reused."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store, algorithm="phash-64-fast") as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+
+        with HashCheckpoint(store, resume=True) as checkpoint:
+            assert checkpoint.get(sample_image_path) is None
+        with HashCheckpoint(
+            store, resume=True, algorithm="phash-64-fast"
+        ) as checkpoint:
+            assert checkpoint.get(sample_image_path) is not None
+
+    def test_resume_requires_requested_metadata(self, temp_dir, sample_image_path):
+        """Test results without quality or capture data are misses when requested."""
+        store = temp_dir / "hashes.jsonl"
+        with HashCheckpoint(store) as checkpoint:
+            checkpoint.append(JPEGHasher.hash(sample_image_path))
+
+        with HashCheckpoint(store, resume=True) as checkpoint:
+            assert checkpoint.get(sample_image_path, quality=True) is None
+            assert checkpoint.get(sample_image_path, capture=True) is None
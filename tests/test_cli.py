@@ -0,0 +1,318 @@
+"""Tests for the command-line interface."""
+
+import pytest
+from PIL import Image
+
+from photocluster.cli import main
+
+
+@pytest.fixture
+def photo_dir(temp_dir):
+    """Create a directory with two near-identical images and one distinct one."""
+    photos = temp_dir / "photos"
+    photos.mkdir()
+    for i in range(2):
+        Image.new("RGB", (64, 64), color=(120 + i, 120, 120)).save(
+            photos / f"copy_{i}.jpg", "JPEG"
+        )
+    img = Image.new("RGB", (64, 64))
+    img.putdata(
+        [((x * 8) % 256, (y * 8) % 256, 0) for y in range(64) for x in range(64)]
+    )
+    img.save(photos / "other.jpg", "JPEG")
+    return photos
+
+
+class TestCli:
+    """Tests for the photocluster command line."""
+
+    def test_scan(self, photo_dir, capsys):
+        """Test scan reports the number of images."""
+        assert main(["scan", str(photo_dir)]) == 0
+
+        assert "3 images" in capsys.readouterr().out
+
+    def test_stages_individually(self, photo_dir, temp_dir, capsys):
+        """Test hash, cluster and group can be run as separate commands."""
+        hashes = temp_dir / "hashes.jsonl"
+        clusters = temp_dir / "clusters.jsonl"
+
+        hash_args = ["-o", str(hashes), "-j", "2", "--backend", "thread"]
+        assert main(["hash", str(photo_dir), *hash_args]) == 0
+        assert main(["cluster", str(hashes), "-o", str(clusters), "-s", "0.1"]) == 0
+        assert main(["group", str(clusters), str(photo_dir)]) == 0
+
+        assert (photo_dir / "group_0" / "copy_0.jpg").exists()
+        assert (photo_dir / "group_0" / "copy_1.jpg").exists()
+        assert (photo_dir / "other.jpg").exists()
+        assert "stage" in capsys.readouterr().err
+
+    def test_hash_resume_skips_done_files(self, photo_dir, temp_dir, capsys):
+        """Test resuming reuses hashes already in the checkpoint."""
+        hashes = temp_dir / "hashes.jsonl"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+        capsys.readouterr()
+
+        assert main(["hash", str(photo_dir), "-o", str(hashes), "--resume"]) == 0
+
+        assert "Reusing 3 hashes" in capsys.readouterr().err
+
+    def test_hash_cache_survives_moves(self, photo_dir, temp_dir, capsys):
+        """Test a content cache is reused after the photos are moved."""
+        cache = temp_dir / "cache.db"
+        main(
+            [
+                "hash",
+                str(photo_dir),
+                "-o",
+                str(temp_dir / "a.jsonl"),
+                "--cache",
+                str(cache),
+            ]
+        )
+        moved = photo_dir.rename(temp_dir / "moved")
+        capsys.readouterr()
+
+        args = ["-o", str(temp_dir / "b.jsonl"), "--cache", str(cache)]
+        assert main(["hash", str(moved), *args, "--cache-readonly"]) == 0
+
+        assert "Reusing 3 hashes from cache" in capsys.readouterr().err
+
+    def test_missing_readonly_cache(self, photo_dir, temp_dir, capsys):
+        """Test a missing read-only cache is a clean error, not a traceback."""
+        cache = temp_dir / "missing.db"
+        args = ["-o", str(temp_dir / "a.jsonl"), "--cache", str(cache)]
+
+        assert main(["hash", str(photo_dir), *args, "--cache-readonly"]) == 1
+
+        assert f"No hash cache at {cache}" in capsys.readouterr().err
+
+    def test_hash_profile(self, photo_dir, temp_dir, capsys):
+        """Test --profile-stats prints the stage breakdown and writes stats."""
+        stats = temp_dir / "hash.prof"
+        args = ["-o", str(temp_dir / "hashes.jsonl"), "--backend", "process"]
+
+        assert main(["hash", str(photo_dir), *args, "--profile-stats", str(stats)]) == 0
+
+        err = capsys.readouterr().err
+        assert "decode" in err
+        assert "queue wait" in err
+        assert stats.exists()
+
+    def test_run(self, photo_dir, temp_dir, capsys):
+        """Test run performs the whole pipeline with ranking."""
+        checkpoint = temp_dir / "hashes.jsonl"
+
+        code = main(
+            [
+                "run",
+                str(photo_dir),
+                "-s",
+                "0.1",
+                "--rank-quality",
+                "--checkpoint",
+                str(checkpoint),
+                "-j",
+                "1",
+            ]
+        )
+
+        assert code == 0
+        out = capsys.readouterr().out
+        assert "1 clusters, 1 unique images" in out
+        assert "representative" in out
+        assert checkpoint.exists()
+
+    def test_cluster_confirm_sensitivity(self, photo_dir, temp_dir, capsys):
+        """Test confirmed clustering of hashes computed with --confirm."""
+        hashes = temp_dir / "hashes.jsonl"
+        clusters = temp_dir / "clusters.jsonl"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1", "--confirm"])
+
+        code = main(
+            [
+                "cluster",
+                str(hashes),
+                "-o",
+                str(clusters),
+                "-s",
+                "0.1",
+                "--confirm-sensitivity",
+                "0.1",
+            ]
+        )
+
+        assert code == 0
+        assert "1 clusters, 1 unique images" in capsys.readouterr().out
+
+    def test_cluster_exported_hash_set(self, photo_dir, temp_dir, capsys):
+        """Test cluster reads the binary hash set written by hash --export."""
+        hashes = temp_dir / "hashes.jsonl"
+        exported = temp_dir / "hashes.phs"
+        clusters = temp_dir / "clusters.jsonl"
+        hash_args = ["-o", str(hashes), "-j", "1", "--export", str(exported)]
+        main(["hash", str(photo_dir), *hash_args])
+
+        code = main(["cluster", str(exported), "-o", str(clusters), "-s", "0.1"])
+
+        assert code == 0
+        assert "1 clusters, 1 unique images" in capsys.readouterr().out
+
+    def test_cluster_and_group_per_folder(self, photo_dir, temp_dir, capsys):
+        """Test per-folder clusters are grouped inside each folder."""
+        other_dir = photo_dir / "other_event"
+        other_dir.mkdir()
+        for name in ("copy_0.jpg", "copy_1.jpg"):
+            (other_dir / name).write_bytes((photo_dir / name).read_bytes())
+        hashes = temp_dir / "hashes.jsonl"
+        clusters = temp_dir / "clusters.jsonl"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+
+        main(["cluster", str(hashes), "-o", str(clusters), "-s", "0.1", "--per-folder"])
+        assert main(["group", str(clusters), "--per-folder"]) == 0
+
+        assert "2 clusters, 1 unique images" in capsys.readouterr().out
+        assert (photo_dir / "group_0" / "copy_0.jpg").exists()
+        assert (other_dir / "group_0" / "copy_1.jpg").exists()
+
+    def test_hash_reports_read_rate(self, photo_dir, temp_dir, capsys):
+        """Test a read limit prints the achieved rate."""
+        hashes = temp_dir / "hashes.jsonl"
+
+        code = main(
+            ["hash", str(photo_dir), "-o", str(hashes), "-j", "1"]
+            + ["--max-files-per-sec", "1000"]
+        )
+
+        assert code == 0
+        assert "read: 3 files" in capsys.readouterr().err
+
+    def test_cluster_approximate_with_recall(self, photo_dir, temp_dir, capsys):
+        """Test --recall is accepted for approximate clustering."""
+        hashes = temp_dir / "hashes.jsonl"
+        clusters = temp_dir / "clusters.jsonl"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+
+        code = main(
+            ["cluster", str(hashes), "-o", str(clusters), "-s", "0.1"]
+            + ["--approximate", "--recall", "0.999"]
+        )
+
+        assert code == 0
+        assert "1 clusters, 1 unique images" in capsys.readouterr().out
+
+    def test_graph_and_sweep(self, photo_dir, temp_dir, capsys):
+        """Test a saved neighbor graph can be swept and clustered."""
+        hashes = temp_dir / "hashes.jsonl"
+        graph = temp_dir / "graph.npz"
+        clusters = temp_dir / "clusters.jsonl"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+
+        assert main(["graph", str(hashes), "-o", str(graph)]) == 0
+        assert main(["sweep", str(graph), "-s", "0", "0.1"]) == 0
+        assert main(["cluster", str(graph), "-o", str(clusters), "-s", "0.1"]) == 0
+
+        out = capsys.readouterr().out
+        assert "sensitivity" in out
+        assert "1 clusters, 1 unique images" in out
+
+    def test_graph_rejects_larger_sensitivity(self, photo_dir, temp_dir, capsys):
+        """Test clustering a graph above its max sensitivity reports an error."""
+        hashes = temp_dir / "hashes.jsonl"
+        graph = temp_dir / "graph.npz"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+        main(["graph", str(hashes), "-o", str(graph), "--max-sensitivity", "0.1"])
+
+        code = main(["sweep", str(graph), "-s", "0.2"])
+
+        assert code == 1
+        assert "max_eps" in capsys.readouterr().err
+
+    def test_graph_rejects_per_folder(self, photo_dir, temp_dir):
+        """Test clustering a graph per folder fails instead of ignoring the flag."""
+        hashes = temp_dir / "hashes.jsonl"
+        graph = temp_dir / "graph.npz"
+        clusters = temp_dir / "clusters.jsonl"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+        main(["graph", str(hashes), "-o", str(graph)])
+
+        with pytest.raises(SystemExit, match="--per-folder need a hash file"):
+            main(["cluster", str(graph), "-o", str(clusters), "--per-folder"])
+
+        assert not clusters.exists()
+
+    def test_subgroups(self, photo_dir, capsys):
+        """Test run nests tighter subgroups inside each group."""
+        code = main(
+            [
+                "run",
+                str(photo_dir),
+                "-s",
+                "0.1",
+                "--subgroup-sensitivity",
+                "0",
+                "-j",
+                "1",
+            ]
+        )
+
+        assert code == 0
+        assert "1 subgroups" in capsys.readouterr().out
+        assert len(list((photo_dir / "group_0").rglob("*.jpg"))) == 2
+
+    def test_index_and_query(self, photo_dir, temp_dir, capsys):
+        """Test a hash file can be indexed and queried by image."""
+        hashes = temp_dir / "hashes.jsonl"
+        index = temp_dir / "index.npz"
+        main(["hash", str(photo_dir), "-o", str(hashes), "-j", "1"])
+
+        assert main(["index", str(hashes), "-o", str(index)]) == 0
+        assert (
+            main(["query", str(index), str(photo_dir / "copy_0.jpg"), "-k", "2"]) == 0
+        )
+
+        out = capsys.readouterr().out
+        assert "3 images indexed" in out
+        assert "copy_0.jpg: 2 matches" in out
+
+    @pytest.mark.parametrize(
+        "option",
+        [["-j", "0"], ["-j", "-2"], ["--prefetch-mb", "0"], ["--prefetch-mb", "-1"]],
+    )
+    def test_rejects_non_positive_counts(self, photo_dir, temp_dir, capsys, option):
+        """Test worker counts and prefetch sizes below 1 fail at parse time."""
+        output = ["-o", str(temp_dir / "hashes.jsonl")]
+        with pytest.raises(SystemExit):
+            main(["hash", str(photo_dir), *output, *option])
+
+        assert "must be 1 or greater" in capsys.readouterr().err
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            ["hash", "-o", "hashes.jsonl", "--confirm"],
+            ["run", "--confirm-sensitivity", "0.2"],
+        ],
+    )
+    def test_rejects_rotations_with_confirmation(self, photo_dir, capsys, command):
+        """Test --match-rotations with confirmation hashes fails before hashing."""
+        name, *options = command
+        with pytest.raises(SystemExit):
+            main([name, str(photo_dir), "--match-rotations", *options])
+
+        assert "--match-rotations cannot be combined" in capsys.readouterr().err
+
+    def test_rejects_invalid_sensitivity(self, photo_dir):
+        """Test out-of-range sensitivity is rejected by the parser."""
+        with pytest.raises(SystemExit):
+            main(["run", str(photo_dir), "-s", "1.5"])
+
+    @pytest.mark.parametrize(
+        "option", [["--match-rotations"], ["--confirm-sensitivity", "0.2"]]
+    )
+    def test_watch_rejects_unsupported_options(self, photo_dir, capsys, option):
+        """Test watch names the hash options it cannot honor."""
+        with pytest.raises(SystemExit):
+            main(["watch", str(photo_dir), *option])
+
+        assert f"{option[0]} is not supported by watch" in capsys.readouterr().err
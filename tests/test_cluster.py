@@ -1,11 +1,24 @@
 """Tests for clustering functionality."""
 
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import numpy as np
+import pytest
+from PIL import Image, ImageDraw
 
-from photocluster.internal.cluster import MIN_SAMPLES, cluster_hashes
-from photocluster.internal.models.image import ClusteredImage, ImageHash
+from photocluster.internal.cluster import (
+    MIN_SAMPLES,
+    cluster_bursts,
+    cluster_hashes,
+    cluster_per_folder,
+)
+from photocluster.internal.hasher.jpeg import (
+    CONFIRM_HASH_SIZE,
+    phash_bits,
+    phash_variants,
+)
+from photocluster.internal.models.image import CaptureInfo, ClusteredImage, ImageHash
 
 
 class TestClusterHashes:
@@ -104,7 +117,272 @@ class TestClusterHashes:
 
         assert isinstance(result[0].cluster_id, int)
 
+    def test_matches_dbscan_hamming_metric(self):
+        """Test exact labels equal sklearn DBSCAN on the hamming metric."""
+        from sklearn.cluster import DBSCAN
+
+        rng = np.random.default_rng(3)
+        centers = rng.integers(0, 2, (10, 64), dtype=np.uint8)
+        vectors = centers[rng.integers(0, 10, 60)]
+        vectors = np.where(rng.random(vectors.shape) < 0.05, 1 - vectors, vectors)
+        hash_data = [
+            ImageHash(path=Path(f"img{i}.jpg"), hash=v) for i, v in enumerate(vectors)
+        ]
+
+        labels = [c.cluster_id for c in cluster_hashes(hash_data, eps=0.15)]
+
+        expected = DBSCAN(eps=0.15, min_samples=MIN_SAMPLES, metric="hamming")
+        assert labels == expected.fit_predict(vectors).tolist()
+
     def test_min_samples_constant(self):
         """Test MIN_SAMPLES constant is defined."""
         assert isinstance(MIN_SAMPLES, int)
         assert MIN_SAMPLES >= 1
+
+
+class TestApproximateClustering:
+    """Tests for approximate (LSH) clustering mode."""
+
+    def test_matches_exact_on_near_duplicates(self):
+        """Test approximate labels agree with exact DBSCAN on clear groups."""
+        rng = np.random.default_rng(0)
+        hash_data = []
+        for group in range(5):
+            center = rng.integers(0, 2, 64, dtype=np.uint8)
+            for member in range(3):
+                variant = center.copy()
+                variant[member] ^= 1
+                hash_data.append(
+                    ImageHash(path=Path(f"g{group}_{member}.jpg"), hash=variant)
+                )
+
+        exact = cluster_hashes(hash_data, eps=0.1)
+        approx = cluster_hashes(hash_data, eps=0.1, approximate=True)
+
+        assert [c.cluster_id for c in approx] == [c.cluster_id for c in exact]
+
+    def test_single_image_is_noise(self, sample_hash):
+        """Test a lone hash is labelled as noise."""
+        hash_data = [ImageHash(path=Path("img1.jpg"), hash=sample_hash)]
+
+        result = cluster_hashes(hash_data, eps=0.2, approximate=True)
+
+        assert result[0].cluster_id == -1
+
+
+class TestRotationVariants:
+    """Tests for clustering hashes that carry rotation variants."""
+
+    @staticmethod
+    def _rotated_copies():
+        rng = np.random.default_rng(0)
+        hash_data = []
+        for name in ("a", "b"):
+            pixels = rng.integers(0, 256, (48, 64), dtype=np.uint8)
+            for i, copy in enumerate((pixels, np.rot90(pixels), pixels[:, ::-1])):
+                gray = Image.fromarray(np.ascontiguousarray(copy))
+                variants = phash_variants(gray)
+                hash_data.append(
+                    ImageHash(
+                        path=Path(f"{name}_{i}.jpg"),
+                        hash=variants[0],
+                        variants=variants,
+                    )
+                )
+        return hash_data
+
+    @pytest.mark.parametrize("approximate", [False, True])
+    def test_rotated_and_mirrored_copies_cluster(self, approximate):
+        """Test rotated and mirrored copies join the original's cluster."""
+        result = cluster_hashes(
+            self._rotated_copies(), eps=0.1, approximate=approximate
+        )
+
+        labels = [c.cluster_id for c in result]
+        assert labels[:3] == [labels[0]] * 3
+        assert labels[3:] == [labels[3]] * 3
+        assert labels[0] != labels[3] != -1
+
+    def test_without_variants_rotations_stay_apart(self):
+        """Test plain hashes do not match rotated copies."""
+        hash_data = [
+            ImageHash(path=h.path, hash=h.hash) for h in self._rotated_copies()
+        ]
+
+        result = cluster_hashes(hash_data, eps=0.1)
+
+        assert all(c.cluster_id == -1 for c in result)
+
+
+class TestConfirmation:
+    """Tests for confirming candidate pairs with the longer hash."""
+
+    @staticmethod
+    def _document(seed):
+        """Render a page of random word boxes: same layout, different text."""
+        rng = np.random.default_rng(seed)
+        page = Image.new("L", (600, 800), 255)
+        draw = ImageDraw.Draw(page)
+        for line in range(30):
+            y, x = 60 + line * 22, 60
+            while x < 540:
+                width = int(rng.integers(10, 60))
+                draw.rectangle([x, y, min(x + width, 540), y + 10], fill=30)
+                x += width + int(rng.integers(6, 14))
+        return page
+
+    def _hashes(self):
+        pages = [self._document(seed) for seed in range(8)]
+        pages.append(pages[0].resize((450, 600)).resize((600, 800)))
+        return [
+            ImageHash(
+                path=Path(f"page_{i}.jpg"),
+                hash=phash_bits(page),
+                confirm_hash=phash_bits(page, hash_size=CONFIRM_HASH_SIZE),
+            )
+            for i, page in enumerate(pages)
+        ]
+
+    def test_short_hash_alone_merges_documents(self):
+        """Test the 64-bit hash links different pages with the same layout."""
+        result = cluster_hashes(self._hashes(), eps=0.2)
+
+        assert sum(c.cluster_id != -1 for c in result) > 2
+
+    @pytest.mark.parametrize("approximate", [False, True])
+    def test_confirmation_keeps_only_true_duplicates(self, approximate):
+        """Test only the rescaled copy still joins its original."""
+        result = cluster_hashes(
+            self._hashes(), eps=0.2, approximate=approximate, confirm_eps=0.2
+        )
+
+        labels = [c.cluster_id for c in result]
+        assert labels[0] == labels[-1] != -1
+        assert all(label == -1 for label in labels[1:-1])
+
+    def test_bursts_confirm_fallback_pass(self):
+        """Test burst clustering applies confirmation as well."""
+        result = cluster_bursts(self._hashes(), eps=0.2, confirm_eps=0.2)
+
+        assert sum(c.cluster_id != -1 for c in result) == 2
+
+    def test_missing_confirm_hash_raises(self, sample_hash):
+        """Test confirmation needs a confirmation hash for every image."""
+        hash_data = [
+            ImageHash(path=Path("a.jpg"), hash=sample_hash),
+            ImageHash(path=Path("b.jpg"), hash=sample_hash),
+        ]
+
+        with pytest.raises(ValueError, match="confirmation hash"):
+            cluster_hashes(hash_data, eps=0.2, confirm_eps=0.2)
+
+
+class TestClusterBursts:
+    """Tests for burst-partitioned clustering."""
+
+    @staticmethod
+    def _image(name, bits, seconds):
+        timestamp = None
+        if seconds is not None:
+            timestamp = datetime(2024, 1, 1) + timedelta(seconds=seconds)
+        return ImageHash(
+            path=Path(name),
+            hash=np.array(bits, dtype=np.uint8),
+            capture=CaptureInfo(timestamp=timestamp, camera="cam"),
+        )
+
+    def test_clusters_within_burst(self):
+        """Test near-duplicates shot together are clustered."""
+        hash_data = [
+            self._image("a.jpg", [1, 0] * 32, 0),
+            self._image("b.jpg", [1, 0] * 32, 1),
+        ]
+
+        result = cluster_bursts(hash_data, eps=0.1, window=5)
+
+        assert result[0].cluster_id == result[1].cluster_id != -1
+
+    def test_fallback_pass_links_across_bursts(self):
+        """Test copies shot far apart are caught by the global fallback."""
+        hash_data = [
+            self._image("a.jpg", [1, 0] * 32, 0),
+            self._image("b.jpg", [1, 0] * 32, 3600),
+            self._image("c.jpg", [1, 0] * 32, None),
+        ]
+
+        result = cluster_bursts(hash_data, eps=0.1, window=5)
+
+        assert len({c.cluster_id for c in result}) == 1
+        assert result[0].cluster_id != -1
+
+    def test_stripped_copy_joins_burst_cluster(self):
+        """Test a copy without capture time joins the cluster of its burst."""
+        hash_data = [
+            self._image("a1.jpg", [1, 0] * 32, 0),
+            self._image("a2.jpg", [1, 0] * 32, 1),
+            self._image("stripped.jpg", [1, 0] * 32, None),
+            self._image("other.jpg", [0, 1] * 32, None),
+        ]
+
+        result = cluster_bursts(hash_data, eps=0.1, window=5)
+
+        labels = [c.cluster_id for c in result]
+        assert labels[:3] == [labels[0]] * 3
+        assert labels[0] != -1
+        assert labels[3] == -1
+
+    def test_fallback_merges_burst_clusters(self):
+        """Test copies clustered in two separate bursts end up in one cluster."""
+        hash_data = [
+            self._image("a1.jpg", [1, 0] * 32, 0),
+            self._image("a2.jpg", [1, 0] * 32, 1),
+            self._image("b1.jpg", [1, 0] * 32, 3600),
+            self._image("b2.jpg", [1, 0] * 32, 3601),
+        ]
+
+        result = cluster_bursts(hash_data, eps=0.1, window=5)
+
+        assert [c.cluster_id for c in result] == [0, 0, 0, 0]
+
+    def test_labels_are_unique_across_bursts(self):
+        """Test clusters from different bursts get different labels."""
+        hash_data = [
+            self._image("a1.jpg", [1, 0] * 32, 0),
+            self._image("a2.jpg", [1, 0] * 32, 1),
+            self._image("b1.jpg", [0, 1] * 32, 100),
+            self._image("b2.jpg", [0, 1] * 32, 101),
+        ]
+
+        result = cluster_bursts(hash_data, eps=0.1, window=5)
+
+        labels = [c.cluster_id for c in result]
+        assert labels[0] == labels[1]
+        assert labels[2] == labels[3]
+        assert labels[0] != labels[2]
+
+    def test_empty_input(self):
+        """Test empty input returns an empty list."""
+        assert cluster_bursts([], eps=0.1) == []
+
+
+class TestClusterPerFolder:
+    """Tests for cluster_per_folder function."""
+
+    def test_images_only_match_within_their_folder(self, sample_hash):
+        """Test identical hashes in different folders stay apart."""
+        hash_data = [
+            ImageHash(path=Path(folder) / name, hash=sample_hash)
+            for folder in ("x", "y", "x/group_0")
+            for name in ("a.jpg", "b.jpg")
+        ]
+
+        result = cluster_per_folder(
+            hash_data, lambda h: cluster_hashes(h, eps=0.2), workers=2
+        )
+
+        assert [c.path for c in result] == [h.path for h in hash_data]
+        assert [c.cluster_id for c in result] == [0, 0, 1, 1, 0, 0]
+
+    def test_empty_input(self):
+        """Test no hashes yields no clusters."""
+        assert cluster_per_folder([], lambda h: cluster_hashes(h, eps=0.2)) == []
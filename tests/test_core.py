@@ -1,5 +1,8 @@
 """Tests for photocluster core function."""
 
+import os
+
+import numpy as np
 from PIL import Image
 
 from photocluster.core import photocluster
@@ -221,3 +224,78 @@ class TestPhotocluster:
 
         # Non-JPEG file should remain
         assert (temp_dir / "readme.txt").exists()
+
+    def test_rank_quality_marks_representative(self, temp_dir):
+        """Test each cluster gets exactly one representative when ranking."""
+        for i in range(3):
+            Image.new("RGB", (100 + i * 10, 100), color=(90, 90, 90)).save(
+                temp_dir / f"copy_{i}.jpg", "JPEG"
+            )
+
+        result = photocluster(temp_dir, sensitivity=0.2, rank_quality=True)
+
+        clustered = [c for c in result if c.cluster_id != -1]
+        assert len(clustered) == 3
+        assert {c.rank for c in clustered} == {0, 1, 2}
+        assert all(c.path.exists() for c in result)
+
+    def test_rerun_keeps_layout(self, temp_dir):
+        """Test running again on an organized directory moves nothing."""
+        rng = np.random.default_rng(0)
+        for name in ("a", "b"):
+            pixels = rng.integers(0, 128, (100, 100), dtype=np.uint8)
+            for i in range(2):
+                Image.fromarray(pixels + i).save(temp_dir / f"{name}_{i}.jpg", "JPEG")
+        first = photocluster(temp_dir, sensitivity=0.1)
+
+        second = photocluster(temp_dir, sensitivity=0.1)
+
+        assert len({c.cluster_id for c in first}) == 2
+        assert sorted(c.path for c in second) == sorted(c.path for c in first)
+
+    def test_per_folder_groups_inside_each_folder(self, temp_dir):
+        """Test copies in different folders are grouped within their folder."""
+        for folder in ("day1", "day2"):
+            (temp_dir / folder).mkdir()
+            for i in range(2):
+                Image.new("RGB", (100, 100), color=(90 + i, 90, 90)).save(
+                    temp_dir / folder / f"copy_{i}.jpg", "JPEG"
+                )
+
+        result = photocluster(temp_dir, sensitivity=0.2, per_folder=True)
+
+        for folder in ("day1", "day2"):
+            for i in range(2):
+                assert (temp_dir / folder / "group_0" / f"copy_{i}.jpg").exists()
+        assert {c.path.parent.parent.name for c in result} == {"day1", "day2"}
+
+    def test_rate_limits(self, temp_dir):
+        """Test clustering with rate limits and a worker cap gives the same groups."""
+        for i in range(2):
+            Image.new("RGB", (100, 100), color=(90 + i, 90, 90)).save(
+                temp_dir / f"copy_{i}.jpg", "JPEG"
+            )
+
+        result = photocluster(
+            temp_dir,
+            sensitivity=0.2,
+            num_processes=1,
+            max_files_per_second=1000,
+            max_mb_per_second=100,
+        )
+
+        assert len({c.cluster_id for c in result}) == 1
+        assert (temp_dir / "group_0" / "copy_1.jpg").exists()
+
+    def test_niceness_leaves_caller_priority(self, temp_dir):
+        """Test only the hash workers are reniced, not the calling process."""
+        for i in range(2):
+            Image.new("RGB", (100, 100), color=(90 + i, 90, 90)).save(
+                temp_dir / f"copy_{i}.jpg", "JPEG"
+            )
+        before = os.nice(0)
+
+        photocluster(temp_dir, sensitivity=0.2, num_processes=1, niceness=5)
+        photocluster(temp_dir, sensitivity=0.2, num_processes=1, niceness=5)
+
+        assert os.nice(0) == before
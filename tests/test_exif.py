@@ -0,0 +1,106 @@
+"""Tests for EXIF capture metadata extraction."""
+
+import io
+from datetime import datetime
+
+from PIL import ExifTags, Image
+
+from photocluster.internal.exif import read_capture_info, read_thumbnail
+
+
+def _save_with_exif(path, datetime_original=None, serial=None, make=None, subsec=None):
+    exif = Image.Exif()
+    if make:
+        exif[ExifTags.Base.Make] = make
+        exif[ExifTags.Base.Model] = "Model X"
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    if datetime_original:
+        exif_ifd[ExifTags.Base.DateTimeOriginal] = datetime_original
+    if subsec:
+        exif_ifd[ExifTags.Base.SubsecTimeOriginal] = subsec
+    if serial:
+        exif_ifd[ExifTags.Base.BodySerialNumber] = serial
+    Image.new("RGB", (10, 10)).save(path, "JPEG", exif=exif)
+
+
+class TestReadCaptureInfo:
+    """Tests for read_capture_info function."""
+
+    def test_reads_timestamp_and_serial(self, temp_dir):
+        """Test DateTimeOriginal and BodySerialNumber are extracted."""
+        path = temp_dir / "shot.jpg"
+        _save_with_exif(path, "2024:05:01 12:30:15", serial="ABC123", make="Canon")
+
+        info = read_capture_info(Image.open(path))
+
+        assert info.timestamp == datetime(2024, 5, 1, 12, 30, 15)
+        assert info.camera == "ABC123"
+
+    def test_falls_back_to_make_and_model(self, temp_dir):
+        """Test camera identity uses make and model without a serial."""
+        path = temp_dir / "shot.jpg"
+        _save_with_exif(path, "2024:05:01 12:30:15", make="Canon")
+
+        info = read_capture_info(Image.open(path))
+
+        assert info.camera == "Canon Model X"
+
+    def test_reads_subseconds(self, temp_dir):
+        """Test SubsecTimeOriginal refines the timestamp."""
+        path = temp_dir / "shot.jpg"
+        _save_with_exif(path, "2024:05:01 12:30:15", subsec="25")
+
+        info = read_capture_info(Image.open(path))
+
+        assert info.timestamp == datetime(2024, 5, 1, 12, 30, 15, 250000)
+
+    def test_missing_exif(self, sample_image_path):
+        """Test images without EXIF yield empty capture info."""
+        info = read_capture_info(Image.open(sample_image_path))
+
+        assert info.timestamp is None
+        assert info.camera is None
+
+    def test_invalid_timestamp(self, temp_dir):
+        """Test zeroed-out dates are treated as missing."""
+        path = temp_dir / "shot.jpg"
+        _save_with_exif(path, "0000:00:00 00:00:00")
+
+        assert read_capture_info(Image.open(path)).timestamp is None
+
+
+class TestReadThumbnail:
+    """Tests for read_thumbnail function."""
+
+    def test_extracts_ifd1_thumbnail(self, temp_dir, save_with_thumbnail):
+        """Test the embedded preview's JPEG bytes are returned."""
+        path = save_with_thumbnail(
+            temp_dir / "shot.jpg",
+            Image.new("RGB", (400, 300)),
+            Image.new("RGB", (160, 120), color=(0, 200, 0)),
+        )
+
+        with Image.open(path) as img:
+            data = read_thumbnail(img)
+
+        assert data is not None
+        with Image.open(io.BytesIO(data)) as thumbnail:
+            assert thumbnail.size == (160, 120)
+
+    def test_missing_thumbnail(self, sample_image_path):
+        """Test images without EXIF have no thumbnail."""
+        with Image.open(sample_image_path) as img:
+            assert read_thumbnail(img) is None
+
+    def test_rejects_disagreeing_orientation(self, temp_dir, save_with_thumbnail):
+        """Test a thumbnail oriented differently from the image is ignored."""
+        path = save_with_thumbnail(
+            temp_dir / "shot.jpg",
+            Image.new("RGB", (400, 300)),
+            Image.new("RGB", (160, 120)),
+            orientation=1,
+            thumb_orientation=6,
+        )
+
+        with Image.open(path) as img:
+            assert read_thumbnail(img) is None
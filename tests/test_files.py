@@ -3,7 +3,15 @@
 from PIL import Image
 
 from photocluster.internal.models.image import ClusteredImage
-from photocluster.internal.util.files import find_image_files, group_image_files
+from photocluster.internal.util.files import (
+    content_digest,
+    find_image_files,
+    group_by_folder,
+    group_image_files,
+    image_folder,
+    partial_digest,
+    stable_cluster_ids,
+)
 
 
 class TestFindImageFiles:
@@ -124,3 +132,217 @@ class TestGroupImageFiles:
 
         assert output_dir.exists()
         assert (output_dir / "group_0" / "image.jpg").exists()
+
+    def test_returns_final_locations(self, temp_dir):
+        """Test the returned images point at where the files now live."""
+        img1 = temp_dir / "image1.jpg"
+        img2 = temp_dir / "image2.jpg"
+        Image.new("RGB", (10, 10)).save(img1, "JPEG")
+        Image.new("RGB", (10, 10)).save(img2, "JPEG")
+
+        result = group_image_files(
+            [ClusteredImage(path=img1, cluster_id=0), ClusteredImage(img2, -1)],
+            temp_dir,
+        )
+
+        assert result[0].path == temp_dir / "group_0" / "image1.jpg"
+        assert result[1].path == img2
+        assert all(c.path.exists() for c in result)
+
+    def test_nests_subgroups(self, temp_dir):
+        """Test images with a subcluster are moved into group_N/subgroup_M."""
+        img1 = temp_dir / "image1.jpg"
+        img2 = temp_dir / "image2.jpg"
+        Image.new("RGB", (10, 10)).save(img1, "JPEG")
+        Image.new("RGB", (10, 10)).save(img2, "JPEG")
+
+        result = group_image_files(
+            [
+                ClusteredImage(path=img1, cluster_id=0, subcluster_id=1),
+                ClusteredImage(path=img2, cluster_id=0, subcluster_id=-1),
+            ],
+            temp_dir,
+        )
+
+        assert result[0].path == temp_dir / "group_0" / "subgroup_1" / "image1.jpg"
+        assert result[1].path == temp_dir / "group_0" / "image2.jpg"
+
+
+class TestStableClusterIds:
+    """Tests for stable_cluster_ids and reruns of group_image_files."""
+
+    @staticmethod
+    def _place(path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (10, 10)).save(path, "JPEG")
+        return path
+
+    def test_rerun_with_permuted_labels_moves_nothing(self, temp_dir):
+        """Test clusters keep the group directories holding their members."""
+        a = self._place(temp_dir / "group_0" / "a.jpg")
+        b = self._place(temp_dir / "group_1" / "b.jpg")
+        c = self._place(temp_dir / "group_1" / "c.jpg")
+
+        result = group_image_files(
+            [
+                ClusteredImage(path=a, cluster_id=1),
+                ClusteredImage(path=b, cluster_id=0),
+                ClusteredImage(path=c, cluster_id=0),
+            ],
+            temp_dir,
+        )
+
+        assert [r.path for r in result] == [a, b, c]
+        assert [r.cluster_id for r in result] == [0, 1, 1]
+
+    def test_only_changed_members_move(self, temp_dir):
+        """Test a file joining another cluster is the only one moved."""
+        a = self._place(temp_dir / "group_0" / "a.jpg")
+        b = self._place(temp_dir / "group_0" / "b.jpg")
+        c = self._place(temp_dir / "group_4" / "c.jpg")
+        d = self._place(temp_dir / "group_4" / "d.jpg")
+
+        result = group_image_files(
+            [
+                ClusteredImage(path=a, cluster_id=0),
+                ClusteredImage(path=b, cluster_id=1),
+                ClusteredImage(path=c, cluster_id=1),
+                ClusteredImage(path=d, cluster_id=1),
+            ],
+            temp_dir,
+        )
+
+        assert [r.path for r in result] == [a, temp_dir / "group_4" / "b.jpg", c, d]
+
+    def test_new_cluster_avoids_existing_directories(self, temp_dir):
+        """Test a cluster with no previous members gets an unused id."""
+        a = self._place(temp_dir / "group_0" / "a.jpg")
+        new = self._place(temp_dir / "new.jpg")
+
+        result = stable_cluster_ids(
+            [
+                ClusteredImage(path=new, cluster_id=0),
+                ClusteredImage(path=a, cluster_id=1),
+            ],
+            temp_dir,
+        )
+
+        assert [r.cluster_id for r in result] == [1, 0]
+
+    def test_unique_image_leaves_group(self, temp_dir):
+        """Test a file that no longer has duplicates moves back to the root."""
+        a = self._place(temp_dir / "group_2" / "a.jpg")
+
+        result = group_image_files([ClusteredImage(path=a, cluster_id=-1)], temp_dir)
+
+        assert result[0].path == temp_dir / "a.jpg"
+        assert not (temp_dir / "group_2").exists()
+
+    def test_unique_image_does_not_overwrite_root_file(self, temp_dir):
+        """Test a file moving back to the root keeps an existing namesake."""
+        a = self._place(temp_dir / "group_2" / "a.jpg")
+        existing = temp_dir / "a.jpg"
+        existing.write_bytes(b"keep me")
+
+        result = group_image_files([ClusteredImage(path=a, cluster_id=-1)], temp_dir)
+
+        assert existing.read_bytes() == b"keep me"
+        assert result[0].path == temp_dir / "a_1.jpg"
+        assert result[0].path.exists()
+
+    def test_same_names_in_one_group_are_kept(self, temp_dir):
+        """Test files with the same name from different folders both survive."""
+        a = self._place(temp_dir / "day1" / "a.jpg")
+        b = self._place(temp_dir / "day2" / "a.jpg")
+
+        result = group_image_files(
+            [
+                ClusteredImage(path=a, cluster_id=0),
+                ClusteredImage(path=b, cluster_id=0),
+            ],
+            temp_dir,
+        )
+
+        assert [r.path.name for r in result] == ["a.jpg", "a_1.jpg"]
+        assert all(r.path.parent == temp_dir / "group_0" for r in result)
+
+    def test_subgroups_keep_their_directories(self, temp_dir):
+        """Test subcluster ids are matched within their group."""
+        a = self._place(temp_dir / "group_0" / "subgroup_3" / "a.jpg")
+        b = self._place(temp_dir / "group_0" / "subgroup_3" / "b.jpg")
+
+        result = stable_cluster_ids(
+            [
+                ClusteredImage(path=a, cluster_id=5, subcluster_id=0),
+                ClusteredImage(path=b, cluster_id=5, subcluster_id=0),
+            ],
+            temp_dir,
+        )
+
+        assert [(r.cluster_id, r.subcluster_id) for r in result] == [(0, 3), (0, 3)]
+
+
+class TestFolders:
+    """Tests for image_folder and group_by_folder functions."""
+
+    def test_group_directories_belong_to_their_folder(self, temp_dir):
+        """Test group_N and subgroup_M directories map to the folder above."""
+        event = temp_dir / "2024-06-01 wedding"
+
+        assert image_folder(event / "a.jpg") == event
+        assert image_folder(event / "group_3" / "a.jpg") == event
+        assert image_folder(event / "group_3" / "subgroup_0" / "a.jpg") == event
+        assert image_folder(event / "subgroup_0" / "a.jpg") == event / "subgroup_0"
+
+    def test_groups_inside_each_folder(self, temp_dir):
+        """Test each folder gets its own group directories."""
+        paths = []
+        for folder in ("x", "y"):
+            for name in ("a", "b"):
+                path = temp_dir / folder / f"{name}.jpg"
+                path.parent.mkdir(exist_ok=True)
+                Image.new("RGB", (10, 10)).save(path, "JPEG")
+                paths.append(path)
+
+        result = group_by_folder(
+            [
+                ClusteredImage(path=paths[0], cluster_id=0),
+                ClusteredImage(path=paths[1], cluster_id=0),
+                ClusteredImage(path=paths[2], cluster_id=-1),
+                ClusteredImage(path=paths[3], cluster_id=-1),
+            ]
+        )
+
+        assert [r.path for r in result] == [
+            temp_dir / "x" / "group_0" / "a.jpg",
+            temp_dir / "x" / "group_0" / "b.jpg",
+            temp_dir / "y" / "a.jpg",
+            temp_dir / "y" / "b.jpg",
+        ]
+
+
+class TestDigests:
+    """Tests for content_digest and partial_digest functions."""
+
+    def test_content_digest_depends_only_on_contents(self):
+        """Test equal bytes give equal digests and different bytes do not."""
+        assert content_digest(b"abc") == content_digest(b"abc")
+        assert content_digest(b"abc") != content_digest(b"abd")
+
+    def test_partial_digest_reports_size(self, temp_dir):
+        """Test the fingerprint includes the file size."""
+        path = temp_dir / "data.bin"
+        path.write_bytes(b"x" * 1000)
+
+        size, _ = partial_digest(path)
+
+        assert size == 1000
+
+    def test_partial_digest_reads_tail(self, temp_dir):
+        """Test files differing only near the end get different fingerprints."""
+        first = temp_dir / "a.bin"
+        second = temp_dir / "b.bin"
+        first.write_bytes(b"\0" * 300_000 + b"a")
+        second.write_bytes(b"\0" * 300_000 + b"b")
+
+        assert partial_digest(first) != partial_digest(second)
@@ -0,0 +1,181 @@
+"""Golden-corpus tests: every hashing backend reproduces the recorded results.
+
+A fixed synthetic corpus is hashed by each execution backend. The hashes
+and cluster labels must match ``golden_corpus.json`` bit for bit, so an
+optimization of the hash pipeline cannot silently change clustering. After
+an intended change to the hash, rewrite the file with::
+
+    PHOTOCLUSTER_UPDATE_GOLDEN=1 python -m pytest tests/test_golden.py
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photocluster.internal.cache import HashCache
+from photocluster.internal.cluster import cluster_hashes
+from photocluster.internal.hasher.core import (
+    HashPool,
+    compute_hashes,
+    hash_algorithm,
+    iter_hashes,
+)
+from photocluster.internal.models.image import ImageHash
+from photocluster.internal.util.processing import Backend
+
+GOLDEN_PATH = Path(__file__).parent / "golden_corpus.json"
+UPDATE_ENV = "PHOTOCLUSTER_UPDATE_GOLDEN"
+GROUPS = 6
+COPIES = 3
+SINGLES = 4
+IMAGE_SIZE = (320, 240)
+SENSITIVITY = 0.2
+WORKERS = 2
+# Generous wall-time limits: they catch accidental repeated decodes or a
+# serialized pool, not small slowdowns, which benchmarks/ measures instead.
+STARTUP_SECONDS = 5.0
+SECONDS_PER_IMAGE = 0.25
+
+Runner = Callable[[list[Path], bool, Path], list[ImageHash]]
+
+
+def write_corpus(directory: Path) -> list[Path]:
+    """Write groups of re-encoded near-duplicates and unrelated singles."""
+    rng = np.random.default_rng(50)
+    paths = []
+
+    def scene() -> Image.Image:
+        # Smooth random structure, so copies survive re-encoding while
+        # different scenes differ in about half of the hash bits.
+        blocks = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+        return Image.fromarray(blocks).resize(IMAGE_SIZE, Image.Resampling.BICUBIC)
+
+    for group in range(GROUPS):
+        base = scene()
+        for copy in range(COPIES):
+            pixels = np.asarray(base, dtype=np.int16) + 3 * copy
+            path = directory / f"group{group}_copy{copy}.jpg"
+            Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(
+                path, "JPEG", quality=95 - 10 * copy
+            )
+            paths.append(path)
+    for single in range(SINGLES):
+        path = directory / f"single{single}.jpg"
+        scene().save(path, "JPEG", quality=90)
+        paths.append(path)
+    return sorted(paths)
+
+
+def _hex(bits: np.ndarray) -> str:
+    return np.packbits(bits).tobytes().hex()
+
+
+def _partition(hash_data: list[ImageHash]) -> list[list[str]]:
+    """Cluster membership by file name, independent of label numbering.
+
+    Unique images (label -1) each count as a cluster of their own.
+    """
+    members: dict[int | str, list[str]] = {}
+    for clustered in cluster_hashes(hash_data, eps=SENSITIVITY):
+        name = clustered.path.name
+        key = name if clustered.cluster_id == -1 else clustered.cluster_id
+        members.setdefault(key, []).append(name)
+    return sorted(sorted(names) for names in members.values())
+
+
+def _record(hash_data: list[ImageHash]) -> dict:
+    return {
+        "hashes": {r.path.name: _hex(r.hash) for r in hash_data},
+        "clusters": _partition(hash_data),
+    }
+
+
+def _iter(**options: Any) -> Runner:
+    def run(paths: list[Path], fast: bool, tmp: Path) -> list[ImageHash]:
+        return list(iter_hashes(paths, WORKERS, fast=fast, **options))
+
+    return run
+
+
+def _pool(backend: Backend) -> Runner:
+    def run(paths: list[Path], fast: bool, tmp: Path) -> list[ImageHash]:
+        with HashPool(WORKERS, backend=backend, fast=fast) as pool:
+            return pool.hash(paths)
+
+    return run
+
+
+def _cached(paths: list[Path], fast: bool, tmp: Path) -> list[ImageHash]:
+    # The first run fills the cache; the second must be served from it alone.
+    algorithm = hash_algorithm(fast)
+    with HashCache(tmp / "cache.db", algorithm=algorithm) as cache:
+        compute_hashes(paths[0].parent, WORKERS, cache=cache, fast=fast)
+    with HashCache(tmp / "cache.db", algorithm=algorithm) as cache:
+        result = compute_hashes(paths[0].parent, WORKERS, cache=cache, fast=fast)
+        assert cache.misses == 0
+    return result
+
+
+BACKENDS: dict[str, Runner] = {
+    "process": _iter(backend="process"),
+    "thread": _iter(backend="thread"),
+    "prefetch-process": _iter(backend="process", prefetch=True),
+    "prefetch-thread": _iter(backend="thread", prefetch=True),
+    "memory-budget": _iter(memory_budget=1024 * 1024),
+    "largest-first": _iter(largest_first=True),
+    "hash-pool-process": _pool("process"),
+    "hash-pool-thread": _pool("thread"),
+    "cache": _cached,
+}
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory: pytest.TempPathFactory) -> list[Path]:
+    """The golden corpus, written once for the module."""
+    return write_corpus(tmp_path_factory.mktemp("golden"))
+
+
+@pytest.fixture(scope="module")
+def golden(corpus: list[Path]) -> dict:
+    """Recorded results, rewritten first when PHOTOCLUSTER_UPDATE_GOLDEN is set."""
+    if os.environ.get(UPDATE_ENV):
+        reference = BACKENDS["process"]
+        recorded = {
+            hash_algorithm(fast): _record(reference(corpus, fast, corpus[0].parent))
+            for fast in (False, True)
+        }
+        GOLDEN_PATH.write_text(json.dumps(recorded, indent=2) + "\n")
+    return json.loads(GOLDEN_PATH.read_text())
+
+
+class TestGoldenCorpus:
+    """Tests every backend against the recorded golden results."""
+
+    def test_corpus_clusters_as_designed(self, golden):
+        """Test the recorded clusters are the groups the corpus was built with."""
+        expected = sorted(
+            [f"group{g}_copy{c}.jpg" for c in range(COPIES)] for g in range(GROUPS)
+        ) + [[f"single{s}.jpg"] for s in range(SINGLES)]
+
+        assert golden[hash_algorithm()]["clusters"] == sorted(expected)
+
+    @pytest.mark.parametrize("fast", [False, True], ids=["full", "fast"])
+    @pytest.mark.parametrize("backend", list(BACKENDS))
+    def test_backend_matches_golden(self, corpus, golden, tmp_path, backend, fast):
+        """Test a backend reproduces the golden hashes and clusters in time."""
+        start = time.perf_counter()
+        hash_data = BACKENDS[backend](corpus, fast, tmp_path)
+        elapsed = time.perf_counter() - start
+
+        expected = golden[hash_algorithm(fast)]
+        actual = _record(hash_data)
+        assert actual["hashes"] == expected["hashes"]
+        assert actual["clusters"] == expected["clusters"]
+        assert elapsed < STARTUP_SECONDS + SECONDS_PER_IMAGE * len(corpus)
@@ -0,0 +1,68 @@
+"""Tests for the precomputed neighbor graph."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from photocluster.internal.cluster import cluster_hashes
+from photocluster.internal.graph import NeighborGraph
+from photocluster.internal.models.image import ImageHash
+
+
+@pytest.fixture
+def hash_data():
+    """Create hashes forming clusters that merge as eps grows."""
+    rng = np.random.default_rng(0)
+    results = []
+    for base_index in range(5):
+        base = rng.integers(0, 2, 64, dtype=np.uint8)
+        for flips in range(4):
+            vector = base.copy()
+            vector[: flips * 3] ^= 1
+            results.append(
+                ImageHash(path=Path(f"img_{base_index}_{flips}.jpg"), hash=vector)
+            )
+    return results
+
+
+class TestNeighborGraph:
+    """Tests for NeighborGraph."""
+
+    @pytest.mark.parametrize("eps", [0.0, 0.05, 0.1, 0.2, 0.3])
+    def test_matches_direct_clustering(self, hash_data, eps):
+        """Test labels from the graph match clustering the hashes directly."""
+        graph = NeighborGraph.build(hash_data, max_eps=0.3)
+
+        assert graph.cluster(eps) == cluster_hashes(hash_data, eps=eps)
+
+    def test_edges_sorted_by_distance(self, hash_data):
+        """Test stored edges are in ascending distance order."""
+        graph = NeighborGraph.build(hash_data, max_eps=0.3)
+
+        assert np.all(np.diff(graph.distances) >= 0)
+
+    def test_rejects_eps_above_max(self, hash_data):
+        """Test asking for a larger eps than the graph was built for fails."""
+        graph = NeighborGraph.build(hash_data, max_eps=0.1)
+
+        with pytest.raises(ValueError, match="max_eps"):
+            graph.labels(0.2)
+
+    def test_save_load_round_trip(self, hash_data, temp_dir):
+        """Test a saved graph loads back with identical labels."""
+        graph = NeighborGraph.build(hash_data, max_eps=0.3)
+        path = temp_dir / "graph.npz"
+
+        graph.save(path)
+        loaded = NeighborGraph.load(path)
+
+        assert loaded.paths == graph.paths
+        assert loaded.max_eps == graph.max_eps
+        assert np.array_equal(loaded.labels(0.1), graph.labels(0.1))
+
+    def test_empty_input(self):
+        """Test an empty graph yields no labels."""
+        graph = NeighborGraph.build([], max_eps=0.3)
+
+        assert graph.cluster(0.2) == []
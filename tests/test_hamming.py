@@ -0,0 +1,141 @@
+"""Tests for Hamming-space helpers."""
+
+import numpy as np
+import pytest
+
+from photocluster.internal.hamming import (
+    _block_pairs,
+    _build_kernel,
+    eps_to_radius,
+    native_kernel,
+    pack_bits,
+    pack_variants,
+    pair_distances,
+    radius_pairs,
+)
+
+
+class TestPackBits:
+    """Tests for pack_bits function."""
+
+    def test_packs_64_bits_into_one_word(self):
+        """Test a 64-bit hash packs into a single uint64 word."""
+        vectors = np.zeros((3, 64), dtype=np.uint8)
+
+        packed = pack_bits(vectors)
+
+        assert packed.shape == (3, 1)
+        assert packed.dtype == np.uint64
+
+    def test_pads_partial_words(self):
+        """Test hashes that are not a multiple of 64 bits are padded."""
+        vectors = np.ones((2, 8), dtype=np.uint8)
+
+        packed = pack_bits(vectors)
+
+        assert packed.shape == (2, 1)
+
+
+class TestPairDistances:
+    """Tests for pair_distances function."""
+
+    def test_counts_differing_bits(self):
+        """Test distances equal the number of differing bits."""
+        a = np.zeros(64, dtype=np.uint8)
+        b = a.copy()
+        b[:5] = 1
+        packed = pack_bits(np.stack([a, b]))
+
+        result = pair_distances(packed, np.array([0, 0]), np.array([0, 1]))
+
+        assert list(result) == [0, 5]
+
+
+class TestEpsToRadius:
+    """Tests for eps_to_radius function."""
+
+    def test_matches_proportion_comparison(self):
+        """Test radius is the largest bit count within eps."""
+        assert eps_to_radius(0.2, 64) == 12
+        assert eps_to_radius(0.25, 64) == 16
+
+    def test_zero_eps(self):
+        """Test eps of zero only matches identical hashes."""
+        assert eps_to_radius(0.0, 64) == 0
+
+
+class TestRadiusPairs:
+    """Tests for radius_pairs function."""
+
+    def test_matches_brute_force(self):
+        """Test every pair within the radius is found exactly once."""
+        rng = np.random.default_rng(0)
+        vectors = rng.integers(0, 2, (40, 64), dtype=np.uint8)
+        vectors[20:] = vectors[:20]
+        vectors[20:, :3] ^= 1
+        expected = {
+            (i, j)
+            for i in range(40)
+            for j in range(i + 1, 40)
+            if np.count_nonzero(vectors[i] != vectors[j]) <= 5
+        }
+
+        rows, cols, distances = radius_pairs(pack_bits(vectors), 5, block_elements=64)
+
+        assert set(zip(rows.tolist(), cols.tolist(), strict=True)) == expected
+        assert len(rows) == len(expected)
+        assert np.all(distances <= 5)
+
+    def test_variants_use_closest_variant(self):
+        """Test a pair matches when a variant of either hash is close."""
+        rng = np.random.default_rng(1)
+        vectors = rng.integers(0, 2, (2, 64), dtype=np.uint8)
+        variants = np.stack([vectors, 1 - vectors], axis=1)
+        variants[1, 1] = vectors[0]  # the second image's variant is the first
+        packed, packed_variants = pack_bits(vectors), pack_variants(variants)
+
+        rows, cols, distances = radius_pairs(packed, 0, variants=packed_variants)
+        pair = pair_distances(packed, np.array([1]), np.array([0]), packed_variants)
+
+        assert (rows.tolist(), cols.tolist(), distances.tolist()) == ([0], [1], [0])
+        assert pair.tolist() == [0]
+
+    def test_threads_return_pairs_in_order(self):
+        """Test blocks run on threads give the single-threaded result."""
+        rng = np.random.default_rng(2)
+        packed = pack_bits(rng.integers(0, 2, (50, 64), dtype=np.uint8))
+
+        serial = radius_pairs(packed, 28, block_elements=64, workers=1, native=False)
+        threaded = radius_pairs(packed, 28, block_elements=64, workers=4, native=False)
+
+        assert len(serial[0]) > 0
+        for expected, actual in zip(serial, threaded, strict=True):
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_native_kernel_matches_numpy(self):
+        """Test the numba kernel finds the same pairs in the same order."""
+        if native_kernel() is None:
+            pytest.skip("numba is not installed")
+        rng = np.random.default_rng(3)
+        packed = pack_bits(rng.integers(0, 2, (61, 128), dtype=np.uint8))
+
+        expected = radius_pairs(packed, 56, native=False)
+        actual = radius_pairs(packed, 56)
+
+        for want, got in zip(expected, actual, strict=True):
+            np.testing.assert_array_equal(got, want)
+
+    def test_python_kernel_matches_block_pairs(self):
+        """Test the native kernel's logic, run as plain Python, finds the same pairs."""
+        rng = np.random.default_rng(3)
+        packed = pack_bits(rng.integers(0, 2, (41, 128), dtype=np.uint8))
+        kernel = _build_kernel(lambda **options: lambda f: f, range, lambda n: None)
+
+        expected = _block_pairs(packed, 0, len(packed), 56, None)
+        # The popcount multiply overflows on purpose, as it does compiled.
+        with np.errstate(over="ignore"):
+            actual = kernel(packed, 56, 1)
+
+        assert len(expected[0]) > 0
+        for want, got in zip(expected, actual, strict=True):
+            np.testing.assert_array_equal(got, want)
@@ -1,10 +1,20 @@
 """Tests for hasher core module."""
 
+import numpy as np
 import pytest
 from PIL import Image
 
-from photocluster.internal.hasher.core import Hasher, compute_hashes
+from photocluster.internal.cache import HashCache
+from photocluster.internal.hasher.core import (
+    Hasher,
+    HashPool,
+    compute_hashes,
+    iter_hashes,
+)
 from photocluster.internal.models.image import ImageHash
+from photocluster.internal.util.files import content_digest
+from photocluster.internal.util.processing import CancellationToken
+from photocluster.internal.util.progress import WorkerLoads
 
 
 class TestHasher:
@@ -47,6 +57,21 @@ class TestHasher:
         with pytest.raises(ValueError, match="No hasher available"):
             hasher(txt_path)
 
+    def test_hasher_records_digest(self, temp_dir):
+        """Test the content digest is recorded when requested."""
+        img = temp_dir / "test.jpg"
+        Image.new("RGB", (10, 10)).save(img, "JPEG")
+
+        result = Hasher(digest=True)(img)
+
+        assert result.digest == content_digest(img.read_bytes())
+        assert Hasher()(img).digest is None
+
+    def test_hasher_rejects_confirmed_variants(self):
+        """Test confirmation hashes are not combined with rotation variants."""
+        with pytest.raises(ValueError, match="rotation variants"):
+            Hasher(dihedral=True, confirm=True)
+
 
 class TestComputeHashes:
     """Tests for compute_hashes function."""
@@ -116,3 +141,216 @@ class TestComputeHashes:
         result = compute_hashes(temp_dir, num_processes=1)
 
         assert len(result) == 2
+
+    def test_compute_hashes_largest_first_keeps_scan_order(self, temp_dir):
+        """Test size-ordered scheduling still returns hashes in scan order."""
+        for i in range(5):
+            img = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (10 + i * 30, 10), color=(i * 50, 0, 0)).save(img)
+
+        direct = compute_hashes(temp_dir, num_processes=2)
+        scheduled = compute_hashes(temp_dir, num_processes=2, largest_first=True)
+
+        assert [r.path for r in scheduled] == [r.path for r in direct]
+
+    def test_compute_hashes_reuses_cache_after_move(self, temp_dir):
+        """Test files moved to a new directory are not hashed again."""
+        photos = temp_dir / "photos"
+        photos.mkdir()
+        for i in range(3):
+            Image.new("RGB", (20, 20), color=(i * 80, 0, 0)).save(photos / f"{i}.jpg")
+
+        with HashCache(temp_dir / "cache.db") as cache:
+            first = compute_hashes(photos, num_processes=1, cache=cache)
+        photos.rename(temp_dir / "moved")
+        with HashCache(temp_dir / "cache.db") as cache:
+            second = compute_hashes(temp_dir / "moved", num_processes=1, cache=cache)
+
+        assert cache.hits == 3
+        assert [r.path.name for r in second] == [r.path.name for r in first]
+        assert all(
+            np.array_equal(a.hash, b.hash) for a, b in zip(first, second, strict=True)
+        )
+
+    def test_compute_hashes_rejects_cache_of_other_algorithm(self, temp_dir):
+        """Test fast hashes are not mixed with cached full-decode hashes."""
+        Image.new("RGB", (20, 20)).save(temp_dir / "a.jpg")
+
+        with (
+            HashCache(temp_dir / "cache.db") as cache,
+            pytest.raises(ValueError, match="Cache holds"),
+        ):
+            compute_hashes(temp_dir, num_processes=1, cache=cache, fast=True)
+
+    def test_compute_hashes_reports_each_result(self, temp_dir):
+        """Test on_result sees every result with running progress."""
+        for i in range(4):
+            Image.new("RGB", (20, 20), color=(i * 60, 0, 0)).save(temp_dir / f"{i}.jpg")
+        seen = []
+
+        result = compute_hashes(
+            temp_dir,
+            num_processes=2,
+            on_result=lambda r, p: seen.append((r.path, p.done, p.total)),
+        )
+
+        assert sorted(path for path, _, _ in seen) == sorted(r.path for r in result)
+        assert [(done, total) for _, done, total in seen] == [
+            (i, 4) for i in (1, 2, 3, 4)
+        ]
+
+    @pytest.mark.parametrize("prefetch", [False, True])
+    def test_compute_hashes_cancel_returns_partial_results(self, temp_dir, prefetch):
+        """Test cancelling stops the workers and keeps finished results."""
+        for i in range(40):
+            Image.new("RGB", (20, 20), color=(i, 0, 0)).save(temp_dir / f"{i:02d}.jpg")
+        cancel = CancellationToken()
+        seen = []
+
+        def on_result(result, progress):
+            seen.append(result.path)
+            if progress.done == 2:
+                cancel.cancel()
+
+        result = compute_hashes(
+            temp_dir,
+            num_processes=1,
+            prefetch=prefetch,
+            backend="thread",
+            on_result=on_result,
+            cancel=cancel,
+        )
+
+        assert len(result) == 2
+        assert {r.path for r in result} == set(seen)
+
+
+class TestIterHashes:
+    """Tests for iter_hashes function."""
+
+    def test_yields_results_in_input_order(self, temp_dir):
+        """Test results are yielded in the order of the given paths."""
+        paths = []
+        for i in range(4):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (10, 10), color=(i * 40, 0, 0)).save(path, "JPEG")
+            paths.append(path)
+
+        result = list(iter_hashes(paths, num_processes=2))
+
+        assert [r.path for r in result] == paths
+
+    def test_empty_paths(self):
+        """Test no pool is needed for an empty list."""
+        assert list(iter_hashes([], num_processes=2)) == []
+
+    def test_prefetch_matches_direct_reads(self, temp_dir):
+        """Test prefetched hashing yields the same hashes as reading in workers."""
+        paths = []
+        for i in range(6):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (20, 20), color=(i * 40, 10, 10)).save(path, "JPEG")
+            paths.append(path)
+
+        direct = list(iter_hashes(paths, num_processes=2))
+        prefetched = list(iter_hashes(paths, num_processes=2, prefetch=True))
+
+        assert [r.path for r in prefetched] == paths
+        assert all(
+            (a.hash == b.hash).all() for a, b in zip(direct, prefetched, strict=True)
+        )
+
+    def test_memory_budget_matches_unbounded(self, temp_dir):
+        """Test admission control changes scheduling but not results."""
+        paths = []
+        for i in range(6):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (20, 20), color=(i * 40, 10, 10)).save(path, "JPEG")
+            paths.append(path)
+
+        direct = list(iter_hashes(paths, num_processes=2))
+        bounded = list(iter_hashes(paths, num_processes=2, memory_budget=1))
+
+        assert [r.path for r in bounded] == paths
+        assert all(
+            (a.hash == b.hash).all() for a, b in zip(direct, bounded, strict=True)
+        )
+
+    def test_tight_prefetch_budget_does_not_stall(self, temp_dir):
+        """Test a byte budget smaller than a pool chunk still makes progress."""
+        paths = []
+        for i in range(40):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (16, 16), color=(i, 0, 0)).save(path, "JPEG")
+            paths.append(path)
+        budget = 2 * paths[0].stat().st_size
+
+        result = list(iter_hashes(paths, 1, prefetch=True, prefetch_bytes=budget))
+
+        assert len(result) == len(paths)
+
+    @pytest.mark.parametrize("prefetch", [False, True])
+    def test_thread_backend_matches_processes(self, temp_dir, prefetch):
+        """Test hashing on threads yields the same results as processes."""
+        paths = []
+        for i in range(6):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (20, 20), color=(i * 40, 10, 10)).save(path, "JPEG")
+            paths.append(path)
+
+        processes = list(iter_hashes(paths, num_processes=2, backend="process"))
+        threads = list(
+            iter_hashes(paths, num_processes=2, prefetch=prefetch, backend="thread")
+        )
+
+        assert [r.path for r in threads] == paths
+        assert all(
+            (a.hash == b.hash).all() for a, b in zip(processes, threads, strict=True)
+        )
+
+    def test_unknown_backend_raises(self, temp_dir):
+        """Test an unsupported backend name is rejected."""
+        path = temp_dir / "img.jpg"
+        Image.new("RGB", (10, 10)).save(path, "JPEG")
+
+        with pytest.raises(ValueError, match="backend"):
+            list(iter_hashes([path], num_processes=1, backend="fiber"))  # ty: ignore[invalid-argument-type]
+
+    def test_largest_first_hashes_every_file(self, temp_dir):
+        """Test size-ordered scheduling yields each file once and records loads."""
+        paths = []
+        for i in range(6):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (10 + i * 20, 10), color=(i * 40, 0, 0)).save(path)
+            paths.append(path)
+        loads = WorkerLoads()
+
+        result = list(
+            iter_hashes(paths, num_processes=2, largest_first=True, worker_loads=loads)
+        )
+
+        assert sorted(r.path for r in result) == sorted(paths)
+        assert sum(loads.tasks.values()) == len(paths)
+        assert all(busy > 0 for busy in loads.busy.values())
+
+
+class TestHashPool:
+    """Tests for HashPool class."""
+
+    @pytest.mark.parametrize("backend", ["process", "thread"])
+    def test_hashes_batches_and_skips_failures(self, temp_dir, backend):
+        """Test one pool hashes several batches and leaves out broken files."""
+        paths = []
+        for i in range(3):
+            path = temp_dir / f"img{i}.jpg"
+            Image.new("RGB", (20, 20), color=(i * 40, 10, 10)).save(path, "JPEG")
+            paths.append(path)
+        broken = temp_dir / "broken.jpg"
+        broken.write_bytes(b"not a jpeg")
+
+        with HashPool(2, backend=backend) as pool:
+            first = pool.hash([paths[0], broken, paths[1]])
+            second = pool.hash([paths[2]])
+
+        assert [r.path for r in first] == [paths[0], paths[1]]
+        assert [r.path for r in second] == [paths[2]]
@@ -1,10 +1,18 @@
 """Tests for JPEGHasher."""
 
+import imagehash
 import numpy as np
 import pytest
-from PIL import Image
+from PIL import ExifTags, Image
 
-from photocluster.internal.hasher.jpeg import JPEG_EXTENSIONS, JPEGHasher
+from photocluster.internal.hasher.jpeg import (
+    CONFIRM_HASH_SIZE,
+    JPEG_EXTENSIONS,
+    JPEGHasher,
+    phash_bits,
+    phash_variants,
+)
+from photocluster.internal.hasher.profiling import StageClock
 from photocluster.internal.models.image import ImageHash
 
 
@@ -90,6 +98,43 @@ class TestJPEGHasher:
 
         assert not np.array_equal(hash1.hash, hash2.hash)
 
+    def test_hash_without_quality(self, sample_image_path):
+        """Test quality metrics are not collected by default."""
+        result = JPEGHasher.hash(sample_image_path)
+
+        assert result.quality is None
+
+    def test_hash_with_quality(self, temp_dir):
+        """Test quality metrics come from the hashing decode."""
+        img_path = temp_dir / "wide.jpg"
+        Image.new("RGB", (120, 80), color="green").save(img_path, "JPEG")
+
+        result = JPEGHasher.hash(img_path, quality=True)
+
+        assert result.quality is not None
+        assert (result.quality.width, result.quality.height) == (120, 80)
+        assert result.quality.file_size == img_path.stat().st_size
+        assert result.quality.sharpness >= 0.0
+        assert np.array_equal(result.hash, JPEGHasher.hash(img_path).hash)
+
+    def test_hash_with_capture(self, sample_image_path):
+        """Test capture info is read from the header when requested."""
+        assert JPEGHasher.hash(sample_image_path).capture is None
+
+        result = JPEGHasher.hash(sample_image_path, capture=True)
+
+        assert result.capture is not None
+        assert result.capture.timestamp is None
+
+    def test_hash_from_buffer(self, sample_image_path):
+        """Test hashing in-memory bytes matches hashing the file."""
+        data = sample_image_path.read_bytes()
+
+        result = JPEGHasher.hash(sample_image_path, data=data)
+
+        assert result.path == sample_image_path
+        assert np.array_equal(result.hash, JPEGHasher.hash(sample_image_path).hash)
+
     def test_hash_same_image_produces_same_hash(self, sample_image_path):
         """Test that same image produces same hash."""
         hash1 = JPEGHasher.hash(sample_image_path)
@@ -104,6 +149,113 @@ class TestJPEGHasher:
         with pytest.raises((IOError, FileNotFoundError, OSError)):
             JPEGHasher.hash(nonexistent)
 
+    def test_phash_bits_matches_imagehash(self):
+        """Test the split resize and DCT steps reproduce imagehash.phash."""
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            gray = Image.fromarray(rng.integers(0, 256, (90, 70), dtype=np.uint8))
+
+            expected = imagehash.phash(gray).hash.flatten().astype(np.uint8)
+
+            assert np.array_equal(phash_bits(gray), expected)
+
+    def test_confirm_hash_matches_imagehash(self, sample_image_path):
+        """Test the confirmation hash is a 256-bit phash of the same image."""
+        result = JPEGHasher.hash(sample_image_path, confirm=True)
+
+        with Image.open(sample_image_path) as img:
+            expected = imagehash.phash(img.convert("RGB"), hash_size=CONFIRM_HASH_SIZE)
+        assert result.confirm_hash is not None
+        assert np.array_equal(result.confirm_hash, expected.hash.flatten())
+        assert JPEGHasher.hash(sample_image_path).confirm_hash is None
+
+    def test_hash_laps_stages(self, sample_image_path):
+        """Test a StageClock receives the time of each hashing step."""
+        clock = StageClock()
+
+        JPEGHasher.hash(sample_image_path, clock=clock)
+
+        assert list(clock.stages) == ["open", "decode", "convert", "resize", "dct"]
+
+    def test_fast_hashes_thumbnail(self, temp_dir, save_with_thumbnail):
+        """Test fast mode hashes a matching thumbnail without a full decode."""
+        rng = np.random.default_rng(0)
+        small = Image.fromarray(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8))
+        path = save_with_thumbnail(
+            temp_dir / "shot.jpg", small.resize((1600, 1200)), small
+        )
+        clock = StageClock()
+
+        fast = JPEGHasher.hash(path, fast=True, clock=clock)
+        full = JPEGHasher.hash(path)
+
+        assert "thumbnail" in clock.stages
+        assert "decode" not in clock.stages
+        assert np.count_nonzero(fast.hash != full.hash) <= 4
+
+    def test_fast_rejects_padded_thumbnail(self, temp_dir, save_with_thumbnail):
+        """Test a thumbnail with a different aspect ratio falls back to decoding."""
+        path = save_with_thumbnail(
+            temp_dir / "shot.jpg",
+            Image.new("RGB", (1500, 1000)),
+            Image.new("RGB", (160, 120)),
+        )
+        clock = StageClock()
+
+        JPEGHasher.hash(path, fast=True, clock=clock)
+
+        assert "decode" in clock.stages
+
+    def test_fast_reduced_decode_is_close(self, temp_dir):
+        """Test the reduced-scale fallback hash stays near the full hash."""
+        rng = np.random.default_rng(1)
+        pixels = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+        path = temp_dir / "big.jpg"
+        Image.fromarray(pixels).resize((3200, 2400)).save(path, "JPEG")
+
+        fast = JPEGHasher.hash(path, fast=True)
+        full = JPEGHasher.hash(path)
+
+        assert np.count_nonzero(fast.hash != full.hash) <= 4
+
+    def test_phash_variants_start_with_phash(self):
+        """Test variant 0 of an upright image is its plain phash."""
+        rng = np.random.default_rng(2)
+        gray = Image.fromarray(rng.integers(0, 256, (64, 64), dtype=np.uint8))
+
+        variants = phash_variants(gray)
+
+        assert variants.shape == (8, 64)
+        assert np.array_equal(variants[0], phash_bits(gray))
+
+    @pytest.mark.parametrize("method", list(Image.Transpose))
+    def test_phash_variants_cover_transposed_copies(self, method):
+        """Test every rotation and mirror image is among the variants."""
+        rng = np.random.default_rng(3)
+        gray = Image.fromarray(rng.integers(0, 256, (64, 64), dtype=np.uint8))
+
+        variants = phash_variants(gray)
+        transposed = phash_bits(gray.transpose(method))
+
+        assert min(np.count_nonzero(v != transposed) for v in variants) <= 2
+
+    def test_dihedral_normalizes_exif_orientation(self, temp_dir):
+        """Test a copy stored sideways with an orientation tag hashes upright."""
+        rng = np.random.default_rng(4)
+        upright = Image.fromarray(rng.integers(0, 256, (60, 80), dtype=np.uint8))
+        upright = upright.resize((400, 300))
+        upright.save(temp_dir / "upright.jpg", "JPEG", quality=95)
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = 6  # display after rotating 90 clockwise
+        upright.transpose(Image.Transpose.ROTATE_90).save(
+            temp_dir / "sideways.jpg", "JPEG", quality=95, exif=exif
+        )
+
+        first = JPEGHasher.hash(temp_dir / "upright.jpg", dihedral=True)
+        second = JPEGHasher.hash(temp_dir / "sideways.jpg", dihedral=True)
+
+        assert np.count_nonzero(first.hash != second.hash) <= 4
+
     def test_jpeg_extensions_constant(self):
         """Test JPEG_EXTENSIONS constant is defined."""
         assert isinstance(JPEG_EXTENSIONS, list)
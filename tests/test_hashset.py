@@ -0,0 +1,112 @@
+"""Tests for binary hash sets."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from photocluster.internal.checkpoint import HashCheckpoint
+from photocluster.internal.hashset import HashSet, read_hash_file
+from photocluster.internal.models.image import ImageHash
+
+
+@pytest.fixture
+def hash_data(temp_dir):
+    """Create hashes with variants and confirmation hashes for real files."""
+    rng = np.random.default_rng(0)
+    results = []
+    for i in range(5):
+        path = temp_dir / f"img_{i}_é.jpg"
+        path.write_bytes(b"x" * i)
+        results.append(
+            ImageHash(
+                path=path,
+                hash=rng.integers(0, 2, 64, dtype=np.uint8),
+                variants=rng.integers(0, 2, (8, 64), dtype=np.uint8),
+                confirm_hash=rng.integers(0, 2, 256, dtype=np.uint8),
+            )
+        )
+    return results
+
+
+class TestHashSet:
+    """Tests for HashSet class."""
+
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_save_load_round_trip(self, hash_data, temp_dir, mmap):
+        """Test hashes, variants, confirmation hashes and paths survive a save."""
+        path = temp_dir / "hashes.phs"
+        HashSet.from_hashes(hash_data, "phash-test").save(path)
+
+        loaded = HashSet.load(path, mmap=mmap)
+        hashes = loaded.hashes()
+
+        assert loaded.algorithm == "phash-test"
+        assert loaded.sizes.tolist() == [0, 1, 2, 3, 4]
+        assert loaded.path(3) == hash_data[3].path
+        assert [h.path for h in hashes] == [h.path for h in hash_data]
+        for expected, actual in zip(hash_data, hashes, strict=True):
+            np.testing.assert_array_equal(actual.hash, expected.hash)
+            np.testing.assert_array_equal(actual.variants, expected.variants)
+            np.testing.assert_array_equal(actual.confirm_hash, expected.confirm_hash)
+
+    def test_load_maps_the_file(self, hash_data, temp_dir):
+        """Test a memory-mapped load reads hashes straight from the file."""
+        path = temp_dir / "hashes.phs"
+        HashSet.from_hashes(hash_data, "phash").save(path)
+
+        loaded = HashSet.load(path)
+
+        assert isinstance(loaded.packed.base, np.memmap)
+
+    def test_empty_set(self, temp_dir):
+        """Test an empty set round-trips."""
+        path = temp_dir / "empty.phs"
+        HashSet.from_hashes([], "phash").save(path)
+
+        assert HashSet.load(path).hashes() == []
+
+    def test_rejects_other_files(self, temp_dir):
+        """Test loading a file without the magic bytes raises ValueError."""
+        path = temp_dir / "hashes.jsonl"
+        path.write_text('{"path": "a.jpg"}\n' * 10)
+
+        with pytest.raises(ValueError, match="Not a hash set"):
+            HashSet.load(path)
+
+    def test_rejects_truncated_files(self, hash_data, temp_dir):
+        """Test a set cut short raises ValueError instead of misreading."""
+        path = temp_dir / "hashes.phs"
+        HashSet.from_hashes(hash_data, "phash").save(path)
+        path.write_bytes(path.read_bytes()[:-40])
+
+        with pytest.raises(ValueError, match="Truncated"):
+            HashSet.load(path)
+
+    def test_rejects_mixed_hashes(self, hash_data):
+        """Test hashes computed with different options cannot share a set."""
+        hash_data[0].variants = None
+
+        with pytest.raises(ValueError, match="computed the same way"):
+            HashSet.from_hashes(hash_data, "phash")
+
+
+class TestReadHashFile:
+    """Tests for read_hash_file function."""
+
+    def test_reads_both_formats(self, hash_data, temp_dir):
+        """Test hash sets and JSON-lines checkpoints load the same hashes."""
+        binary, lines = temp_dir / "hashes.phs", temp_dir / "hashes.jsonl"
+        HashSet.from_hashes(hash_data, "phash").save(binary)
+        with HashCheckpoint(lines) as checkpoint:
+            for result in hash_data:
+                checkpoint.append(result)
+
+        from_binary, from_lines = read_hash_file(binary), read_hash_file(lines)
+
+        assert [h.path for h in from_binary] == [h.path for h in from_lines]
+        assert all(
+            np.array_equal(a.hash, b.hash)
+            for a, b in zip(from_binary, from_lines, strict=True)
+        )
+        assert isinstance(from_binary[0].path, Path)
@@ -0,0 +1,107 @@
+"""Tests for the single-linkage merge tree."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from photocluster.internal.cluster import cluster_hashes
+from photocluster.internal.hierarchy import Dendrogram, cluster_hierarchical
+from photocluster.internal.models.image import ImageHash
+
+
+def _hash(base: np.ndarray, flips: int, name: str) -> ImageHash:
+    vector = base.copy()
+    vector[:flips] ^= 1
+    return ImageHash(path=Path(name), hash=vector)
+
+
+@pytest.fixture
+def hash_data():
+    """Create two groups, each holding a tight pair and a looser member."""
+    rng = np.random.default_rng(1)
+    results = []
+    for group in range(2):
+        base = rng.integers(0, 2, 64, dtype=np.uint8)
+        results += [
+            _hash(base, 0, f"g{group}_a.jpg"),
+            _hash(base, 1, f"g{group}_b.jpg"),
+            _hash(base, 9, f"g{group}_c.jpg"),
+        ]
+    results.append(
+        ImageHash(path=Path("unique.jpg"), hash=rng.integers(0, 2, 64, np.uint8))
+    )
+    return results
+
+
+class TestDendrogram:
+    """Tests for Dendrogram."""
+
+    @pytest.mark.parametrize("eps", [0.0, 0.02, 0.1, 0.2, 0.3])
+    def test_cuts_match_dbscan(self, hash_data, eps):
+        """Test cutting the tree equals flat DBSCAN at the same eps."""
+        tree = Dendrogram.build(hash_data, max_eps=0.3)
+
+        assert tree.cluster(eps) == cluster_hashes(hash_data, eps=eps)
+
+    def test_identical_hashes_merge(self, sample_hash):
+        """Test zero-distance pairs are kept in the tree."""
+        hash_data = [
+            ImageHash(path=Path("a.jpg"), hash=sample_hash),
+            ImageHash(path=Path("b.jpg"), hash=sample_hash),
+        ]
+
+        tree = Dendrogram.build(hash_data, max_eps=0.2)
+
+        assert list(tree.labels(0.0)) == [0, 0]
+
+    def test_linkage_matches_scipy(self, hash_data):
+        """Test the linkage matrix equals SciPy single linkage when connected."""
+        from scipy.cluster.hierarchy import linkage
+
+        vectors = np.stack([h.hash for h in hash_data]).astype(bool)
+        tree = Dendrogram.build(hash_data, max_eps=1.0)
+
+        expected = linkage(vectors, method="single", metric="hamming")
+
+        assert np.allclose(np.sort(tree.linkage()[:, 2]), np.sort(expected[:, 2]))
+        assert tree.linkage()[-1, 3] == len(hash_data)
+
+    def test_linkage_of_forest(self, hash_data):
+        """Test images without neighbors are left out of the merges."""
+        tree = Dendrogram.build(hash_data, max_eps=0.2)
+
+        assert tree.linkage().shape == (4, 4)
+
+    def test_rejects_eps_above_max(self, hash_data):
+        """Test cutting above the tree's height fails."""
+        tree = Dendrogram.build(hash_data, max_eps=0.1)
+
+        with pytest.raises(ValueError, match="max_eps"):
+            tree.labels(0.2)
+
+
+class TestClusterHierarchical:
+    """Tests for cluster_hierarchical function."""
+
+    def test_nests_subgroups(self, hash_data):
+        """Test tight pairs become subgroups within their group."""
+        result = cluster_hierarchical(hash_data, eps=0.2, subgroup_eps=0.05)
+
+        by_name = {c.path.name: c for c in result}
+        assert by_name["g0_a.jpg"].cluster_id == by_name["g0_c.jpg"].cluster_id
+        assert by_name["g0_a.jpg"].subcluster_id == 0
+        assert by_name["g0_b.jpg"].subcluster_id == 0
+        assert by_name["g0_c.jpg"].subcluster_id == -1
+        assert by_name["g1_a.jpg"].subcluster_id == 0
+        assert by_name["unique.jpg"].cluster_id == -1
+        assert by_name["unique.jpg"].subcluster_id is None
+
+    def test_rejects_looser_subgroups(self, hash_data):
+        """Test subgroup_eps above eps fails."""
+        with pytest.raises(ValueError, match="subgroup_eps"):
+            cluster_hierarchical(hash_data, eps=0.1, subgroup_eps=0.2)
+
+    def test_empty_input(self):
+        """Test no images yield no clusters."""
+        assert cluster_hierarchical([], eps=0.2, subgroup_eps=0.1) == []
@@ -0,0 +1,50 @@
+"""Tests that heavy dependencies are only imported on first use."""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("sklearn", "pydantic", "scipy")
+
+
+def _loaded_modules(statement: str) -> set[str]:
+    """Run an import statement in a fresh interpreter and list loaded modules."""
+    code = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return {name.split(".")[0] for name in output.split()}
+
+
+class TestLazyImports:
+    """Tests for lazy loading of heavy dependencies."""
+
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "import photocluster",
+            "import photocluster.internal.hasher.core",
+            "import photocluster.internal.cluster",
+        ],
+    )
+    def test_import_does_not_load_heavy_modules(self, statement):
+        """Test importing the package and worker modules stays lightweight."""
+        loaded = _loaded_modules(statement)
+
+        assert not loaded.intersection(HEAVY_MODULES)
+
+    def test_public_api_resolves_lazily(self):
+        """Test the photocluster function is available from the package."""
+        import photocluster
+
+        assert callable(photocluster.photocluster)
+        assert "photocluster" in dir(photocluster)
+        assert photocluster.HashIndex.__name__ == "HashIndex"
+
+    def test_unknown_attribute_raises(self):
+        """Test missing attributes still raise AttributeError."""
+        import photocluster
+
+        with pytest.raises(AttributeError):
+            _ = photocluster.does_not_exist
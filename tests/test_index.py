@@ -0,0 +1,125 @@
+"""Tests for the Hamming-space hash index."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photocluster.internal.hasher.core import Hasher
+from photocluster.internal.index import HashIndex
+from photocluster.internal.models.image import ImageHash, IndexMatch
+
+
+@pytest.fixture
+def hash_data():
+    """Create random hashes plus near copies of the first one."""
+    rng = np.random.default_rng(0)
+    vectors = rng.integers(0, 2, (500, 64), dtype=np.uint8)
+    for i, flips in enumerate([1, 3, 6, 10], start=1):
+        vectors[i] = vectors[0]
+        vectors[i, :flips] ^= 1
+    return [
+        ImageHash(path=Path(f"{i}.jpg"), hash=vectors[i]) for i in range(len(vectors))
+    ]
+
+
+def _brute_force(hash_data, query, max_distance):
+    distances = [int(np.count_nonzero(h.hash != query)) for h in hash_data]
+    return sorted((d, i) for i, d in enumerate(distances) if d <= max_distance)
+
+
+class TestHashIndex:
+    """Tests for HashIndex."""
+
+    @pytest.mark.parametrize("max_distance", [0, 3, 8, 12, 20, 64])
+    def test_matches_brute_force(self, hash_data, max_distance):
+        """Test radius queries return exactly the hashes within the radius."""
+        index = HashIndex.build(hash_data)
+        query = hash_data[0].hash
+
+        result = index.query(query, max_distance=max_distance)
+
+        expected = _brute_force(hash_data, query, max_distance)
+        assert [(m.distance, int(m.path.stem)) for m in result] == expected
+
+    def test_k_limits_to_nearest(self, hash_data):
+        """Test k returns the nearest matches first."""
+        index = HashIndex.build(hash_data)
+
+        result = index.query(hash_data[0], max_distance=12, k=3)
+
+        assert result == [
+            IndexMatch(path=Path("0.jpg"), distance=0),
+            IndexMatch(path=Path("1.jpg"), distance=1),
+            IndexMatch(path=Path("2.jpg"), distance=3),
+        ]
+
+    def test_query_by_path(self, temp_dir):
+        """Test an image file is hashed and matched against the index."""
+        image = temp_dir / "image.jpg"
+        Image.new("RGB", (64, 64), color=(90, 120, 30)).save(image, "JPEG")
+        index = HashIndex.build([Hasher()(image)])
+
+        result = index.query(image, max_distance=0)
+
+        assert [m.path for m in result] == [image]
+
+    def test_add_extends_index(self, hash_data):
+        """Test hashes added later are found by queries."""
+        index = HashIndex.build(hash_data[:250])
+        index.add(hash_data[250:])
+
+        result = index.query(hash_data[400], max_distance=0)
+
+        assert len(index) == 500
+        assert [m.path for m in result] == [Path("400.jpg")]
+
+    @pytest.mark.parametrize("max_distance", [0, 8, 12])
+    def test_delta_matches_brute_force(self, hash_data, max_distance):
+        """Test hashes added one at a time are found before and after merging."""
+        index = HashIndex.build(hash_data[5:])
+        for result in hash_data[:5]:
+            index.add([result])
+        query = hash_data[0].hash
+        expected = _brute_force(hash_data[5:] + hash_data[:5], query, max_distance)
+
+        assert index.tabled == len(hash_data) - 5
+        for _ in range(2):
+            result = index.query(query, max_distance=max_distance)
+            assert [(m.distance, m.path.name) for m in result] == [
+                (d, f"{(i + 5) % len(hash_data)}.jpg") for d, i in expected
+            ]
+            index.merge()
+
+    def test_merge_equals_build(self, hash_data):
+        """Test merging the delta gives the tables a full build would."""
+        index = HashIndex.build(hash_data[:300])
+        index.add(hash_data[300:])
+        index.merge()
+        built = HashIndex.build(hash_data)
+
+        np.testing.assert_array_equal(index.keys, built.keys)
+        np.testing.assert_array_equal(index.orders, built.orders)
+
+    def test_rejects_mismatched_hash_length(self, hash_data):
+        """Test querying with a hash of another length fails."""
+        index = HashIndex.build(hash_data)
+
+        with pytest.raises(ValueError, match="bits"):
+            index.query(np.zeros(256, dtype=np.uint8))
+
+    def test_save_load_round_trip(self, hash_data, temp_dir):
+        """Test a saved index answers queries identically after loading."""
+        index = HashIndex.build(hash_data)
+        path = temp_dir / "index.npz"
+
+        index.save(path)
+        loaded = HashIndex.load(path)
+
+        assert loaded.paths == index.paths
+        assert loaded.query(hash_data[0], 12) == index.query(hash_data[0], 12)
+
+    def test_empty_index(self, sample_hash):
+        """Test an empty index returns no matches."""
+        assert HashIndex.build([]).query(sample_hash) == []
@@ -0,0 +1,56 @@
+"""Tests for LSH candidate generation."""
+
+import numpy as np
+
+from photocluster.internal.lsh import MAX_TABLES, candidate_pairs, choose_parameters
+
+
+class TestChooseParameters:
+    """Tests for choose_parameters function."""
+
+    def test_returns_positive_values(self):
+        """Test parameters are positive and table count is capped."""
+        bits, tables = choose_parameters(10000, 64, 12, 0.99)
+
+        assert bits >= 1
+        assert 1 <= tables <= MAX_TABLES
+
+    def test_higher_recall_uses_more_work(self):
+        """Test raising recall never reduces the number of tables per bit."""
+        low_bits, low_tables = choose_parameters(10000, 64, 6, 0.5)
+        high_bits, high_tables = choose_parameters(10000, 64, 6, 0.999)
+
+        assert high_tables / high_bits >= low_tables / low_bits
+
+
+class TestCandidatePairs:
+    """Tests for candidate_pairs function."""
+
+    def test_finds_identical_hashes(self):
+        """Test identical hashes are always returned as a pair."""
+        rng = np.random.default_rng(1)
+        vectors = rng.integers(0, 2, (50, 64), dtype=np.uint8)
+        vectors[10] = vectors[3]
+
+        rows, cols, distances = candidate_pairs(vectors, radius=0)
+
+        assert (3, 10) in set(zip(rows.tolist(), cols.tolist(), strict=True))
+        assert np.all(distances == 0)
+
+    def test_pairs_are_within_radius(self):
+        """Test every returned pair is verified against the radius."""
+        rng = np.random.default_rng(2)
+        vectors = rng.integers(0, 2, (200, 64), dtype=np.uint8)
+
+        rows, cols, distances = candidate_pairs(vectors, radius=10)
+
+        assert np.all(distances <= 10)
+        assert np.all(rows < cols)
+
+    def test_empty_input(self):
+        """Test no pairs are returned for a single hash."""
+        vectors = np.zeros((1, 64), dtype=np.uint8)
+
+        rows, cols, distances = candidate_pairs(vectors, radius=5)
+
+        assert len(rows) == len(cols) == len(distances) == 0
@@ -0,0 +1,91 @@
+"""Tests for the file prefetcher."""
+
+import threading
+
+from photocluster.internal.hasher.prefetch import Prefetcher, read_file
+
+
+class TestReadFile:
+    """Tests for read_file function."""
+
+    def test_reads_contents(self, temp_dir):
+        """Test the whole file is returned."""
+        path = temp_dir / "data.bin"
+        path.write_bytes(b"abc" * 1000)
+
+        assert read_file(path) == b"abc" * 1000
+
+
+class TestPrefetcher:
+    """Tests for Prefetcher class."""
+
+    def _files(self, temp_dir, count, size):
+        paths = []
+        for i in range(count):
+            path = temp_dir / f"f{i}.bin"
+            path.write_bytes(bytes([i]) * size)
+            paths.append(path)
+        return paths
+
+    def test_yields_in_input_order(self, temp_dir):
+        """Test buffers come back in the order of the input paths."""
+        paths = self._files(temp_dir, 10, 100)
+        prefetcher = Prefetcher(paths)
+
+        items = []
+        for path, data in prefetcher:
+            items.append((path, data))
+            prefetcher.release(path)
+
+        assert [p for p, _ in items] == paths
+        assert all(data == bytes([i]) * 100 for i, (_, data) in enumerate(items))
+
+    def test_respects_byte_budget(self, temp_dir):
+        """Test unreleased buffers never exceed the byte budget."""
+        paths = self._files(temp_dir, 20, 100)
+        prefetcher = Prefetcher(paths, max_bytes=300)
+        done = []
+
+        # Release each buffer from another thread, as pool results would.
+        def consume() -> None:
+            for path, _ in prefetcher:
+                done.append(path)
+                threading.Timer(0.001, prefetcher.release, args=(path,)).start()
+
+        worker = threading.Thread(target=consume)
+        worker.start()
+        worker.join(timeout=10)
+
+        assert done == paths
+        assert prefetcher.budget.peak <= 300
+
+    def test_admits_file_larger_than_budget(self, temp_dir):
+        """Test a single oversized file still gets through."""
+        paths = self._files(temp_dir, 2, 1000)
+        prefetcher = Prefetcher(paths, max_bytes=10)
+
+        result = []
+        for path, _ in prefetcher:
+            result.append(path)
+            prefetcher.release(path)
+
+        assert result == paths
+
+    def test_close_unblocks_waiting_iterator(self, temp_dir):
+        """Test closing the prefetcher ends an iterator blocked on the budget."""
+        paths = self._files(temp_dir, 5, 100)
+        prefetcher = Prefetcher(paths, max_bytes=100)
+        seen = []
+
+        def consume() -> None:
+            for path, _ in prefetcher:
+                seen.append(path)  # never released
+
+        worker = threading.Thread(target=consume)
+        worker.start()
+        worker.join(timeout=0.5)
+        prefetcher.close()
+        worker.join(timeout=5)
+
+        assert not worker.is_alive()
+        assert len(seen) < len(paths)
@@ -1,11 +1,20 @@
 """Tests for processing utilities."""
 
+import multiprocessing
+import os
+import signal
 from unittest.mock import patch
 
+import pytest
+
 from photocluster.internal.util.processing import (
     CPU_USAGE_RATIO,
     MAX_PROCESSES,
     MIN_PROCESSES,
+    BudgetClosed,
+    CancellationToken,
+    InFlightBudget,
+    default_backend,
     get_num_processes,
 )
 
@@ -51,3 +60,81 @@ class TestGetNumProcesses:
         result = get_num_processes()
         expected = max(MIN_PROCESSES, min(MAX_PROCESSES, int(4 * CPU_USAGE_RATIO)))
         assert result == expected
+
+
+class TestDefaultBackend:
+    """Tests for default_backend function."""
+
+    def test_processes_with_gil(self):
+        """Test processes are used when the GIL is enabled."""
+        with patch("sys._is_gil_enabled", return_value=True, create=True):
+            assert default_backend() == "process"
+
+    def test_threads_when_free_threaded(self):
+        """Test threads are used on free-threaded Python."""
+        with patch("sys._is_gil_enabled", return_value=False, create=True):
+            assert default_backend() == "thread"
+
+
+class TestInFlightBudget:
+    """Tests for InFlightBudget class."""
+
+    def test_try_acquire_within_limit(self):
+        """Test costs are admitted until the limit is reached."""
+        budget = InFlightBudget(10)
+
+        assert budget.try_acquire(6)
+        assert not budget.try_acquire(6)
+        budget.release(6)
+        assert budget.try_acquire(6)
+
+    def test_oversized_item_admitted_when_idle(self):
+        """Test an item larger than the limit fits when nothing is in flight."""
+        budget = InFlightBudget(10)
+
+        assert budget.try_acquire(50)
+        assert budget.peak == 50
+
+    def test_acquire_after_close_raises(self):
+        """Test a closed budget refuses to block."""
+        budget = InFlightBudget(10)
+        budget.try_acquire(10)
+        budget.close()
+
+        with pytest.raises(BudgetClosed):
+            budget.acquire(5)
+
+
+class TestCancellationToken:
+    """Tests for CancellationToken class."""
+
+    def test_cancel_sets_flag(self):
+        """Test a token starts uncancelled and stays cancelled."""
+        token = CancellationToken()
+        assert not token.cancelled
+
+        token.cancel()
+
+        assert token.cancelled
+
+    def test_cancel_on_signal_restores_handler(self):
+        """Test a signal cancels the token and the old handler comes back."""
+        token = CancellationToken()
+        previous = signal.getsignal(signal.SIGUSR1)
+
+        with token.cancel_on(signal.SIGUSR1):
+            os.kill(os.getpid(), signal.SIGUSR1)
+
+        assert token.cancelled
+        assert signal.getsignal(signal.SIGUSR1) == previous
+
+    def test_forked_workers_still_terminate(self):
+        """Test pool workers forked while the handler is installed still exit."""
+        token = CancellationToken()
+
+        with token.cancel_on(signal.SIGTERM):
+            pool = multiprocessing.get_context("fork").Pool(1)
+            pool.terminate()
+            pool.join()
+
+        assert not token.cancelled
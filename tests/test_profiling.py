@@ -0,0 +1,100 @@
+"""Tests for hash worker profiling."""
+
+import pstats
+
+import pytest
+from PIL import Image
+
+from photocluster.internal.hasher.core import iter_hashes
+from photocluster.internal.hasher.profiling import (
+    HashProfile,
+    StageClock,
+    TaskProfile,
+    profile_call,
+)
+
+
+@pytest.fixture
+def images(temp_dir):
+    """Create a few JPEGs to hash."""
+    paths = []
+    for i in range(4):
+        path = temp_dir / f"img{i}.jpg"
+        Image.new("RGB", (120, 80), color=(i * 60, 0, 0)).save(path, "JPEG")
+        paths.append(path)
+    return paths
+
+
+class TestStageClock:
+    """Tests for StageClock class."""
+
+    def test_laps_accumulate_per_stage(self):
+        """Test repeated laps of a stage add up."""
+        clock = StageClock()
+
+        clock.lap("decode")
+        clock.lap("resize")
+        clock.lap("decode")
+
+        assert list(clock.stages) == ["decode", "resize"]
+        assert all(seconds >= 0 for seconds in clock.stages.values())
+
+
+class TestProfileCall:
+    """Tests for profile_call function."""
+
+    def test_collects_function_stats(self):
+        """Test cProfile stats are returned when requested."""
+        result, profile = profile_call(StageClock(), True, lambda: sum(range(10)))
+
+        assert result == 45
+        assert profile.stats is not None
+
+    def test_stage_times_only(self):
+        """Test no function stats are collected when not requested."""
+        _, profile = profile_call(StageClock(), False, lambda: None)
+
+        assert profile.stats is None
+
+
+class TestHashProfile:
+    """Tests for HashProfile class."""
+
+    def test_record_adds_queue_wait(self):
+        """Test each recorded task also gets a queue wait stage."""
+        profile = HashProfile()
+
+        profile.record(TaskProfile(stages={"decode": 0.5}, finished=0.0))
+        profile.record(TaskProfile(stages={"decode": 0.25}, finished=0.0))
+
+        assert profile.tasks == 2
+        assert profile.stages["decode"] == 0.75
+        assert profile.stages["queue wait"] > 0
+
+    def test_dump_without_stats_raises(self, temp_dir):
+        """Test dumping fails clearly when no function stats were collected."""
+        with pytest.raises(ValueError, match="process backend"):
+            HashProfile().dump(temp_dir / "hash.prof")
+
+    def test_process_workers_merge_function_stats(self, images, temp_dir):
+        """Test stats from every worker process are merged and dumpable."""
+        profile = HashProfile()
+
+        list(iter_hashes(images, 2, backend="process", profile=profile))
+        profile.dump(temp_dir / "hash.prof")
+
+        assert profile.tasks == 4
+        assert {"open", "decode", "convert", "resize", "dct"} <= set(profile.stages)
+        assert "decode" in profile.summary()
+        loaded = pstats.Stats(str(temp_dir / "hash.prof")).get_stats_profile()
+        assert loaded.func_profiles
+
+    def test_thread_workers_report_stages_only(self, images):
+        """Test thread-pool workers skip cProfile but still time each stage."""
+        profile = HashProfile()
+
+        list(iter_hashes(images, 2, backend="thread", profile=profile))
+
+        assert profile.tasks == 4
+        assert profile.stats is None
+        assert "dct" in profile.stages
@@ -0,0 +1,104 @@
+"""Tests for progress display and stage timing."""
+
+import io
+
+from photocluster.internal.util.progress import (
+    HashProgress,
+    Progress,
+    StageTimer,
+    WorkerLoads,
+)
+
+
+class TestProgress:
+    """Tests for Progress class."""
+
+    def test_reports_completion(self):
+        """Test the final update always draws a complete line."""
+        stream = io.StringIO()
+        progress = Progress("hash", total=3, stream=stream)
+
+        for _ in range(3):
+            progress.update()
+        progress.close()
+
+        assert "[hash] 3/3 100.0%" in stream.getvalue()
+        assert "img/s" in stream.getvalue()
+        assert "ETA" in stream.getvalue()
+
+
+class TestStageTimer:
+    """Tests for StageTimer class."""
+
+    def test_records_stages_in_order(self):
+        """Test each stage is recorded with its item count."""
+        timer = StageTimer()
+
+        with timer.stage("scan") as timing:
+            timing.items = 5
+        with timer.stage("hash", workers=2) as timing:
+            timing.items = 5
+
+        assert [t.name for t in timer.stages] == ["scan", "hash"]
+        assert timer.stages[1].workers == 2
+        assert all(t.wall >= 0 for t in timer.stages)
+
+    def test_summary_lists_every_stage(self):
+        """Test the summary contains one row per stage plus a total."""
+        timer = StageTimer()
+        with timer.stage("cluster"):
+            pass
+
+        summary = timer.summary()
+
+        assert "cluster" in summary
+        assert "total" in summary
+
+    def test_summary_lists_worker_loads(self):
+        """Test stages with worker loads get one line per worker."""
+        timer = StageTimer()
+        with timer.stage("hash", workers=2) as timing:
+            timing.worker_loads = WorkerLoads()
+            timing.worker_loads.record("a", 0.5)
+            timing.worker_loads.record("b", 0.1)
+            timing.worker_loads.record("a", 0.5)
+
+        summary = timer.summary()
+
+        assert "worker 1" in summary
+        assert "worker 2" in summary
+
+
+class TestWorkerLoads:
+    """Tests for WorkerLoads class."""
+
+    def test_accumulates_per_worker(self):
+        """Test busy time and task counts add up per worker."""
+        loads = WorkerLoads()
+
+        loads.record("a", 1.0)
+        loads.record("a", 2.0)
+        loads.record("b", 0.5)
+
+        assert loads.busy == {"a": 3.0, "b": 0.5}
+        assert loads.tasks == {"a": 2, "b": 1}
+
+    def test_summary_shows_utilization(self):
+        """Test each worker's busy time is shown as a share of wall time."""
+        loads = WorkerLoads()
+        loads.record("a", 1.0)
+
+        (line,) = loads.summary(wall=4.0)
+
+        assert "25%" in line
+
+
+class TestHashProgress:
+    """Tests for HashProgress class."""
+
+    def test_rate_excludes_cache_hits(self):
+        """Test throughput only counts images that were actually hashed."""
+        progress = HashProgress(total=10, done=6, cached=2, elapsed=2.0)
+
+        assert progress.rate == 2.0
+        assert HashProgress(total=10).rate == 0.0
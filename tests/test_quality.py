@@ -0,0 +1,81 @@
+"""Tests for quality metrics and representative ranking."""
+
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from photocluster.internal.models.image import ClusteredImage, ImageHash, ImageQuality
+from photocluster.internal.quality import (
+    laplacian_variance,
+    rank_clusters,
+    representatives,
+)
+
+
+def _quality(sharpness, width=100, height=100, file_size=1000):
+    return ImageQuality(
+        width=width, height=height, file_size=file_size, sharpness=sharpness
+    )
+
+
+class TestLaplacianVariance:
+    """Tests for laplacian_variance function."""
+
+    def test_flat_image_has_zero_sharpness(self):
+        """Test a uniform image has no Laplacian response."""
+        img = Image.new("L", (64, 64), color=128)
+
+        assert laplacian_variance(img) == 0.0
+
+    def test_blur_reduces_sharpness(self):
+        """Test a blurred copy scores lower than the original."""
+        rng = np.random.default_rng(0)
+        img = Image.fromarray(rng.integers(0, 255, (128, 128), dtype=np.uint8))
+        blurred = img.filter(ImageFilter.GaussianBlur(3))
+
+        assert laplacian_variance(blurred) < laplacian_variance(img)
+
+    def test_tiny_image(self):
+        """Test images too small for the kernel score zero."""
+        assert laplacian_variance(Image.new("L", (2, 2))) == 0.0
+
+
+class TestRankClusters:
+    """Tests for rank_clusters function."""
+
+    def test_sharpest_image_ranks_first(self, sample_hash):
+        """Test members are ordered by sharpness within a cluster."""
+        hash_data = [
+            ImageHash(Path("a.jpg"), sample_hash, _quality(1.0)),
+            ImageHash(Path("b.jpg"), sample_hash, _quality(9.0)),
+            ImageHash(Path("c.jpg"), sample_hash, _quality(5.0)),
+        ]
+        clustered = [ClusteredImage(h.path, 0) for h in hash_data]
+
+        ranked = rank_clusters(clustered, hash_data)
+
+        assert [c.rank for c in ranked] == [2, 0, 1]
+        assert representatives(ranked) == {0: Path("b.jpg")}
+
+    def test_resolution_breaks_ties(self, sample_hash):
+        """Test larger images win when sharpness is equal."""
+        hash_data = [
+            ImageHash(Path("small.jpg"), sample_hash, _quality(1.0, 10, 10)),
+            ImageHash(Path("large.jpg"), sample_hash, _quality(1.0, 50, 50)),
+        ]
+        clustered = [ClusteredImage(h.path, 3) for h in hash_data]
+
+        ranked = rank_clusters(clustered, hash_data)
+
+        assert representatives(ranked) == {3: Path("large.jpg")}
+
+    def test_noise_is_not_ranked(self, sample_hash):
+        """Test noise images keep rank None."""
+        hash_data = [ImageHash(Path("a.jpg"), sample_hash, _quality(1.0))]
+        clustered = [ClusteredImage(Path("a.jpg"), -1)]
+
+        ranked = rank_clusters(clustered, hash_data)
+
+        assert ranked[0].rank is None
+        assert representatives(ranked) == {}
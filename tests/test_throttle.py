@@ -0,0 +1,148 @@
+"""Tests for resource limits."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+from photocluster.internal.hasher.prefetch import Prefetcher
+from photocluster.internal.util.throttle import (
+    MEGABYTE,
+    Throttle,
+    TokenBucket,
+    lower_priority,
+    priority_initializer,
+)
+
+
+class FakeClock:
+    """Clock that only advances when something sleeps."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket class."""
+
+    def test_paces_from_start(self):
+        """Test units are spread evenly from the first one."""
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+
+        for _ in range(30):
+            bucket.acquire()
+
+        assert clock.now == pytest.approx(3.0)
+
+    def test_oversized_request_goes_into_debt(self):
+        """Test a request larger than the bucket waits instead of blocking forever."""
+        clock = FakeClock()
+        bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire(300) == pytest.approx(3.0)
+        assert bucket.acquire(100) == pytest.approx(1.0)
+
+    def test_rejects_non_positive_rate(self):
+        """Test a zero rate is rejected."""
+        with pytest.raises(ValueError, match="positive"):
+            TokenBucket(0)
+
+
+class TestThrottle:
+    """Tests for Throttle class."""
+
+    def test_slowest_limit_wins(self):
+        """Test the byte limit paces large files even under a loose file limit."""
+        clock = FakeClock()
+        throttle = Throttle(
+            files_per_second=100,
+            bytes_per_second=MEGABYTE,
+            clock=clock,
+            sleep=clock.sleep,
+        )
+
+        for _ in range(5):
+            throttle.acquire(MEGABYTE)
+
+        assert throttle.files == 5
+        assert throttle.bytes == 5 * MEGABYTE
+        assert throttle.bytes_rate == pytest.approx(MEGABYTE)
+        assert throttle.waited == pytest.approx(5.0)
+
+    def test_summary_reports_rates(self):
+        """Test the summary names the achieved rates."""
+        clock = FakeClock()
+        throttle = Throttle(files_per_second=2, clock=clock, sleep=clock.sleep)
+
+        for _ in range(4):
+            throttle.acquire(MEGABYTE)
+
+        assert throttle.summary("read") == (
+            "read: 4 files, 4.0 MB at 2.0 files/s, 2.00 MB/s; waited 2.0s on limits"
+        )
+
+    def test_prefetcher_reads_through_throttle(self, temp_dir):
+        """Test every prefetched file is counted against the limit."""
+        paths = []
+        for i in range(5):
+            path = temp_dir / f"f{i}.bin"
+            path.write_bytes(b"x" * 100)
+            paths.append(path)
+        throttle = Throttle(files_per_second=1000)
+        prefetcher = Prefetcher(paths, throttle=throttle)
+
+        for path, _ in prefetcher:
+            prefetcher.release(path)
+
+        assert throttle.files == 5
+        assert throttle.bytes == 500
+
+
+class TestLowerPriority:
+    """Tests for lower_priority function."""
+
+    def test_no_op_by_default(self, monkeypatch):
+        """Test nothing is changed without a niceness or I/O class."""
+        calls = []
+        monkeypatch.setattr("os.nice", calls.append)
+
+        lower_priority()
+
+        assert calls == []
+
+
+class TestPriorityInitializer:
+    """Tests for priority_initializer function."""
+
+    def test_none_without_changes(self):
+        """Test no initializer is needed without a niceness or I/O class."""
+        assert priority_initializer() is None
+
+    @pytest.mark.skipif(
+        not sys.platform.startswith("linux"), reason="nice values are per thread"
+    )
+    def test_lowers_worker_thread_only(self):
+        """Test a worker thread is reniced while the calling thread is not."""
+        before = os.nice(0)
+        initializer = priority_initializer(3, threads=True)
+        assert initializer is not None
+        seen = []
+
+        def worker() -> None:
+            initializer()
+            seen.append(os.nice(0))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert seen == [min(before + 3, 19)]
+        assert os.nice(0) == before
@@ -54,3 +54,43 @@ class TestPhotoclusterInputs:
 
         with pytest.raises(ValidationError):
             PhotoclusterInputs(input_dir=test_file, sensitivity=0.2)
+
+    def test_burst_window_must_be_positive(self, temp_dir):
+        """Test validation error for a non-positive burst window."""
+        with pytest.raises(ValidationError):
+            PhotoclusterInputs(input_dir=temp_dir, sensitivity=0.2, burst_window=0)
+
+    @pytest.mark.parametrize("recall", [0.0, 1.0])
+    def test_recall_must_be_a_proper_probability(self, temp_dir, recall):
+        """Test validation error for recall of 0 or 1, which LSH cannot target."""
+        with pytest.raises(ValidationError):
+            PhotoclusterInputs(
+                input_dir=temp_dir, sensitivity=0.2, approximate=True, recall=recall
+            )
+
+    def test_subgroup_sensitivity_must_not_exceed_sensitivity(self, temp_dir):
+        """Test validation error for subgroups looser than groups."""
+        with pytest.raises(ValidationError):
+            PhotoclusterInputs(
+                input_dir=temp_dir, sensitivity=0.1, subgroup_sensitivity=0.2
+            )
+
+    def test_subgroup_sensitivity_rejects_approximate(self, temp_dir):
+        """Test subgroups require the exact merge tree."""
+        with pytest.raises(ValidationError):
+            PhotoclusterInputs(
+                input_dir=temp_dir,
+                sensitivity=0.2,
+                subgroup_sensitivity=0.1,
+                approximate=True,
+            )
+
+    def test_confirm_sensitivity_rejects_rotations(self, temp_dir):
+        """Test confirmation hashes cannot be combined with rotation variants."""
+        with pytest.raises(ValidationError):
+            PhotoclusterInputs(
+                input_dir=temp_dir,
+                sensitivity=0.2,
+                confirm_sensitivity=0.2,
+                match_rotations=True,
+            )
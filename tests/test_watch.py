@@ -0,0 +1,296 @@
+"""Tests for the watch-folder daemon."""
+
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photocluster.internal.cache import HashCache
+from photocluster.internal.cluster import cluster_hashes
+from photocluster.internal.hasher.core import hash_algorithm
+from photocluster.internal.models.image import ClusteredImage, ImageHash
+from photocluster.internal.util.files import group_image_files
+from photocluster.internal.watch import (
+    Debouncer,
+    IncrementalClusters,
+    InotifyWatcher,
+    PollingWatcher,
+    WatchFolder,
+)
+
+
+def _partition(clustered):
+    """Clusters as a set of frozensets of file names, ignoring labels."""
+    groups = {}
+    for c in clustered:
+        if c.cluster_id != -1:
+            groups.setdefault(c.cluster_id, set()).add(c.path.name)
+    return {frozenset(members) for members in groups.values()}
+
+
+def _current(clusters):
+    """The assignment IncrementalClusters holds, as ClusteredImage objects."""
+    return [
+        ClusteredImage(path=Path(path), cluster_id=cluster_id)
+        for path, cluster_id in zip(
+            clusters.index.paths, clusters.cluster_ids, strict=True
+        )
+    ]
+
+
+class TestDebouncer:
+    """Tests for Debouncer class."""
+
+    def test_holds_paths_until_settled(self, temp_dir):
+        """Test a path is released once quiet for the settle time."""
+        debouncer = Debouncer(settle=2.0)
+        path = temp_dir / "a.jpg"
+
+        debouncer.touch(path, 0.0)
+        debouncer.touch(path, 1.5)
+
+        assert debouncer.pop_ready(3.0) == []
+        assert debouncer.pop_ready(3.5) == [path]
+        assert len(debouncer) == 0
+
+
+class TestWatchers:
+    """Tests for the inotify and polling watchers."""
+
+    def test_polling_reports_new_and_changed_files(self, temp_dir):
+        """Test polling reports files added or rewritten since the last poll."""
+        Image.new("RGB", (10, 10)).save(temp_dir / "old.jpg")
+        Image.new("RGB", (10, 10)).save(temp_dir / "changed.jpg")
+        watcher = PollingWatcher(temp_dir)
+        Image.new("RGB", (10, 10)).save(temp_dir / "new.jpg")
+        Image.new("RGB", (20, 20)).save(temp_dir / "changed.jpg")
+        (temp_dir / "notes.txt").write_text("not an image")
+
+        events = watcher.poll(0)
+
+        assert events.written == [temp_dir / "changed.jpg", temp_dir / "new.jpg"]
+        assert watcher.poll(0).written == []
+
+    def test_polling_reports_removed_files(self, temp_dir):
+        """Test polling reports files gone from the folder or a group directory."""
+        (temp_dir / "group_0").mkdir()
+        for path in (temp_dir / "a.jpg", temp_dir / "group_0" / "b.jpg"):
+            Image.new("RGB", (10, 10)).save(path)
+        watcher = PollingWatcher(temp_dir)
+        (temp_dir / "a.jpg").unlink()
+        (temp_dir / "group_0" / "b.jpg").unlink()
+
+        events = watcher.poll(0)
+
+        assert events.removed == [temp_dir / "a.jpg", temp_dir / "group_0" / "b.jpg"]
+        assert events.written == []
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+    def test_inotify_reports_written_images(self, temp_dir):
+        """Test inotify reports image files once they are closed."""
+        watcher = InotifyWatcher(temp_dir)
+        try:
+            Image.new("RGB", (10, 10)).save(temp_dir / "new.jpg")
+            (temp_dir / "notes.txt").write_text("not an image")
+
+            events = watcher.poll(1.0)
+        finally:
+            watcher.close()
+
+        assert events.written == [temp_dir / "new.jpg"]
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+    def test_inotify_reports_removed_images(self, temp_dir):
+        """Test inotify reports files removed from group directories."""
+        (temp_dir / "group_0").mkdir()
+        Image.new("RGB", (10, 10)).save(temp_dir / "group_0" / "a.jpg")
+        watcher = InotifyWatcher(temp_dir)
+        try:
+            (temp_dir / "group_1").mkdir()
+            watcher.poll(1.0)
+            Image.new("RGB", (10, 10)).save(temp_dir / "group_1" / "b.jpg")
+            (temp_dir / "group_0" / "a.jpg").unlink()
+            (temp_dir / "group_1" / "b.jpg").unlink()
+
+            events = watcher.poll(1.0)
+        finally:
+            watcher.close()
+
+        assert events.removed == [
+            temp_dir / "group_0" / "a.jpg",
+            temp_dir / "group_1" / "b.jpg",
+        ]
+        assert events.written == []
+
+
+class TestIncrementalClusters:
+    """Tests for IncrementalClusters class."""
+
+    @staticmethod
+    def _hashes(directory, vectors):
+        hash_data = []
+        for i, vector in enumerate(vectors):
+            path = directory / f"img{i:02d}.jpg"
+            path.write_bytes(b"")
+            hash_data.append(ImageHash(path=path, hash=np.asarray(vector, np.uint8)))
+        return hash_data
+
+    def test_matches_clustering_everything_again(self, temp_dir):
+        """Test batches yield the same clusters as one pass over all images."""
+        rng = np.random.default_rng(0)
+        centers = rng.integers(0, 2, (8, 64), dtype=np.uint8)
+        vectors = centers[rng.integers(0, 8, 40)]
+        vectors = np.where(rng.random(vectors.shape) < 0.04, 1 - vectors, vectors)
+        hash_data = self._hashes(temp_dir, vectors)
+        expected = _partition(cluster_hashes(hash_data, eps=0.1))
+
+        clusters = IncrementalClusters(
+            hash_data[:10], cluster_hashes(hash_data[:10], eps=0.1), eps=0.1
+        )
+        for start in range(10, 40, 7):
+            clusters.add(hash_data[start : start + 7], temp_dir)
+
+        current = _current(clusters)
+        assert _partition(current) == expected
+        assert all(c.path.exists() for c in current)
+        assert all(
+            c.path.parent.name == f"group_{c.cluster_id}"
+            for c in current
+            if c.cluster_id != -1
+        )
+
+    def test_bridging_image_merges_clusters(self, temp_dir):
+        """Test an image close to two clusters merges them into one group."""
+        a, b = np.zeros(64, np.uint8), np.zeros(64, np.uint8)
+        b[:12] = 1
+        bridge = np.zeros(64, np.uint8)
+        bridge[:6] = 1
+        hash_data = self._hashes(temp_dir, [a, a, b, b, bridge])
+        initial = cluster_hashes(hash_data[:4], eps=0.1)
+        clusters = IncrementalClusters(hash_data[:4], initial, eps=0.1)
+
+        changed = clusters.add(hash_data[4:], temp_dir)
+
+        assert len({c.cluster_id for c in _current(clusters)}) == 1
+        assert changed[0].path.name == "img04.jpg"
+        assert len(changed) == 3  # the bridge and the group that moved
+
+    def test_new_copy_of_unique_image_founds_group(self, temp_dir):
+        """Test a copy of an ungrouped image forms a group with it."""
+        rng = np.random.default_rng(1)
+        unique, other = rng.integers(0, 2, (2, 64), dtype=np.uint8)
+        hash_data = self._hashes(temp_dir, [unique, other, unique])
+        initial = cluster_hashes(hash_data[:2], eps=0.1)
+        clusters = IncrementalClusters(hash_data[:2], initial, eps=0.1)
+
+        changed = clusters.add(hash_data[2:], temp_dir)
+
+        assert sorted(c.path.name for c in changed) == ["img00.jpg", "img02.jpg"]
+        assert changed[0].cluster_id == changed[1].cluster_id != -1
+        assert (temp_dir / "img01.jpg").exists()
+
+    def test_removed_image_is_not_linked(self, temp_dir):
+        """Test a new copy of a removed image stays ungrouped."""
+        rng = np.random.default_rng(2)
+        unique, other = rng.integers(0, 2, (2, 64), dtype=np.uint8)
+        hash_data = self._hashes(temp_dir, [unique, other, unique])
+        initial = cluster_hashes(hash_data[:2], eps=0.1)
+        clusters = IncrementalClusters(hash_data[:2], initial, eps=0.1)
+        (temp_dir / "img00.jpg").unlink()
+
+        clusters.remove([temp_dir / "img00.jpg", temp_dir / "img01.jpg"])
+        changed = clusters.add(hash_data[2:], temp_dir)
+
+        assert [(c.path.name, c.cluster_id) for c in changed] == [("img02.jpg", -1)]
+        assert clusters.index.paths[:2] == ["", str(temp_dir / "img01.jpg")]
+
+    def test_removed_directory_forgets_its_images(self, temp_dir):
+        """Test removing a group directory forgets every image inside it."""
+        a = np.zeros(64, np.uint8)
+        hash_data = self._hashes(temp_dir, [a, a])
+        grouped = group_image_files(cluster_hashes(hash_data, eps=0.1), temp_dir)
+        clusters = IncrementalClusters(hash_data, grouped, eps=0.1)
+        shutil.rmtree(temp_dir / "group_0")
+
+        clusters.remove([temp_dir / "group_0"])
+
+        assert clusters.index.paths == ["", ""]
+
+
+class TestWatchFolder:
+    """Tests for WatchFolder class."""
+
+    @pytest.mark.parametrize("polling", [False, True])
+    def test_groups_arriving_copies(self, temp_dir, polling):
+        """Test a copy written after startup joins its original's group."""
+        rng = np.random.default_rng(0)
+        first, second = (rng.integers(0, 128, (64, 64), dtype=np.uint8) for _ in "ab")
+        for i in range(2):
+            Image.fromarray(first + i).save(temp_dir / f"a_{i}.jpg")
+        Image.fromarray(second).save(temp_dir / "b_0.jpg")
+        watcher = WatchFolder(
+            temp_dir,
+            eps=0.1,
+            backend="thread",
+            settle=0.05,
+            poll_interval=0.05,
+            polling=polling,
+        )
+
+        with watcher:
+            assert (temp_dir / "group_0" / "a_0.jpg").exists()
+            Image.fromarray(first + 2).save(temp_dir / "a_2.jpg")
+            Image.fromarray(second + 1).save(temp_dir / "b_1.jpg")
+            changed = []
+            deadline = time.monotonic() + 5
+            while len(changed) < 3 and time.monotonic() < deadline:
+                changed += watcher.step()
+
+        assert (temp_dir / "group_0" / "a_2.jpg").exists()
+        assert (temp_dir / "group_1" / "b_0.jpg").exists()
+        assert (temp_dir / "group_1" / "b_1.jpg").exists()
+        assert sorted(c.path.name for c in changed) == ["a_2.jpg", "b_0.jpg", "b_1.jpg"]
+
+    def test_cache_uses_worker_digests(self, temp_dir, monkeypatch):
+        """Test hashes are cached with the digests the workers computed."""
+        for i in range(2):
+            Image.new("RGB", (32, 32), color=(i * 90, 0, 0)).save(
+                temp_dir / f"photo_{i}.jpg"
+            )
+
+        def reread(data: bytes) -> bytes:
+            raise AssertionError("cache.put read the file again")
+
+        monkeypatch.setattr("photocluster.internal.cache.content_digest", reread)
+        with HashCache(temp_dir / "cache.db") as cache:
+            with WatchFolder(temp_dir, backend="thread", cache=cache):
+                pass
+
+            assert len(cache) == 2
+
+    @pytest.mark.parametrize("polling", [False, True])
+    def test_ignores_own_moves(self, temp_dir, polling):
+        """Test a file the watcher moved back into the folder is not rehashed."""
+        (temp_dir / "group_0").mkdir()
+        Image.new("RGB", (32, 32)).save(temp_dir / "group_0" / "single.jpg")
+        watcher = WatchFolder(
+            temp_dir, backend="thread", settle=0, poll_interval=0.05, polling=polling
+        )
+
+        with watcher:
+            assert (temp_dir / "single.jpg").exists()
+            watcher.step()
+
+            assert len(watcher.debouncer) == 0
+            assert watcher._moved_in == {}
+
+    def test_rejects_cache_of_other_hashes(self, temp_dir):
+        """Test a cache of rotation-aware hashes is refused."""
+        algorithm = hash_algorithm(dihedral=True)
+        with HashCache(temp_dir / "cache.db", algorithm=algorithm) as cache:
+            with pytest.raises(ValueError, match=algorithm):
+                WatchFolder(temp_dir, cache=cache)